@@ -0,0 +1,180 @@
+"""
+Animaciones de win2d
+Un bloque win2d con move/now/lost se convierte en una animación en el
+tiempo t (segundos):
+
+    win2d ondas(800, 500) {
+        draw2d(cos(x), -6.28, 6.28);    // fondo fijo
+        move(sin(x - t), -6.28, 6.28);  // curva y = f(x, t)
+        now(cos(t), sin(t));            // punto en (x(t), y(t))
+        lost(t > 4);                    // termina cuando se cumple
+    }
+
+El intérprete guarda la descripción de la animación bajo el hash de su
+contenido, en disco para que cualquier worker la encuentre; /animacion/<id>
+la dibuja y envía los cuadros a medida que salen.
+Cada cuadro solo redibuja los artistas que cambian (blitting): ejes, rejilla,
+título y fondo se dibujan una sola vez.
+"""
+
+import json
+import struct
+
+from cache import AlmacenDisco, ResponseCache, clave_contenido
+
+# Cuadros por segundo y duración máxima (s) si lost nunca se cumple
+FPS = 20
+DURACION_MAX = 6
+CUADROS_MAX = FPS * DURACION_MAX
+
+DPI = 100
+
+MUESTRAS = 400  # Puntos de cada curva por cuadro
+COLORES = ('deepskyblue', '#f472b6', '#facc15', '#a78bfa')
+
+# Descripciones (JSON) indexadas por el hash de su contenido, compartidas
+# entre workers (/animacion/<id> no siempre llega al que ejecutó el programa)
+animaciones = AlmacenDisco("animaciones", max_bytes=4 * 1024 * 1024)
+# Secuencias de cuadros ya dibujadas completas, listas para reenviar; cada
+# worker que no la tenga la vuelve a dibujar desde la descripción
+renderizadas = ResponseCache(max_bytes=32 * 1024 * 1024)
+
+def guardar(descripcion, huella):
+    """Guarda la descripción y retorna su id (hash del contenido y del estilo)"""
+    id_animacion = clave_contenido(descripcion, huella)
+    animaciones.guardar(id_animacion, json.dumps(descripcion).encode('utf-8'))
+    return id_animacion
+
+def obtener(id_animacion):
+    """Descripción guardada de una animación (None si ya no está)"""
+    datos = animaciones.obtener(id_animacion)
+    return None if datos is None else json.loads(datos)
+
+def _en_el_tiempo(f, t, x=0.0):
+    """Evalúa f(x, t) para todos los tiempos de una vez; un valor por t"""
+    import numpy as np
+    with np.errstate(all='ignore'):
+        valores = f(x, t)
+    return np.broadcast_to(np.asarray(valores, dtype=np.float64), t.shape)
+
+def _fin(f, t):
+    """Cantidad de cuadros antes del primero en que se cumple lost"""
+    import numpy as np
+    try:
+        with np.errstate(all='ignore'):
+            cumple = np.broadcast_to(np.asarray(f(0.0, t), dtype=bool), t.shape)
+    except (TypeError, ValueError):
+        # Condiciones con and/or no se evalúan sobre arreglos: cuadro a cuadro
+        cumple = np.array([bool(f(0.0, float(ti))) for ti in t])
+    return int(np.argmax(cumple)) if cumple.any() else len(t)
+
+def evaluar(descripcion):
+    """Evalúa curvas, puntos y fondo en todos los cuadros.
+
+    Retorna t, las series de cada elemento y los límites fijos de los ejes
+    (con blitting los ejes no se pueden reajustar entre cuadros).
+    """
+    import numpy as np
+    from interpreter import compile_expr_1d, compile_expr_animada
+    from raster import limites
+
+    t = np.arange(CUADROS_MAX) / FPS
+    if descripcion["fin"] is not None:
+        t = t[:_fin(compile_expr_animada(descripcion["fin"]), t)]
+    if len(t) == 0:
+        raise ValueError("lost se cumple antes del primer cuadro")
+
+    curvas = []
+    for expr, xmin, xmax in descripcion["curvas"]:
+        x = np.linspace(xmin, xmax, MUESTRAS)
+        with np.errstate(all='ignore'):
+            Y = compile_expr_animada(expr)(x[None, :], t[:, None])
+        curvas.append((x, np.broadcast_to(np.asarray(Y, dtype=np.float64), (len(t), MUESTRAS))))
+
+    puntos = []
+    for expr_x, expr_y in descripcion["puntos"]:
+        puntos.append((_en_el_tiempo(compile_expr_animada(expr_x), t),
+                       _en_el_tiempo(compile_expr_animada(expr_y), t)))
+
+    fondo = []
+    for expr, xmin, xmax in descripcion["fondo"]:
+        x = np.linspace(xmin, xmax, MUESTRAS)
+        with np.errstate(all='ignore'):
+            y = np.broadcast_to(np.asarray(compile_expr_1d(expr)(x), dtype=np.float64), x.shape)
+        fondo.append((x, y))
+
+    xs = [x for x, _ in curvas + fondo] + [px for px, _ in puntos]
+    ys = [Y.ravel() for _, Y in curvas] + [y for _, y in fondo] + [py for _, py in puntos]
+    xs = np.concatenate(xs) if xs else np.zeros(1)
+    ys = np.concatenate(ys) if ys else np.zeros(1)
+    return {
+        "t": t,
+        "curvas": curvas,
+        "puntos": puntos,
+        "fondo": fondo,
+        "xlim": limites(xs[np.isfinite(xs)]),
+        "ylim": limites(ys[np.isfinite(ys)])
+    }
+
+def cuadros(descripcion, datos=None):
+    """Genera los cuadros codificados, uno por vez, redibujando solo lo que se mueve"""
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from PIL import Image
+    from interpreter import pyplot
+    from raster import codificar
+
+    pyplot()  # Tema de MathView en rcParams
+    if datos is None:
+        datos = evaluar(descripcion)
+
+    # Figura sin pyplot: es de este hilo solamente
+    fig = Figure(figsize=(descripcion["ancho"] / DPI, descripcion["alto"] / DPI), dpi=DPI)
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.set_xlim(*datos["xlim"])
+    ax.set_ylim(*datos["ylim"])
+    ax.set_title(f'Animación: {descripcion["nombre"]}', fontsize=14, fontweight='bold')
+    ax.set_xlabel('x', fontsize=12)
+    ax.set_ylabel('y', fontsize=12)
+    ax.grid(True, alpha=0.3)
+    for x, y in datos["fondo"]:
+        ax.plot(x, y, color='#94a3b8', linewidth=1.5)
+
+    # Artistas que cambian en cada cuadro: no entran en el fondo guardado
+    lineas = [ax.plot([], [], color=COLORES[i % len(COLORES)], linewidth=2.5, animated=True)[0]
+              for i in range(len(datos["curvas"]))]
+    marcadores = [ax.plot([], [], 'o', color='#4ade80', markersize=9, animated=True)[0]
+                  for _ in datos["puntos"]]
+    reloj = ax.text(0.02, 0.96, '', transform=ax.transAxes, va='top', fontsize=11, animated=True)
+    fig.tight_layout()
+
+    canvas.draw()
+    fondo = canvas.copy_from_bbox(fig.bbox)
+    tamano = canvas.get_width_height()
+
+    for k, t in enumerate(datos["t"]):
+        canvas.restore_region(fondo)
+        for linea, (x, Y) in zip(lineas, datos["curvas"]):
+            linea.set_data(x, Y[k])
+            ax.draw_artist(linea)
+        for marcador, (px, py) in zip(marcadores, datos["puntos"]):
+            marcador.set_data([px[k]], [py[k]])
+            ax.draw_artist(marcador)
+        reloj.set_text(f't = {t:.2f} s')
+        ax.draw_artist(reloj)
+
+        imagen = Image.frombuffer("RGBA", tamano, canvas.buffer_rgba(), "raw", "RGBA", 0, 1).convert("RGB")
+        yield codificar(imagen, descripcion["formato"])
+
+def flujo(id_animacion, descripcion):
+    """Cuadros como registros [largo uint32 big-endian][imagen], a medida que salen.
+
+    Al terminar guarda la secuencia completa para reenviarla sin redibujar.
+    """
+    partes = []
+    for cuadro in cuadros(descripcion):
+        registro = struct.pack('>I', len(cuadro)) + cuadro
+        partes.append(registro)
+        yield registro
+    renderizadas.guardar(id_animacion, b"".join(partes))
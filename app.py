@@ -1,12 +1,40 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, Response, stream_with_context
 from lexer import Lexer
 from parser import Parser
-from interpreter import Interpreter
+from interpreter import (
+    Interpreter, VERSION_INTERPRETE, MODOS_GRAFICO, MODOS_3D, ESCENAS, graficos,
+    almacen_imagenes, imagenes_disponibles, elegir_formato, ancho_imagen, tipo_mime,
+    compile_expr_1d, compile_expr_2d
+)
 from semantic_analyzer import SemanticAnalyzer
+from sessions import SessionStore
+from documents import Documento
+from cache import ResponseCache, clave_contenido
+from safe_eval import LimiteExcedido
+import animation
+import json
 import traceback
 
 app = Flask(__name__)
 
+# Ejecuciones detenidas en put(), reanudables con /continuar
+sesiones = SessionStore(ttl=600, max_sesiones=500)
+
+# Respuestas finales de /compilar indexadas por (código, inputs, versión)
+respuestas = ResponseCache(max_bytes=64 * 1024 * 1024)
+
+# Documentos del editor analizados de forma incremental (/documento)
+documentos = SessionStore(ttl=1800, max_sesiones=200)
+
+# Una imagen se sirve bajo el hash de su contenido: nunca cambia
+CACHE_IMAGENES = 365 * 24 * 3600  # Segundos
+
+# /evaluar: puntos por bloque de la respuesta y máximo por variable
+PUNTOS_BLOQUE = 65536
+PUNTOS_MAX_EVALUAR = 4_000_000
+# Errores de la expresión al evaluarla (no del servidor)
+ERRORES_EVALUACION = (NameError, TypeError, ValueError, ArithmeticError, LookupError, LimiteExcedido)
+
 @app.route("/")
 def index():
     return render_template("index.html")
@@ -17,6 +45,11 @@ def compilar():
         data = request.get_json()
         codigo = data.get("codigo", "")
         user_inputs = data.get("inputs", [])
+        modo_grafico = data.get("modo_grafico", "imagen")
+        modo_3d = data.get("modo_3d", "superficie")
+        escena = data.get("escena", "ultima")
+        ancho = data.get("ancho")
+        formatos = data.get("formatos", ["png"])
 
         if not isinstance(codigo, str) or not codigo.strip():
             return jsonify({
@@ -24,83 +57,366 @@ def compilar():
                 "mensaje": "Código no válido o vacío."
             }), 400
 
-        # ========== FASE 1: ANÁLISIS LÉXICO ==========
-        lexer = Lexer()
-        resultado_lexico = lexer.tokenizar(codigo)
-        tokens = resultado_lexico["tokens"]
-        errores_lexico = resultado_lexico["errores"]
-
-        if errores_lexico:
+        if modo_grafico not in MODOS_GRAFICO:
             return jsonify({
-                "estado": "error_lexico",
-                "mensaje": "Errores léxicos encontrados",
-                "errores": errores_lexico,
-                "tokens": [(t[0], t[1]) for t in tokens]
-            })
-
-        # ========== FASE 2: ANÁLISIS SINTÁCTICO ==========
-        parser = Parser(tokens)
-        resultado_sintactico = parser.analizar()
+                "estado": "error",
+                "mensaje": f"Modo de gráfico no válido: {modo_grafico}"
+            }), 400
 
-        if resultado_sintactico["errores"]:
+        if modo_3d not in MODOS_3D:
             return jsonify({
-                "estado": "error_sintactico",
-                "mensaje": "Errores sintácticos encontrados",
-                "errores": resultado_sintactico["errores"],
-                "tokens": [(t[0], t[1]) for t in tokens]
-            })
-
-        # ========== FASE 3: ANÁLISIS SEMÁNTICO ==========
-        semantic_analyzer = SemanticAnalyzer(tokens)
-        resultado_semantico = semantic_analyzer.analizar()
-        
-        errores_semanticos = resultado_semantico["errores"]
-        advertencias_semanticas = resultado_semantico["advertencias"]
-        
-        # Si hay errores semánticos, reportarlos antes de ejecutar
-        if errores_semanticos:
+                "estado": "error",
+                "mensaje": f"Modo de draw3d no válido: {modo_3d}"
+            }), 400
+
+        if escena not in ESCENAS:
             return jsonify({
-                "estado": "error_semantico",
-                "mensaje": "Errores semánticos encontrados",
-                "errores": errores_semanticos,
-                "advertencias": advertencias_semanticas,
-                "tokens": [(t[0], t[1]) for t in tokens],
-                "tabla_simbolos": resultado_semantico.get("tabla_simbolos", {})
-            })
-
-        # ========== FASE 4: INTERPRETACIÓN Y EJECUCIÓN ==========
-        interpreter = Interpreter(codigo, user_inputs)
-        resultado_interprete = interpreter.ejecutar()
-
-        # Si hay solicitudes de input, devolver para que el frontend las maneje
-        if resultado_interprete.get("solicitudes_input"):
+                "estado": "error",
+                "mensaje": f"Modo de escena no válido: {escena}"
+            }), 400
+
+        # Ancho del área del gráfico en píxeles de pantalla (opcional)
+        if ancho is not None:
+            if isinstance(ancho, bool) or not isinstance(ancho, (int, float)) or ancho <= 0:
+                return jsonify({
+                    "estado": "error",
+                    "mensaje": f"Ancho de imagen no válido: {ancho}"
+                }), 400
+            ancho = ancho_imagen(ancho)
+
+        if not isinstance(formatos, list):
+            formatos = []
+        formato = elegir_formato(formatos)
+
+        if not isinstance(user_inputs, list):
+            user_inputs = []
+        user_inputs = [str(valor) for valor in user_inputs]
+
+        # El mismo programa con los mismos inputs produce la misma respuesta
+        clave = clave_contenido(codigo, user_inputs, modo_grafico, modo_3d, escena, ancho, formato,
+                                VERSION_INTERPRETE)
+        guardada = respuestas.obtener(clave)
+        # Si el almacén ya desalojó alguna de sus imágenes, se vuelve a ejecutar
+        if guardada is not None and imagenes_disponibles(json.loads(guardada)):
+            return Response(guardada, mimetype="application/json")
+
+        respuesta = analizar_y_ejecutar(codigo, user_inputs, modo_grafico, modo_3d, escena, ancho, formato)
+
+        # Una pausa en put() lleva un token de sesión propio y un dibujo
+        # fallido puede ser pasajero: no se reutilizan
+        if (respuesta.status_code == 200 and not respuesta.cache_control.no_store
+                and respuesta.get_json().get("estado") != "necesita_input"):
+            respuestas.guardar(clave, respuesta.get_data())
+        return respuesta
+
+    except Exception as e:
+        return jsonify({
+            "estado": "error",
+            "mensaje": f"Error interno: {str(e)}",
+            "traceback": traceback.format_exc()
+        }), 500
+
+@app.route("/imagen/<digest>", methods=["GET"])
+def imagen(digest):
+    """Imagen de un gráfico por el hash de su contenido (ver interpreter.guardar_imagen)"""
+    # El navegador ya tiene ese contenido: no hace falta ni buscarlo
+    if digest in request.if_none_match:
+        respuesta = Response(status=304)
+    else:
+        datos = almacen_imagenes.obtener(digest)
+        if datos is None:
             return jsonify({
-                "estado": "necesita_input",
-                "mensaje": "El programa requiere entrada del usuario",
-                "solicitudes": resultado_interprete["solicitudes_input"]
-            })
-
-        # ========== RESULTADO FINAL ==========
-        tiene_errores_ejecucion = bool(resultado_interprete.get("errores"))
-        
-        # Combinar advertencias semánticas con errores de ejecución si los hay
-        todos_errores = []
-        if advertencias_semanticas:
-            todos_errores.extend(advertencias_semanticas)
-        if tiene_errores_ejecucion:
-            todos_errores.extend(resultado_interprete.get("errores", []))
+                "estado": "imagen_no_disponible",
+                "mensaje": "La imagen ya no está disponible; vuelva a ejecutar el programa."
+            }), 404
+        respuesta = Response(datos, mimetype=tipo_mime(datos))
+
+    respuesta.set_etag(digest)
+    respuesta.cache_control.public = True
+    respuesta.cache_control.max_age = CACHE_IMAGENES
+    respuesta.cache_control.immutable = True
+    return respuesta
+
+@app.route("/animacion/<id_animacion>", methods=["GET"])
+def animacion(id_animacion):
+    """Cuadros de una animación de win2d, enviados a medida que se dibujan.
+
+    Cada registro es [largo uint32 big-endian][imagen]; el cliente puede
+    mostrar el primer cuadro sin esperar al resto.
+    """
+    if id_animacion in request.if_none_match:
+        respuesta = Response(status=304)
+    else:
+        completa = animation.renderizadas.obtener(id_animacion)
+        if completa is not None:
+            respuesta = Response(completa, mimetype="application/octet-stream")
+        else:
+            descripcion = animation.obtener(id_animacion)
+            if descripcion is None:
+                return jsonify({
+                    "estado": "animacion_no_disponible",
+                    "mensaje": "La animación ya no está disponible; vuelva a ejecutar el programa."
+                }), 404
+            respuesta = Response(stream_with_context(animation.flujo(id_animacion, descripcion)),
+                                 mimetype="application/octet-stream")
+
+    # Mismo id, mismos cuadros: se cachea como las imágenes
+    respuesta.set_etag(id_animacion)
+    respuesta.cache_control.public = True
+    respuesta.cache_control.max_age = CACHE_IMAGENES
+    respuesta.cache_control.immutable = True
+    return respuesta
+
+@app.route("/evaluar", methods=["POST"])
+def evaluar():
+    """Evalúa una expresión sobre arreglos de puntos (autocorrección, tablas de valores).
+
+    JSON: {"expresion": "sin(x) * y", "x": [...], "y": [...]}, con listas
+    1D o 2D de la misma forma; sin "y" la expresión es de x sola.
+    Binario (application/octet-stream): Float64 little-endian, todos los x
+    y después todos los y; van en la URL la expresión, las variables
+    ("x" o "x,y") y, opcionalmente, la forma ("20,50"):
+        POST /evaluar?expresion=x^2&variables=x
 
+    La respuesta es JSON ({"forma", "valores", "estado"}; valores en orden
+    de filas, inf y nan como null) o Float64 little-endian con la forma en
+    X-Forma, según Accept.
+    Se envía por bloques a medida que se evalúa. Un error en el primer
+    bloque es un 400; uno posterior, con la respuesta ya empezada, termina
+    el JSON con "estado": "error" y su "mensaje", y corta el binario antes
+    de su Content-Length.
+    """
+    try:
+        if request.mimetype == "application/octet-stream":
+            expresion, puntos = puntos_binarios()
+        else:
+            expresion, puntos = puntos_json(request.get_json(silent=True))
+        if len(puntos) == 2:
+            f = compile_expr_2d(expresion)
+        else:
+            f = compile_expr_1d(expresion)
+    except ValueError as e:
         return jsonify({
-            "estado": "correcto" if not todos_errores else "con_errores",
+            "estado": "error",
+            "mensaje": str(e)
+        }), 400
+
+    forma = puntos[0].shape
+    bloques = evaluar_por_bloques(f, [p.reshape(-1) for p in puntos])
+    try:
+        # El primer bloque se evalúa ya: los errores de la expresión son un 400
+        primero = next(bloques, None)
+    except ERRORES_EVALUACION as e:
+        return jsonify({
+            "estado": "error",
+            "mensaje": f"Error evaluando la expresión: {e}"
+        }), 400
+
+    def todos():
+        if primero is not None:
+            yield primero
+        yield from bloques
+
+    binario = request.accept_mimetypes.best_match(
+        ["application/json", "application/octet-stream"]) == "application/octet-stream"
+    if binario:
+        respuesta = Response(stream_with_context(valores_binarios(todos())),
+                             mimetype="application/octet-stream")
+        respuesta.headers["X-Forma"] = ",".join(str(n) for n in forma)
+        # Con el largo anunciado, un corte por error se detecta como respuesta incompleta
+        respuesta.content_length = puntos[0].size * 8
+        return respuesta
+    return Response(stream_with_context(valores_json(forma, todos())), mimetype="application/json")
+
+def puntos_json(data):
+    """(expresión, [x] o [x, y]) de una petición JSON de /evaluar"""
+    import numpy as np
+    if not isinstance(data, dict):
+        raise ValueError("Se esperaba un objeto JSON con expresion y x.")
+    expresion = data.get("expresion")
+    if not isinstance(expresion, str) or not expresion.strip():
+        raise ValueError("Expresión no válida o vacía.")
+    puntos = []
+    for nombre in ("x", "y"):
+        if nombre not in data:
+            continue
+        try:
+            arreglo = np.asarray(data[nombre], dtype=np.float64)
+        except (TypeError, ValueError):
+            raise ValueError(f"Los valores de {nombre} deben ser números (lista 1D o 2D).")
+        puntos.append(arreglo)
+    if not puntos or "x" not in data:
+        raise ValueError("Faltan los valores de x.")
+    return expresion, validar_puntos(puntos)
+
+def puntos_binarios():
+    """(expresión, [x] o [x, y]) de una petición Float64 de /evaluar"""
+    import numpy as np
+    expresion = request.args.get("expresion", "")
+    if not expresion.strip():
+        raise ValueError("Expresión no válida o vacía.")
+    variables = request.args.get("variables", "x")
+    if variables not in ("x", "x,y"):
+        raise ValueError(f"Variables no válidas: {variables} (se espera x o x,y)")
+    cantidad = len(variables.split(","))
+
+    cuerpo = request.get_data()
+    if len(cuerpo) % (8 * cantidad):
+        raise ValueError("El cuerpo debe ser Float64: 8 bytes por valor de cada variable.")
+    valores = np.frombuffer(cuerpo, dtype='<f8').astype(np.float64, copy=False)
+    por_variable = len(valores) // cantidad
+    forma = request.args.get("forma")
+    if forma:
+        try:
+            forma = tuple(int(n) for n in forma.split(","))
+        except ValueError:
+            raise ValueError(f"Forma no válida: {forma}")
+        if len(forma) > 2 or any(n < 0 for n in forma) or int(np.prod(forma)) != por_variable:
+            raise ValueError(f"La forma {forma} no coincide con {por_variable} valores por variable.")
+    else:
+        forma = (por_variable,)
+    return expresion, validar_puntos([valores[i * por_variable:(i + 1) * por_variable].reshape(forma)
+                                      for i in range(cantidad)])
+
+def validar_puntos(puntos):
+    """Comprueba dimensiones, formas iguales y el máximo de puntos"""
+    if any(p.ndim not in (1, 2) for p in puntos):
+        raise ValueError("Los puntos deben ser una lista 1D o 2D.")
+    if len(puntos) == 2 and puntos[0].shape != puntos[1].shape:
+        raise ValueError(f"x e y deben tener la misma forma: {puntos[0].shape} y {puntos[1].shape}")
+    if puntos[0].size > PUNTOS_MAX_EVALUAR:
+        raise ValueError(f"Demasiados puntos: {puntos[0].size} (máximo {PUNTOS_MAX_EVALUAR})")
+    return puntos
+
+def evaluar_por_bloques(f, puntos):
+    """Resultados de f sobre tramos de PUNTOS_BLOQUE puntos, como arreglos float64"""
+    import numpy as np
+    total = len(puntos[0])
+    for inicio in range(0, total, PUNTOS_BLOQUE):
+        tramo = [p[inicio:inicio + PUNTOS_BLOQUE] for p in puntos]
+        with np.errstate(all='ignore'):
+            valores = f(*tramo)
+        # Una expresión constante da un escalar: un valor por punto igual
+        yield np.broadcast_to(np.asarray(valores, dtype=np.float64), tramo[0].shape)
+
+def valores_json(forma, bloques):
+    """Respuesta JSON escrita por partes; los valores no finitos van como null.
+
+    El estado va al final: recién ahí se sabe si todos los bloques se evaluaron.
+    """
+    import numpy as np
+    yield '{"forma": %s, "valores": [' % json.dumps(list(forma))
+    separador = ""
+    try:
+        for bloque in bloques:
+            if len(bloque) == 0:
+                continue
+            valores = bloque.tolist()
+            if not np.isfinite(bloque).all():
+                valores = [v if np.isfinite(v) else None for v in valores]
+            yield separador + json.dumps(valores)[1:-1]
+            separador = ", "
+    except ERRORES_EVALUACION as e:
+        yield '], "estado": "error", "mensaje": %s}' % json.dumps(f"Error evaluando la expresión: {e}")
+        return
+    yield '], "estado": "correcto"}'
+
+def valores_binarios(bloques):
+    """Float64 little-endian de cada bloque; un error corta la respuesta"""
+    try:
+        for bloque in bloques:
+            yield bloque.astype('<f8').tobytes()
+    except ERRORES_EVALUACION:
+        return
+
+@app.route("/cache/estadisticas", methods=["GET"])
+def estadisticas_cache():
+    """Contadores de las cachés de respuestas, de gráficos y de imágenes, para ajustar su tamaño"""
+    return jsonify({
+        "respuestas": respuestas.estadisticas(),
+        "graficos": graficos.estadisticas(),
+        "imagenes": almacen_imagenes.estadisticas(),
+        "animaciones": animation.renderizadas.estadisticas()
+    })
+
+def analizar_y_ejecutar(codigo, user_inputs, modo_grafico="imagen", modo_3d="superficie", escena="ultima",
+                        ancho=None, formato="png"):
+    """Ejecuta las cuatro fases sobre el código y arma la respuesta"""
+    # ========== FASE 1: ANÁLISIS LÉXICO ==========
+    lexer = Lexer()
+    resultado_lexico = lexer.tokenizar(codigo)
+    tokens = resultado_lexico["tokens"]
+    errores_lexico = resultado_lexico["errores"]
+
+    if errores_lexico:
+        return jsonify({
+            "estado": "error_lexico",
+            "mensaje": "Errores léxicos encontrados",
+            "errores": errores_lexico,
+            "tokens": [(t[0], t[1]) for t in tokens]
+        })
+
+    # ========== FASE 2: ANÁLISIS SINTÁCTICO ==========
+    parser = Parser(tokens)
+    resultado_sintactico = parser.analizar()
+
+    if resultado_sintactico["errores"]:
+        return jsonify({
+            "estado": "error_sintactico",
+            "mensaje": "Errores sintácticos encontrados",
+            "errores": resultado_sintactico["errores"],
+            "tokens": [(t[0], t[1]) for t in tokens]
+        })
+
+    programa = resultado_sintactico["ast"]
+
+    # ========== FASE 3: ANÁLISIS SEMÁNTICO ==========
+    semantic_analyzer = SemanticAnalyzer(programa)
+    resultado_semantico = semantic_analyzer.analizar()
+    
+    errores_semanticos = resultado_semantico["errores"]
+    advertencias_semanticas = resultado_semantico["advertencias"]
+    
+    # Si hay errores semánticos, reportarlos antes de ejecutar
+    if errores_semanticos:
+        return jsonify({
+            "estado": "error_semantico",
+            "mensaje": "Errores semánticos encontrados",
+            "errores": errores_semanticos,
+            "advertencias": advertencias_semanticas,
             "tokens": [(t[0], t[1]) for t in tokens],
-            "salida": resultado_interprete.get("texto", ""),
-            "debug": resultado_interprete.get("debug", ""),
-            "errores": todos_errores,
-            "imagen": resultado_interprete.get("imagen", None),
-            "acciones": resultado_interprete.get("acciones", []),
             "tabla_simbolos": resultado_semantico.get("tabla_simbolos", {})
         })
 
+    # ========== FASE 4: INTERPRETACIÓN Y EJECUCIÓN ==========
+    interpreter = Interpreter(programa, user_inputs, modo_grafico, modo_3d, escena, ancho, formato)
+    resultado_interprete = interpreter.ejecutar()
+
+    return responder_ejecucion(interpreter, resultado_interprete, {
+        "tokens": [(t[0], t[1]) for t in tokens],
+        "advertencias": advertencias_semanticas,
+        "tabla_simbolos": resultado_semantico.get("tabla_simbolos", {})
+    })
+
+@app.route("/continuar", methods=["POST"])
+def continuar():
+    """Reanuda una ejecución detenida en put() con un único valor nuevo"""
+    try:
+        data = request.get_json()
+        estado = sesiones.tomar(data.get("sesion"))
+
+        # Sesión expirada, desalojada o atendida por otro worker:
+        # el cliente debe volver a enviar el programa completo a /compilar
+        if estado is None:
+            return jsonify({
+                "estado": "sesion_expirada",
+                "mensaje": "La sesión de ejecución ya no está disponible."
+            }), 410
+
+        interpreter = estado["interpreter"]
+        resultado_interprete = interpreter.reanudar(data.get("valor", ""))
+        return responder_ejecucion(interpreter, resultado_interprete, estado["contexto"])
+
     except Exception as e:
         return jsonify({
             "estado": "error",
@@ -108,6 +424,113 @@ def compilar():
             "traceback": traceback.format_exc()
         }), 500
 
+@app.route("/documento", methods=["POST"])
+def crear_documento():
+    """Abre un documento de análisis incremental con el código completo"""
+    try:
+        data = request.get_json()
+        codigo = data.get("codigo", "")
+        if not isinstance(codigo, str):
+            return jsonify({
+                "estado": "error",
+                "mensaje": "Código no válido."
+            }), 400
+
+        documento = Documento(codigo)
+        token = documentos.guardar(documento)
+        with documento.lock:
+            return jsonify(documento.resultado(token))
+
+    except Exception as e:
+        return jsonify({
+            "estado": "error",
+            "mensaje": f"Error interno: {str(e)}",
+            "traceback": traceback.format_exc()
+        }), 500
+
+@app.route("/documento/<token>/editar", methods=["POST"])
+def editar_documento(token):
+    """Aplica ediciones {inicio, fin, texto} y re-analiza solo lo afectado"""
+    try:
+        data = request.get_json()
+        documento = documentos.obtener(token)
+
+        # El cliente debe abrir de nuevo el documento con /documento
+        if documento is None:
+            return jsonify({
+                "estado": "documento_expirado",
+                "mensaje": "El documento ya no está disponible."
+            }), 410
+
+        with documento.lock:
+            # Las ediciones se calculan sobre una versión concreta del texto
+            if data.get("version") != documento.version:
+                return jsonify({
+                    "estado": "version_desfasada",
+                    "mensaje": "La versión del documento no coincide.",
+                    "version": documento.version
+                }), 409
+
+            try:
+                documento.aplicar_cambios(data.get("cambios", []))
+            except (ValueError, KeyError, TypeError) as e:
+                return jsonify({
+                    "estado": "error",
+                    "mensaje": f"Edición no válida: {str(e)}"
+                }), 400
+
+            return jsonify(documento.resultado(token))
+
+    except Exception as e:
+        return jsonify({
+            "estado": "error",
+            "mensaje": f"Error interno: {str(e)}",
+            "traceback": traceback.format_exc()
+        }), 500
+
+def responder_ejecucion(interpreter, resultado_interprete, contexto):
+    """Arma la respuesta JSON de la fase de ejecución"""
+    # Si hay solicitudes de input, guardar la ejecución pausada y devolver
+    # el token para que el frontend la reanude
+    if resultado_interprete.get("solicitudes_input"):
+        token = sesiones.guardar({"interpreter": interpreter, "contexto": contexto})
+        return jsonify({
+            "estado": "necesita_input",
+            "mensaje": "El programa requiere entrada del usuario",
+            "solicitudes": resultado_interprete["solicitudes_input"],
+            "sesion": token
+        })
+
+    # ========== RESULTADO FINAL ==========
+    tiene_errores_ejecucion = bool(resultado_interprete.get("errores"))
+    advertencias_semanticas = contexto["advertencias"]
+    
+    # Combinar advertencias semánticas con errores de ejecución si los hay
+    todos_errores = []
+    if advertencias_semanticas:
+        todos_errores.extend(advertencias_semanticas)
+    if tiene_errores_ejecucion:
+        todos_errores.extend(resultado_interprete.get("errores", []))
+
+    respuesta = jsonify({
+        "estado": "correcto" if not todos_errores else "con_errores",
+        "tokens": contexto["tokens"],
+        "salida": resultado_interprete.get("texto", ""),
+        "debug": resultado_interprete.get("debug", ""),
+        "errores": todos_errores,
+        "imagen": resultado_interprete.get("imagen", None),
+        "grafico": resultado_interprete.get("grafico", None),
+        "imagenes": resultado_interprete.get("imagenes", []),
+        "animaciones": resultado_interprete.get("animaciones", []),
+        "acciones": resultado_interprete.get("acciones", []),
+        "tabla_simbolos": contexto["tabla_simbolos"]
+    })
+    # Un dibujo fallido puede salir bien al reintentar: ni el navegador ni
+    # la caché de respuestas deben conservarlo
+    if resultado_interprete.get("error_dibujo"):
+        respuesta.cache_control.no_store = True
+    return respuesta
+
 if __name__ == "__main__":
     import os
     port = int(os.environ.get("PORT", 5000))
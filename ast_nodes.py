@@ -0,0 +1,146 @@
+"""
+Nodos del Árbol de Sintaxis Abstracta (AST) de MathView
+El Parser construye estos nodos, el SemanticAnalyzer los anota y el
+Interpreter los ejecuta directamente, sin volver a leer el código fuente.
+"""
+
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+# Tokens tras los que no se deja espacio al reconstruir el texto
+_SIN_ESPACIO_DESPUES = {"PAR_IZQ", "CORCH_IZQ"}
+# Tokens antes de los que no se deja espacio
+_SIN_ESPACIO_ANTES = {"PAR_DER", "CORCH_DER", "COMA"}
+# Tokens que actúan como nombre de función cuando van seguidos de '('
+_LLAMABLES = {"IDENTIFICADOR", "FUNCION_MATH", "FUNCION_FACT", "FUNCION_EVA", "FUNCION_REM"}
+
+
+def _contiguo(anterior, token):
+    """True si token empieza justo donde terminaba anterior en el fuente"""
+    return anterior[2] == token[2] and anterior[3] + len(anterior[0]) == token[3]
+
+
+def _parte_de_exponente(anterior, token, exponente):
+    """True si token continúa un literal como 1e-5 o 2.5E3 que el lexer partió
+    en varios tokens (1, e, -5); `exponente` indica si ya se leyó la 'e'"""
+    if anterior is None or not _contiguo(anterior, token):
+        return False
+    lexema = token[0]
+    if exponente:
+        # Tras '1e': el signo o las cifras del exponente
+        return lexema in ("+", "-") or lexema.lstrip("+-").isdigit()
+    return anterior[1] == "NUMERO" and lexema[:1] in ("e", "E") and (lexema[1:].isdigit() or len(lexema) == 1)
+
+
+def unir_lexemas(tokens):
+    """Reconstruye el texto de una expresión a partir de sus tokens"""
+    partes = []
+    anterior = None
+    exponente = False  # Dentro de un literal con exponente aún incompleto
+    for token in tokens:
+        lexema, tipo = token[0], token[1]
+        if _parte_de_exponente(anterior, token, exponente):
+            # 1e-5 sin espacios: '1 e -5' ya no es un número
+            exponente = lexema[-1:] in ("e", "E", "+", "-")
+        else:
+            exponente = False
+            if partes and anterior[1] not in _SIN_ESPACIO_DESPUES and tipo not in _SIN_ESPACIO_ANTES:
+                if not (tipo == "PAR_IZQ" and anterior[1] in _LLAMABLES):
+                    partes.append(" ")
+        partes.append(lexema)
+        anterior = token
+    return "".join(partes)
+
+
+@dataclass
+class Expresion:
+    """Expresión: conserva sus tokens y el texto reconstruido"""
+    tokens: list
+    texto: str = ""
+    tipo: Optional[str] = None  # Anotado por el análisis semántico
+
+    def __post_init__(self):
+        if not self.texto:
+            self.texto = unir_lexemas(self.tokens)
+
+    def es_simple(self, tipo_token):
+        """True si la expresión es un único token del tipo indicado"""
+        return len(self.tokens) == 1 and self.tokens[0][1] == tipo_token
+
+
+@dataclass
+class Declaracion:
+    """int n = 10;  /  dec x;"""
+    tipo: str
+    nombre: Optional[str]
+    valor: Optional[Expresion] = None
+
+
+@dataclass
+class Asignacion:
+    """n = expr;  /  n += expr;  /  n -= expr;"""
+    nombre: str
+    operador: str
+    valor: Optional[Expresion] = None
+
+
+@dataclass
+class Incremento:
+    """n++;  /  n--;"""
+    nombre: str
+    operador: str
+
+
+@dataclass
+class Imprimir:
+    """pri(expr);"""
+    argumento: Optional[Expresion] = None
+
+
+@dataclass
+class Entrada:
+    """put(variable);"""
+    nombre: Optional[str] = None
+
+
+@dataclass
+class Condicional:
+    """if (c) {...} elif (c) {...} else {...}"""
+    ramas: List[Tuple[Expresion, list]] = field(default_factory=list)
+    sino: Optional[list] = None
+
+
+@dataclass
+class Mientras:
+    """while (c) {...}"""
+    condicion: Expresion
+    cuerpo: list = field(default_factory=list)
+
+
+@dataclass
+class LlamadaGrafica:
+    """draw2d(...), draw3d(...), text(...), move(...), now(...), lost(...)"""
+    nombre: str
+    tipo: str
+    argumentos: List[Expresion] = field(default_factory=list)
+
+
+@dataclass
+class Ventana:
+    """win2d nombre(...) {...}, win3d nombre(...) {...}, display(...) {...}"""
+    tipo: str
+    nombre: Optional[str]
+    argumentos: List[Expresion] = field(default_factory=list)
+    cuerpo: list = field(default_factory=list)
+
+
+@dataclass
+class Evaluacion:
+    """Expresión usada como instrucción, p. ej. fact(5);"""
+    expresion: Expresion
+
+
+@dataclass
+class Programa:
+    """Raíz del árbol"""
+    cuerpo: list = field(default_factory=list)
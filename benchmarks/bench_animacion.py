@@ -0,0 +1,73 @@
+"""
+Benchmark de las animaciones de win2d
+Compara animation.cuadros (blitting: solo se redibujan los artistas que se
+mueven) con redibujar la figura completa en cada cuadro, y mide cuánto
+tarda en salir el primer cuadro frente a la animación completa.
+
+Uso: python benchmarks/bench_animacion.py [formato]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from io import BytesIO
+from animation import cuadros, evaluar
+from interpreter import pyplot
+
+DESCRIPCION = {
+    "nombre": "ondas", "ancho": 800, "alto": 500,
+    "fondo": [["cos(x)", -6.28, 6.28]],
+    "curvas": [["sin(x - t)", -6.28, 6.28], ["0.5 * sin(2*x + t)", -6.28, 6.28]],
+    "puntos": [["cos(t)", "sin(t)"]],
+    "fin": None,
+    "formato": "png"
+}
+
+def sin_blitting(descripcion, datos):
+    """Cada cuadro es una figura nueva dibujada entera, como un draw2d por cuadro"""
+    plt = pyplot()
+    for k, t in enumerate(datos["t"]):
+        fig, ax = plt.subplots(figsize=(descripcion["ancho"] / 100, descripcion["alto"] / 100))
+        ax.set_xlim(*datos["xlim"])
+        ax.set_ylim(*datos["ylim"])
+        ax.set_title(f'Animación: {descripcion["nombre"]}', fontsize=14, fontweight='bold')
+        ax.grid(True, alpha=0.3)
+        for x, y in datos["fondo"]:
+            ax.plot(x, y, color='#94a3b8', linewidth=1.5)
+        for x, Y in datos["curvas"]:
+            ax.plot(x, Y[k], linewidth=2.5)
+        for px, py in datos["puntos"]:
+            ax.plot([px[k]], [py[k]], 'o', markersize=9)
+        ax.text(0.02, 0.96, f't = {t:.2f} s', transform=ax.transAxes, va='top')
+        fig.tight_layout()
+        buf = BytesIO()
+        fig.savefig(buf, format='png', dpi=100)
+        plt.close(fig)
+        yield buf.getvalue()
+
+def medir(generador):
+    inicio = time.perf_counter()
+    primero = None
+    cantidad = 0
+    for _ in generador:
+        cantidad += 1
+        if primero is None:
+            primero = time.perf_counter() - inicio
+    return primero, time.perf_counter() - inicio, cantidad
+
+def main():
+    DESCRIPCION["formato"] = sys.argv[1] if len(sys.argv) > 1 else "png"
+    datos = evaluar(DESCRIPCION)
+    list(cuadros(DESCRIPCION, datos))  # Calentar matplotlib y las fuentes
+
+    print(f"{'Modo':<14} {'1.er cuadro':>12} {'Total':>10} {'Por cuadro':>12}")
+    for nombre, generador in (("sin blitting", sin_blitting(DESCRIPCION, datos)),
+                              ("blitting", cuadros(DESCRIPCION, datos))):
+        primero, total, cantidad = medir(generador)
+        print(f"{nombre:<14} {primero * 1000:>9.0f} ms {total * 1000:>7.0f} ms {total / cantidad * 1000:>9.1f} ms")
+
+if __name__ == "__main__":
+    main()
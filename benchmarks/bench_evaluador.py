@@ -0,0 +1,68 @@
+"""
+Benchmark del evaluador por bloques
+Compara eval (un arreglo temporal del tamaño de la malla por cada operación)
+con evaluator.ProgramaBloques (ufuncs con out= sobre búferes de un bloque)
+en mallas de draw3d: tiempo y pico de memoria (tracemalloc) de evaluar.
+
+Uso: python benchmarks/bench_evaluador.py [lado de la malla]
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import evaluator
+from interpreter import _SAFE_NAMES, cargar_numpy, compile_expr_2d
+
+EXPRESIONES = (
+    "sin(x*y)",
+    "x^2 - y^2",
+    "sin(sqrt(x^2 + y^2)) / (sqrt(x^2 + y^2) + 0.1)",
+    "exp(-(x^2 + y^2) / 4) * cos(3*x) * sin(2*y) + 0.1*x*y",
+)
+BLOQUES = (1024, 4096, 16384, 65536)
+
+def con_eval(expr):
+    """f(x, y) evaluada con eval, como antes del evaluador por bloques"""
+    codigo = compile(expr.replace('^', '**'), "<expr2d>", "eval")
+    return lambda x, y: eval(codigo, {"__builtins__": {}}, dict(_SAFE_NAMES, x=x, y=y))
+
+def medir(f, XX, YY, repeticiones=3):
+    """(mejor tiempo en ms, pico de memoria en MB sin contar la salida)"""
+    f(XX, YY)
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        f(XX, YY)
+        tiempos.append(time.perf_counter() - inicio)
+    tracemalloc.start()
+    f(XX, YY)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(tiempos) * 1000, (pico - XX.nbytes) / 2**20
+
+def main():
+    lado = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    cargar_numpy()
+    eje = np.linspace(-5, 5, lado)
+    XX, YY = np.meshgrid(eje, eje)
+    print(f"Malla {lado}x{lado} ({XX.nbytes / 2**20:.0f} MB por arreglo)\n")
+
+    print(f"{'Expresión':<52} {'eval':>20} {'por bloques':>20}")
+    for expr in EXPRESIONES:
+        antes = medir(con_eval(expr), XX, YY)
+        ahora = medir(compile_expr_2d(expr), XX, YY)
+        print(f"{expr:<52} " + " ".join(f"{t:>7.0f} ms {m:>6.1f} MB" for t, m in (antes, ahora)))
+
+    print(f"\nTamaño de bloque ({EXPRESIONES[-1]})")
+    for bloque in BLOQUES:
+        evaluator.BLOQUE = bloque
+        tiempo, memoria = medir(compile_expr_2d(EXPRESIONES[-1]), XX, YY)
+        print(f"{bloque:>8} {tiempo:>7.0f} ms {memoria:>6.2f} MB")
+
+if __name__ == "__main__":
+    main()
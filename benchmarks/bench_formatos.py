@@ -0,0 +1,61 @@
+"""
+Benchmark de formatos de imagen
+Compara bytes y tiempo de dibujo + codificación de cada formato
+(interpreter.FORMATOS_IMAGEN) para una curva 2D y un mapa de calor del
+renderizador rápido y una superficie de matplotlib, a varios anchos.
+
+Uso: python benchmarks/bench_formatos.py [repeticiones]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from interpreter import FORMATOS_IMAGEN, dibujar_imagen, elegir_formato, lut_viridis
+
+ANCHOS = (600, 800, 1400)
+
+def elementos():
+    """Elementos de escena como los arma el intérprete (ver crear_grafico_2d/3d)"""
+    x = np.linspace(-6.28, 6.28, 800)
+    XX, YY = np.meshgrid(np.linspace(-3, 3, 200), np.linspace(-3, 3, 200))
+    XS, YS = np.meshgrid(np.linspace(-2, 2, 60), np.linspace(-2, 2, 60))
+    return {
+        "curva 2D": {"tipo": "2d", "titulo": "Gráfico 2D: y = sin(x)", "etiqueta": "y = sin(x)",
+                     "x": x, "y": np.sin(x), "figsize": (8, 5)},
+        "mapa": {"tipo": "3d", "modo": "mapa", "titulo": "Gráfico 3D: z = sin(x*y)", "XX": XX, "YY": YY,
+                 "Z": np.sin(XX * YY), "xlim": (-3, 3), "ylim": (-3, 3), "figsize": (8, 6)},
+        "superficie": {"tipo": "3d", "modo": "superficie", "titulo": "Gráfico 3D: z = x^2 - y^2", "XX": XS,
+                       "YY": YS, "Z": XS ** 2 - YS ** 2, "xlim": (-2, 2), "ylim": (-2, 2), "figsize": (8, 6)},
+    }
+
+def medir(elemento, repeticiones):
+    dibujar_imagen(elemento)  # Calentar cachés de fuentes
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        datos = dibujar_imagen(elemento)
+        tiempos.append(time.perf_counter() - inicio)
+    return len(datos), min(tiempos)
+
+def main():
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    os.environ.setdefault("MATHVIEW_RENDERIZADORES", "0")
+    lut_viridis()
+
+    formatos = [f for f in FORMATOS_IMAGEN if elegir_formato([f]) == f]
+    print(f"{'Gráfico':<12} {'Ancho':>6} " + " ".join(f"{f:>18}" for f in formatos))
+    for nombre, elemento in elementos().items():
+        for ancho in ANCHOS:
+            celdas = []
+            for formato in formatos:
+                elemento.update(dpi=ancho / elemento["figsize"][0], formato=formato)
+                tamano, tiempo = medir(elemento, repeticiones)
+                celdas.append(f"{tamano / 1024:7.1f} KB {tiempo * 1000:5.0f} ms")
+            print(f"{nombre:<12} {ancho:>6} " + " ".join(celdas))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Benchmark del arranque en frío
+Mide, en procesos nuevos, cuánto tarda importar la aplicación y ejecutar la
+primera petición: un programa sin gráficos (solo pri) y uno con draw2d.
+La fila "precargado" importa todo el stack de gráficos al arrancar, como
+hacía la aplicación antes de la carga diferida (y como hace --preload).
+
+Uso: python benchmarks/bench_import.py [repeticiones]
+"""
+
+import os
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROGRAMAS = {
+    "texto": "pri(\"Hola\"); n = 5; pri(fact(n) + 1);",
+    "draw2d": "draw2d(sin(x), -6.28, 6.28);",
+}
+
+# Se ejecuta en un proceso nuevo; imprime los tiempos en ms
+MEDICION = """
+import sys, time
+inicio = time.perf_counter()
+import app
+if sys.argv[1] == "precargado":
+    from interpreter import precargar_graficos
+    precargar_graficos()
+importado = time.perf_counter()
+from interpreter import Interpreter
+Interpreter(sys.argv[2]).ejecutar()
+fin = time.perf_counter()
+print((importado - inicio) * 1000, (fin - importado) * 1000)
+"""
+
+def medir(modo, codigo, repeticiones):
+    """Mínimo de (importación, primera ejecución) en ms sobre procesos nuevos"""
+    entorno = dict(os.environ, MATHVIEW_RENDERIZADORES="0")
+    tiempos = []
+    for _ in range(repeticiones):
+        salida = subprocess.run(
+            [sys.executable, "-c", MEDICION, modo, codigo],
+            cwd=RAIZ, env=entorno, capture_output=True, text=True, check=True
+        ).stdout
+        tiempos.append(tuple(float(t) for t in salida.split()))
+    return min(t[0] for t in tiempos), min(t[1] for t in tiempos)
+
+def main():
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    print(f"{'Modo':<12} {'Programa':<10} {'Importación':>12} {'1.ª ejecución':>14} {'Total':>10}")
+    for modo in ("diferido", "precargado"):
+        for nombre, codigo in PROGRAMAS.items():
+            importacion, ejecucion = medir(modo, codigo, repeticiones)
+            print(f"{modo:<12} {nombre:<10} {importacion:>9.0f} ms {ejecucion:>11.0f} ms "
+                  f"{importacion + ejecucion:>7.0f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark del analizador léxico
+Mide el rendimiento de Lexer.tokenizar sobre un programa de 10.000 líneas.
+
+Uso: python benchmarks/bench_lexer.py [lineas] [repeticiones]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lexer import Lexer
+
+# Fragmento representativo: declaraciones, bucles, condicionales,
+# gráficas, cadenas, expresiones //...// y comentarios
+FRAGMENTO = """int n = 10;
+dec total = 0.5;
+ecu f = //x^2 + 2*x + 1//;
+// comentario de línea
+pri("Calculando suma de 1 a 10:");
+while(i <= n) {
+    total = total + i * 2.5;
+    i++;
+}
+/* comentario
+   de bloque */
+if(total >= 50) {
+    draw2d(sin(x) + x^2, -6.28, 6.28);
+} elif(total != 3) {
+    pri(total);
+} else {
+    pri('fin');
+}
+"""
+
+def generar_programa(lineas):
+    por_fragmento = FRAGMENTO.count("\n")
+    return FRAGMENTO * max(1, lineas // por_fragmento)
+
+def main():
+    lineas = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    repeticiones = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    codigo = generar_programa(lineas)
+    total_lineas = codigo.count("\n")
+    lexer = Lexer()
+
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = lexer.tokenizar(codigo)
+        tiempos.append(time.perf_counter() - inicio)
+
+    mejor = min(tiempos)
+    total_tokens = len(resultado["tokens"])
+    print(f"Líneas:   {total_lineas}")
+    print(f"Tokens:   {total_tokens}")
+    print(f"Mejor:    {mejor * 1000:.1f} ms (de {repeticiones})")
+    print(f"Líneas/s: {total_lineas / mejor:,.0f}")
+    print(f"Tokens/s: {total_tokens / mejor:,.0f}")
+
+if __name__ == "__main__":
+    main()
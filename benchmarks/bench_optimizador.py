@@ -0,0 +1,68 @@
+"""
+Benchmark de la optimización de expresiones
+Para expresiones típicas de clase compara eval sobre el AST tal como se
+escribió, eval sobre el AST optimizado (constantes plegadas, potencias como
+productos) y el evaluador por bloques, que además calcula una sola vez las
+subexpresiones repetidas. Muestra también cuántas operaciones sobre
+arreglos quedan.
+
+Uso: python benchmarks/bench_optimizador.py [puntos]
+"""
+
+import ast
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from evaluator import optimizar, traducir
+from interpreter import _SAFE_NAMES, cargar_numpy
+
+EXPRESIONES = (
+    "2*pi/3*sin(x) + sin(x)^2",
+    "x^3 - 3*x^2 + 2*x - 1",
+    "sin(x)^2 + cos(x)^2",
+    "exp(-x^2/2) / sqrt(2*pi)",
+    "(x^2 + 1) / (x^2 - 4)",
+    "sqrt(x^2 + y^2) * sin(sqrt(x^2 + y^2))",
+    "x*y*exp(-(x^2 + y^2)) + 0.5*exp(-(x^2 + y^2))",
+)
+
+def operaciones(arbol):
+    """Operaciones que eval hace sobre arreglos (cota: las de constantes no cuentan)"""
+    return sum(isinstance(n, (ast.BinOp, ast.UnaryOp, ast.Call)) for n in ast.walk(arbol))
+
+def mejor(f, repeticiones=20):
+    f()
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        f()
+        tiempos.append(time.perf_counter() - inicio)
+    return min(tiempos) * 1000
+
+def main():
+    puntos = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    cargar_numpy()
+    x = np.linspace(-3, 3, puntos)
+    y = np.linspace(3, -3, puntos)
+    entorno = dict(_SAFE_NAMES, x=x, y=y)
+    print(f"{puntos} puntos\n")
+
+    print(f"{'Expresión':<48} {'eval':>14} {'optimizado':>14} {'por bloques':>14}")
+    for expr in EXPRESIONES:
+        original = ast.parse(expr.replace('^', '**'), mode='eval')
+        optimizado = optimizar(original, ('x', 'y'), _SAFE_NAMES)
+        programa = traducir(optimizado, ('x', 'y'), _SAFE_NAMES)
+        codigos = [compile(a, "<expr>", "eval") for a in (original, optimizado)]
+        celdas = [
+            (mejor(lambda c=c: eval(c, {"__builtins__": {}}, entorno)), operaciones(a))
+            for c, a in zip(codigos, (original, optimizado))
+        ]
+        celdas.append((mejor(lambda: programa.evaluar({'x': x, 'y': y})), len(programa.instrucciones)))
+        print(f"{expr:<48} " + " ".join(f"{t:>6.1f} ms ({n:>2})" for t, n in celdas))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Benchmark del renderizador 2D
+Compara la latencia de raster.dibujar_2d con la ruta de matplotlib
+(plt.subplots + png_from_figure) para las mismas curvas de draw2d.
+
+Uso: python benchmarks/bench_raster.py [repeticiones]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from interpreter import pyplot, png_from_figure, compile_expr_1d, MUESTRAS_2D
+from raster import dibujar_2d
+
+CURVAS = [
+    ("sin(x)", -6.28, 6.28),
+    ("x^2", -5, 5),
+    ("tan(x)", -6.28, 6.28),
+    ("exp(-x^2) * cos(4*x)", -3, 3),
+]
+
+def con_matplotlib(x, y, expr):
+    fig, ax = pyplot().subplots(figsize=(8, 5))
+    ax.plot(x, y, color='deepskyblue', linewidth=2, label=f'y = {expr}')
+    ax.set_title(f'Gráfico 2D: y = {expr}', fontsize=14, fontweight='bold')
+    ax.set_xlabel('x', fontsize=12)
+    ax.set_ylabel('y', fontsize=12)
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+    return png_from_figure(fig)
+
+def con_raster(x, y, expr):
+    return dibujar_2d(x, y, f'Gráfico 2D: y = {expr}', f'y = {expr}')
+
+def medir(funcion, repeticiones, *args):
+    funcion(*args)  # Calentar cachés de fuentes
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion(*args)
+        tiempos.append(time.perf_counter() - inicio)
+    return min(tiempos)
+
+def main():
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+
+    print(f"{'Expresión':<24} {'matplotlib':>12} {'raster':>10} {'Aceleración':>12}")
+    for expr, xmin, xmax in CURVAS:
+        x = np.linspace(xmin, xmax, MUESTRAS_2D)
+        with np.errstate(all='ignore'):
+            y = compile_expr_1d(expr.replace('^', '**'))(x)
+        t_mpl = medir(con_matplotlib, repeticiones, x, y, expr)
+        t_raster = medir(con_raster, repeticiones, x, y, expr)
+        print(f"{expr:<24} {t_mpl * 1000:>9.1f} ms {t_raster * 1000:>7.1f} ms {t_mpl / t_raster:>11.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Caché de respuestas de MathView
+Guarda el JSON final de /compilar indexado por un hash de contenido
+(código, inputs y versión del intérprete). Acotada en bytes con desalojo LRU.
+
+AlmacenDisco guarda lo que el navegador pide después por su hash (imágenes,
+animaciones) en archivos: lo ven todos los workers de gunicorn, no solo el
+que atendió /compilar.
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+
+# Directorio de los almacenes en disco, común a todos los workers del host
+DIRECTORIO_ALMACEN = os.environ.get("MATHVIEW_ALMACEN", os.path.join(tempfile.gettempdir(), "mathview"))
+
+def clave_contenido(*partes):
+    """Hash SHA-256 de las partes serializadas de forma canónica"""
+    datos = json.dumps(partes, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(datos.encode("utf-8")).hexdigest()
+
+def clave_bytes(datos):
+    """Hash SHA-256 de unos bytes: dirección de contenido de una imagen"""
+    return hashlib.sha256(datos).hexdigest()
+
+class ResponseCache:
+    """Caché LRU en memoria acotada por el tamaño total de los valores (bytes)"""
+
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entradas = OrderedDict()  # clave -> bytes
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+
+    def obtener(self, clave):
+        """Retorna los bytes guardados (None si no están) y cuenta el acierto/fallo"""
+        with self._lock:
+            valor = self._entradas.get(clave)
+            if valor is None:
+                self.fallos += 1
+                return None
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return valor
+
+    def guardar(self, clave, valor):
+        """Guarda los bytes; no guarda valores más grandes que la caché completa"""
+        if len(valor) > self.max_bytes:
+            return
+        with self._lock:
+            anterior = self._entradas.pop(clave, None)
+            if anterior is not None:
+                self._bytes -= len(anterior)
+            self._entradas[clave] = valor
+            self._bytes += len(valor)
+            # Desalojar las entradas usadas hace más tiempo
+            while self._bytes > self.max_bytes:
+                _, desalojado = self._entradas.popitem(last=False)
+                self._bytes -= len(desalojado)
+                self.desalojos += 1
+
+    def __contains__(self, clave):
+        """True si la clave está guardada (no cuenta como acierto ni la renueva)"""
+        with self._lock:
+            return clave in self._entradas
+
+    def estadisticas(self):
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                "entradas": len(self._entradas),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "desalojos": self.desalojos,
+                "tasa_aciertos": self.aciertos / consultas if consultas else 0.0
+            }
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entradas)
+
+# Las claves son hashes SHA-256: nombres de archivo seguros
+_CLAVE_HASH = re.compile(r"[0-9a-f]{64}")
+
+class AlmacenDisco:
+    """Bytes por hash en archivos de un directorio, compartidos entre procesos.
+
+    Acotado por el tamaño total de los archivos: al pasarse se borran los
+    leídos hace más tiempo (la lectura renueva la fecha de modificación).
+    Misma interfaz que ResponseCache; los contadores son del proceso.
+    """
+
+    def __init__(self, nombre, max_bytes=64 * 1024 * 1024, directorio=None):
+        self.directorio = os.path.join(directorio or DIRECTORIO_ALMACEN, nombre)
+        os.makedirs(self.directorio, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._bytes = sum(tamano for _, tamano, _ in self._archivos())
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+
+    def _ruta(self, clave):
+        """Archivo de una clave; None si la clave no es un hash (viene de la URL)"""
+        if not isinstance(clave, str) or not _CLAVE_HASH.fullmatch(clave):
+            return None
+        return os.path.join(self.directorio, clave)
+
+    def _archivos(self):
+        """(fecha, tamaño, ruta) de cada entrada guardada"""
+        archivos = []
+        for entrada in os.scandir(self.directorio):
+            if _CLAVE_HASH.fullmatch(entrada.name):
+                try:
+                    info = entrada.stat()
+                except OSError:
+                    continue  # Otro proceso lo acaba de desalojar
+                archivos.append((info.st_mtime, info.st_size, entrada.path))
+        return archivos
+
+    def obtener(self, clave):
+        """Retorna los bytes guardados (None si no están) y cuenta el acierto/fallo"""
+        ruta = self._ruta(clave)
+        try:
+            if ruta is None:
+                raise FileNotFoundError(clave)
+            with open(ruta, "rb") as archivo:
+                valor = archivo.read()
+            os.utime(ruta)
+        except OSError:
+            self.fallos += 1
+            return None
+        self.aciertos += 1
+        return valor
+
+    def guardar(self, clave, valor):
+        """Guarda los bytes; no guarda valores más grandes que el almacén completo"""
+        ruta = self._ruta(clave)
+        if ruta is None or len(valor) > self.max_bytes:
+            return
+        try:
+            # Mismo hash, mismo contenido: basta con renovarlo
+            os.utime(ruta)
+            return
+        except OSError:
+            pass
+        # Se escribe aparte y se renombra: nadie lee un archivo a medias
+        temporal = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporal, "wb") as archivo:
+            archivo.write(valor)
+        os.replace(temporal, ruta)
+        with self._lock:
+            self._bytes += len(valor)
+            if self._bytes > self.max_bytes:
+                self._desalojar()
+
+    def _desalojar(self):
+        """Borra los archivos usados hace más tiempo hasta quedar bajo el tope"""
+        archivos = sorted(self._archivos())
+        total = sum(tamano for _, tamano, _ in archivos)
+        for _, tamano, ruta in archivos:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(ruta)
+                self.desalojos += 1
+            except OSError:
+                pass
+            total -= tamano
+        self._bytes = total
+
+    def __contains__(self, clave):
+        """True si la clave está guardada (no cuenta como acierto ni la renueva)"""
+        ruta = self._ruta(clave)
+        return ruta is not None and os.path.exists(ruta)
+
+    def estadisticas(self):
+        archivos = self._archivos()
+        consultas = self.aciertos + self.fallos
+        return {
+            "entradas": len(archivos),
+            "bytes": sum(tamano for _, tamano, _ in archivos),
+            "max_bytes": self.max_bytes,
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "desalojos": self.desalojos,
+            "tasa_aciertos": self.aciertos / consultas if consultas else 0.0
+        }
+
+    def __len__(self):
+        return len(self._archivos())
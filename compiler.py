@@ -0,0 +1,269 @@
+"""
+Compilador de MathView
+Traduce el AST a una lista plana de instrucciones. Cada instrucción es una
+closure f(interp) -> siguiente_pc construida una sola vez, así los bucles
+ejecutan código ya preparado en lugar de volver a despachar texto.
+"""
+
+from ast_nodes import (
+    Declaracion, Asignacion, Incremento, Imprimir, Entrada,
+    Condicional, Mientras, LlamadaGrafica, Ventana, Evaluacion
+)
+from safe_eval import LimiteExcedido
+
+MAX_ITERACIONES = 1000
+
+def compilar_evaluador(expresion):
+    """Crea la función interp -> valor de una expresión"""
+    texto = expresion.texto
+    def evaluar(interp):
+        return interp.evaluar_expresion(texto)
+    return evaluar
+
+class Compiler:
+    def __init__(self):
+        self.codigo = []
+        self._compiladores = {
+            Declaracion: self.compilar_declaracion,
+            Asignacion: self.compilar_asignacion,
+            Incremento: self.compilar_incremento,
+            Imprimir: self.compilar_pri,
+            Entrada: self.compilar_put,
+            Condicional: self.compilar_if,
+            Mientras: self.compilar_while,
+            LlamadaGrafica: self.compilar_grafica,
+            Ventana: self.compilar_ventana,
+            Evaluacion: self.compilar_evaluacion,
+        }
+
+    def compilar(self, programa):
+        """Compila el programa completo y retorna la lista de instrucciones"""
+        self.compilar_bloque(programa.cuerpo)
+        return self.codigo
+
+    def compilar_bloque(self, instrucciones):
+        for nodo in instrucciones:
+            self._compiladores[type(nodo)](nodo)
+
+    # ===== EMISIÓN =====
+
+    def emitir(self, accion):
+        """Emite una instrucción secuencial: ejecuta accion(interp) y continúa"""
+        siguiente = len(self.codigo) + 1
+        def instruccion(interp):
+            accion(interp)
+            return siguiente
+        self.codigo.append(instruccion)
+
+    def emitir_salto(self):
+        """Emite un salto incondicional; retorna la celda con su destino"""
+        destino = [None]
+        def salto(interp):
+            return destino[0]
+        self.codigo.append(salto)
+        return destino
+
+    def emitir_error(self, mensaje):
+        self.emitir(lambda interp: interp.errores.append(mensaje))
+
+    # ===== INSTRUCCIONES =====
+
+    def compilar_declaracion(self, nodo):
+        """int n = 10; o int n;"""
+        nombre = nodo.nombre
+        if nombre is None:
+            self.emitir_error(f"❌ Declaración mal formada: {nodo.tipo}")
+            return
+
+        valor = nodo.valor
+        if valor is None:
+            valor_default = 0 if nodo.tipo in ['int', 'dec', 'pos', 'bin'] else ""
+            self.emitir(lambda interp: interp.variables.__setitem__(nombre, valor_default))
+        elif valor.es_simple("EXPRESION_MATH"):
+            literal = valor.texto[2:-2].strip()
+            self.emitir(lambda interp: interp.variables.__setitem__(nombre, literal))
+        else:
+            evaluar = compilar_evaluador(valor)
+            texto = valor.texto
+            def declarar(interp):
+                try:
+                    interp.variables[nombre] = evaluar(interp)
+                except LimiteExcedido:
+                    raise
+                except Exception as e:
+                    interp.errores.append(f"❌ Error al evaluar '{texto}': {str(e)}")
+                    interp.variables[nombre] = 0
+            self.emitir(declarar)
+
+    def compilar_asignacion(self, nodo):
+        """n = 10; n = n + 1; n += 2; n -= 2;"""
+        nombre = nodo.nombre
+        if nodo.valor is None:
+            self.emitir_error(f"❌ Asignación mal formada: {nombre} {nodo.operador}")
+            return
+
+        evaluar = compilar_evaluador(nodo.valor)
+        operador = nodo.operador
+        def asignar(interp):
+            variables = interp.variables
+            try:
+                valor = evaluar(interp)
+                if operador == '+=':
+                    valor = variables[nombre] + valor
+                elif operador == '-=':
+                    valor = variables[nombre] - valor
+                variables[nombre] = valor
+            except LimiteExcedido:
+                raise
+            except Exception as e:
+                interp.errores.append(f"❌ Error en asignación: {str(e)}")
+                variables[nombre] = 0
+        self.emitir(asignar)
+
+    def compilar_incremento(self, nodo):
+        """n++; o n--;"""
+        nombre = nodo.nombre
+        delta = 1 if nodo.operador == '++' else -1
+        def incrementar(interp):
+            variables = interp.variables
+            if nombre in variables:
+                variables[nombre] += delta
+        self.emitir(incrementar)
+
+    def compilar_pri(self, nodo):
+        """pri(n); o pri("texto");"""
+        contenido = nodo.argumento
+        if contenido is None:
+            return
+
+        # Cadena o expresión //...//: el texto se conoce en compilación
+        if contenido.es_simple("CADENA"):
+            texto = contenido.texto[1:-1]
+            self.emitir(lambda interp: interp.salida_consola.append(texto))
+            return
+        if contenido.es_simple("EXPRESION_MATH"):
+            texto = contenido.texto[2:-2]
+            self.emitir(lambda interp: interp.salida_consola.append(texto))
+            return
+
+        evaluar = compilar_evaluador(contenido)
+        variable = contenido.texto if contenido.es_simple("IDENTIFICADOR") else None
+        def imprimir(interp):
+            # Variable
+            if variable is not None and variable in interp.variables:
+                valor = interp.variables[variable]
+            # Expresión
+            else:
+                valor = evaluar(interp)
+            interp.salida_consola.append(str(valor))
+        self.emitir(imprimir)
+
+    def compilar_put(self, nodo):
+        """put(n); - solicita entrada del usuario"""
+        nombre = nodo.nombre
+        if nombre is None:
+            return
+        self.emitir(lambda interp: interp.ejecutar_put(nombre))
+
+    def compilar_if(self, nodo):
+        """if/elif/else: cada condición salta a la siguiente rama si no se cumple"""
+        saltos_fin = []
+        for indice, (condicion, cuerpo) in enumerate(nodo.ramas):
+            siguiente_rama = [None]
+            if condicion is None:
+                if indice == 0:
+                    self.emitir_error("Error: sintaxis de if incorrecta")
+                    saltos_fin.append(self.emitir_salto())
+                    break
+                continue
+
+            self.codigo.append(self._condicion_if(condicion, indice == 0, siguiente_rama, saltos_fin))
+            self.compilar_bloque(cuerpo)
+            saltos_fin.append(self.emitir_salto())
+            siguiente_rama[0] = len(self.codigo)
+        else:
+            if nodo.sino is not None:
+                self.compilar_bloque(nodo.sino)
+
+        fin = len(self.codigo)
+        for destino in saltos_fin:
+            destino[0] = fin
+
+    def _condicion_if(self, condicion, es_principal, siguiente_rama, saltos_fin):
+        evaluar = compilar_evaluador(condicion)
+        entrar = len(self.codigo) + 1
+        # Si la condición del if principal falla se abandona toda la estructura
+        fin = [None]
+        saltos_fin.append(fin)
+        def condicion_if(interp):
+            try:
+                cumple = evaluar(interp)
+            except LimiteExcedido:
+                raise
+            except Exception as e:
+                if es_principal:
+                    interp.errores.append(f"Error en if: {e}")
+                    return fin[0]
+                return siguiente_rama[0]
+            return entrar if cumple else siguiente_rama[0]
+        return condicion_if
+
+    def compilar_while(self, nodo):
+        """while: inicializa el contador, evalúa la condición, cuerpo y salto atrás"""
+        if nodo.condicion is None:
+            self.emitir_error("Error: sintaxis de while incorrecta")
+            return
+
+        inicio = len(self.codigo) + 1
+        self.emitir(lambda interp: interp.iteraciones.__setitem__(inicio, 0))
+
+        evaluar = compilar_evaluador(nodo.condicion)
+        entrar = inicio + 1
+        fin = [None]
+        def condicion_while(interp):
+            iteraciones = interp.iteraciones
+            if iteraciones[inicio] >= MAX_ITERACIONES:
+                return fin[0]
+            try:
+                if not evaluar(interp):
+                    return fin[0]
+            except LimiteExcedido:
+                raise
+            except Exception:
+                return fin[0]
+            iteraciones[inicio] += 1
+            return entrar
+        self.codigo.append(condicion_while)
+
+        self.compilar_bloque(nodo.cuerpo)
+        self.emitir_salto()[0] = inicio
+        fin[0] = len(self.codigo)
+
+    def compilar_grafica(self, nodo):
+        """draw2d(expr, xmin, xmax); draw3d(expr, xmin, xmax, ymin, ymax);"""
+        argumentos = nodo.argumentos
+        if nodo.nombre == 'draw2d':
+            self.emitir(lambda interp: interp.ejecutar_draw2d(argumentos))
+        elif nodo.nombre == 'draw3d':
+            self.emitir(lambda interp: interp.ejecutar_draw3d(argumentos))
+        elif nodo.nombre == 'move':
+            self.emitir(lambda interp: interp.ejecutar_move(argumentos))
+        elif nodo.nombre == 'now':
+            self.emitir(lambda interp: interp.ejecutar_now(argumentos))
+        elif nodo.nombre == 'lost':
+            self.emitir(lambda interp: interp.ejecutar_lost(argumentos))
+
+    def compilar_ventana(self, nodo):
+        """win2d nombre(...) { ... } - el cuerpo se ejecuta en línea; en win2d
+        puede armar una animación con move/now/lost (ver animation.py)"""
+        if nodo.tipo != 'win2d':
+            self.compilar_bloque(nodo.cuerpo)
+            return
+        nombre, argumentos = nodo.nombre, nodo.argumentos
+        self.emitir(lambda interp: interp.abrir_ventana(nombre, argumentos))
+        self.compilar_bloque(nodo.cuerpo)
+        self.emitir(lambda interp: interp.cerrar_ventana())
+
+    def compilar_evaluacion(self, nodo):
+        """fact(5); - evalúa la expresión y descarta el resultado"""
+        self.emitir(compilar_evaluador(nodo.expresion))
@@ -0,0 +1,209 @@
+"""
+Documentos para análisis incremental
+Mantiene un programa dividido en segmentos (instrucciones de nivel superior)
+con su análisis léxico, sintáctico y semántico. Al aplicar una edición solo
+se vuelven a analizar los segmentos afectados; el resto se reutiliza.
+"""
+
+import threading
+from bisect import bisect_right
+from itertools import accumulate
+
+from lexer import Lexer
+from parser import Parser
+from semantic_analyzer import SemanticAnalyzer
+
+# Caracteres cuyo efecto en el escaneo no es local a la instrucción editada
+_DELIMITADORES = frozenset('"\'/*')
+
+class Segmento:
+    """Una instrucción de nivel superior y su análisis (posiciones relativas)"""
+
+    def __init__(self, texto, lexer):
+        self.texto = texto
+        self.saltos = texto.count("\n")
+        # Columna (0-based) donde termina el texto, si no tiene saltos es su largo
+        self.cola = len(texto) - texto.rfind("\n") - 1
+
+        tokens = lexer.tokenizar(texto)["tokens"]
+        parser = Parser(tokens, programa_completo=False)
+        resultado = parser.analizar()
+        self.programa = resultado["ast"]
+        self.punto_coma = sum(1 for t in tokens if t[1] == "PUNTO_COMA")
+        self.tiene_codigo = any(t[1] in ["IDENTIFICADOR", "NUMERO"] for t in tokens)
+        self.menciona_draw = any('draw' in t[0] for t in tokens)
+        self.num_tokens = len(tokens)
+        self.posicion = (tokens[0][2], tokens[0][3]) if tokens else (1, 1)
+
+        self.diagnosticos = [
+            ("lexico", f"Token desconocido: '{t[0]}'", t[2], t[3])
+            for t in tokens if t[1] == "DESCONOCIDO"
+        ]
+        self.diagnosticos.extend(
+            ("sintactico", d["mensaje"], d["linea"], d["columna"])
+            for d in resultado["diagnosticos"]
+        )
+
+        # Resultado semántico, válido mientras no cambie el estado de entrada
+        self.huella_entrada = None
+        self.semantico = None
+        self.estado_salida = ()
+        self.huella_salida = hash(())
+
+    def analizar_semantica(self, estado_entrada, huella_entrada):
+        """Analiza el segmento partiendo de los símbolos globales declarados antes"""
+        if self.huella_entrada == huella_entrada and self.semantico is not None:
+            return
+
+        analizador = SemanticAnalyzer(self.programa)
+        for nombre, tipo, inicializada in estado_entrada:
+            analizador.declarar_simbolo(nombre, {'tipo': tipo, 'inicializada': inicializada, 'ambito': 0})
+        resultado = analizador.analizar()
+
+        self.semantico = (resultado["errores"], resultado["advertencias"])
+        self.estado_salida = tuple(
+            (nombre, info['tipo'], info['inicializada'])
+            for nombre, info in analizador.pila_ambitos[0].items()
+        )
+        self.huella_salida = hash(self.estado_salida)
+        self.huella_entrada = huella_entrada
+
+class Documento:
+    """Programa editable cuyo análisis se actualiza de forma incremental"""
+
+    def __init__(self, codigo):
+        self.lock = threading.Lock()
+        self.lexer = Lexer()
+        self.texto = ""
+        self.segmentos = []
+        self.inicios = []
+        self.version = 0
+        self.reanalizados = 0
+        self.reemplazar(0, 0, codigo)
+        self.version = 0
+
+    def reemplazar(self, inicio, fin, nuevo):
+        """Sustituye texto[inicio:fin] por `nuevo` y re-segmenta solo la zona afectada"""
+        if not (0 <= inicio <= fin <= len(self.texto)):
+            raise ValueError(f"Rango de edición inválido: [{inicio}, {fin})")
+
+        texto = self.texto[:inicio] + nuevo + self.texto[fin:]
+        delta = len(nuevo) - (fin - inicio)
+        fin_nuevo = inicio + len(nuevo)
+
+        # Empezar un segmento antes del editado: la edición puede unirlo
+        # con el anterior (p. ej. al borrar un ';' o escribir un else).
+        # Comillas y delimitadores de comentario pueden cambiar cómo se
+        # escanea texto anterior (una cadena abierta que ahora se cierra):
+        # en ese caso se re-segmenta desde el principio, reutilizando el
+        # análisis de los segmentos cuyo texto no cambió
+        if _DELIMITADORES.intersection(nuevo) or _DELIMITADORES.intersection(self.texto[inicio:fin]):
+            i = 0
+        else:
+            i = max(bisect_right(self.inicios, inicio) - 2, 0)
+        pos = self.inicios[i] if self.segmentos else 0
+
+        reutilizables = {}
+        nuevos = []
+        resto = []
+        while pos < len(texto):
+            # Resincronizar: un límite viejo tras la edición vuelve a ser límite
+            if pos >= fin_nuevo and pos > 0:
+                k = bisect_right(self.inicios, pos - delta) - 1
+                if k > i and self.inicios[k] == pos - delta:
+                    resto = self.segmentos[k:]
+                    break
+            limite = self.lexer.limite_instruccion(texto, pos)
+            nuevos.append(texto[pos:limite])
+            pos = limite
+
+        eliminados = self.segmentos[i:len(self.segmentos) - len(resto)]
+        for segmento in eliminados:
+            reutilizables[segmento.texto] = segmento
+
+        segmentos_nuevos = []
+        for fragmento in nuevos:
+            segmento = reutilizables.pop(fragmento, None)
+            if segmento is None:
+                segmento = Segmento(fragmento, self.lexer)
+                self.reanalizados += 1
+            segmentos_nuevos.append(segmento)
+
+        self.texto = texto
+        self.segmentos = self.segmentos[:i] + segmentos_nuevos + resto
+        self.inicios = [0] + list(accumulate(len(s.texto) for s in self.segmentos))[:-1]
+        self.version += 1
+
+    def aplicar_cambios(self, cambios):
+        """Aplica una lista de ediciones {'inicio', 'fin', 'texto'} en orden"""
+        self.reanalizados = 0
+        for cambio in cambios:
+            self.reemplazar(int(cambio["inicio"]), int(cambio["fin"]), str(cambio.get("texto", "")))
+
+    def diagnosticos(self):
+        """Recorre los segmentos (reutilizando su análisis) y arma los diagnósticos"""
+        diagnosticos = []
+        estado = ()
+        huella = hash(estado)
+        punto_coma = 0
+        tiene_codigo = False
+        menciona_draw = False
+        num_tokens = 0
+
+        linea, columna = 1, 1
+        for segmento in self.segmentos:
+            segmento.analizar_semantica(estado, huella)
+            estado, huella = segmento.estado_salida, segmento.huella_salida
+
+            for fase, mensaje, linea_rel, columna_rel in segmento.diagnosticos:
+                if linea_rel is None:
+                    linea_rel, columna_rel = segmento.posicion
+                diagnosticos.append(self._diagnostico(fase, mensaje, linea, columna, linea_rel, columna_rel))
+
+            errores, advertencias = segmento.semantico
+            linea_rel, columna_rel = segmento.posicion
+            for mensaje in errores:
+                diagnosticos.append(self._diagnostico("semantico", mensaje, linea, columna, linea_rel, columna_rel))
+            for mensaje in advertencias:
+                diagnosticos.append(self._diagnostico("advertencia", mensaje, linea, columna, linea_rel, columna_rel))
+
+            punto_coma += segmento.punto_coma
+            tiene_codigo = tiene_codigo or segmento.tiene_codigo
+            menciona_draw = menciona_draw or segmento.menciona_draw
+            num_tokens += segmento.num_tokens
+
+            # Posición donde empieza el siguiente segmento
+            if segmento.saltos:
+                linea += segmento.saltos
+                columna = segmento.cola + 1
+            else:
+                columna += segmento.cola
+
+        # Verificación de punto y coma sobre todo el programa (ver Parser)
+        if punto_coma == 0 and num_tokens > 3 and tiene_codigo and not menciona_draw:
+            diagnosticos.append({
+                "fase": "sintactico",
+                "mensaje": "⚠️ Advertencia: No se encontraron punto y coma ';' - Las instrucciones deben terminar con ';'",
+                "linea": None,
+                "columna": None
+            })
+
+        return diagnosticos
+
+    def _diagnostico(self, fase, mensaje, linea_segmento, columna_segmento, linea_rel, columna_rel):
+        """Convierte una posición relativa al segmento en absoluta"""
+        linea = linea_segmento + linea_rel - 1
+        columna = columna_rel + columna_segmento - 1 if linea_rel == 1 else columna_rel
+        return {"fase": fase, "mensaje": mensaje, "linea": linea, "columna": columna}
+
+    def resultado(self, token):
+        diagnosticos = self.diagnosticos()
+        errores = [d for d in diagnosticos if d["fase"] != "advertencia"]
+        return {
+            "documento": token,
+            "version": self.version,
+            "estado": "correcto" if not errores else "con_errores",
+            "diagnosticos": diagnosticos,
+            "segmentos": len(self.segmentos),
+            "reanalizados": self.reanalizados
+        }
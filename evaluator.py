@@ -0,0 +1,320 @@
+"""
+Evaluador por bloques de expresiones de draw2d/draw3d
+Traduce el AST ya validado de una expresión a una secuencia de ufuncs de
+numpy que escriben en búferes reutilizables (out=), y la recorre por
+bloques del tamaño de la caché del procesador. Con eval cada operación
+intermedia crea un arreglo del tamaño de toda la malla; aquí la memoria
+extra es de unos pocos bloques, sin importar la profundidad de la expresión.
+
+Antes de traducir, optimizar() simplifica el AST (también el que evalúa
+safe_eval): calcula las subexpresiones constantes y cambia x**2, x**3,
+x**4 por productos. Al traducir, una subexpresión repetida (sin(x) en
+sin(x)^2 + 2*sin(x)) se calcula una sola vez.
+
+Solo se traducen operaciones aritméticas, las funciones de numpy del
+entorno seguro y constantes; lo demás (comparaciones, fact, funciones de
+math...) sigue evaluándose con safe_eval.
+"""
+
+import ast
+import operator
+
+import numpy as np
+
+# Elementos por bloque: búferes de 128 KB, varios caben en la caché L2
+# (ver benchmarks/bench_evaluador.py)
+BLOQUE = 16384
+
+_BINARIOS = {
+    ast.Add: (np.add, operator.add),
+    ast.Sub: (np.subtract, operator.sub),
+    ast.Mult: (np.multiply, operator.mul),
+    ast.Div: (np.true_divide, operator.truediv),
+    ast.Mod: (np.remainder, operator.mod),
+    ast.FloorDiv: (np.floor_divide, operator.floordiv),
+    ast.Pow: (np.power, operator.pow),
+}
+_UNARIOS = {
+    ast.USub: (np.negative, operator.neg),
+    ast.UAdd: (np.positive, operator.pos),
+}
+
+# Exponentes enteros que se calculan con productos en vez de pow
+_PRODUCTOS = (2, 3, 4)
+# arreglo ** escalar: numpy usa estas ufuncs para estos exponentes; se
+# replica para dar exactamente los mismos valores que eval
+_POTENCIAS = {0.5: np.sqrt, -1: np.reciprocal, 1: np.positive}
+
+# Exponente máximo al calcular potencias de enteros de antemano (9**9**9
+# no debe colgar la compilación)
+_EXPONENTE_MAX = 100
+
+def _es_numero(valor):
+    """True para constantes reales que numpy opera como float64"""
+    if isinstance(valor, bool) or not isinstance(valor, (int, float, np.floating)):
+        return False
+    return not isinstance(valor, int) or abs(valor) < 2 ** 63
+
+def _plegar(operacion, *valores):
+    """Resultado de operar constantes ya, o None si falla o no conviene"""
+    if (operacion is operator.pow and all(isinstance(v, int) for v in valores)
+            and abs(valores[1]) > _EXPONENTE_MAX):
+        return None
+    try:
+        resultado = operacion(*valores)
+    except (ArithmeticError, ValueError, TypeError):
+        return None
+    return resultado if _es_numero(resultado) else None
+
+class NoVectorizable(Exception):
+    """La expresión usa algo que el evaluador por bloques no traduce"""
+
+class _Optimizador(ast.NodeTransformer):
+    """Pliega constantes y cambia potencias enteras pequeñas de variables por productos.
+
+    Solo se reescribe lo que da el mismo resultado que eval: una operación
+    entre constantes que falla (1/0) se deja para que falle al evaluar.
+    """
+
+    def __init__(self, variables, nombres):
+        self.variables = variables
+        self.constantes = {k: v for k, v in nombres.items() if isinstance(v, float)}
+
+    @staticmethod
+    def constante(nodo):
+        return isinstance(nodo, ast.Constant) and _es_numero(nodo.value)
+
+    def visit_Name(self, nodo):
+        if nodo.id not in self.variables and nodo.id in self.constantes:
+            return ast.copy_location(ast.Constant(self.constantes[nodo.id]), nodo)
+        return nodo
+
+    def visit_UnaryOp(self, nodo):
+        self.generic_visit(nodo)
+        if type(nodo.op) in _UNARIOS and self.constante(nodo.operand):
+            valor = _plegar(_UNARIOS[type(nodo.op)][1], nodo.operand.value)
+            if valor is not None:
+                return ast.copy_location(ast.Constant(valor), nodo)
+        return nodo
+
+    def visit_BinOp(self, nodo):
+        self.generic_visit(nodo)
+        if type(nodo.op) not in _BINARIOS:
+            return nodo
+        if self.constante(nodo.left) and self.constante(nodo.right):
+            valor = _plegar(_BINARIOS[type(nodo.op)][1], nodo.left.value, nodo.right.value)
+            if valor is not None:
+                return ast.copy_location(ast.Constant(valor), nodo)
+        if (isinstance(nodo.op, ast.Pow) and isinstance(nodo.left, ast.Name)
+                and nodo.left.id in self.variables and self.constante(nodo.right) and nodo.right.value in _PRODUCTOS):
+            # x**3 -> x*x*x; con otra base se repetiría su cálculo fuera de los bloques
+            producto = nodo.left
+            for _ in range(int(nodo.right.value) - 1):
+                producto = ast.BinOp(producto, ast.Mult(), ast.Name(nodo.left.id, ast.Load()))
+            return ast.copy_location(producto, nodo)
+        return nodo
+
+def optimizar(arbol, variables, nombres):
+    """Copia optimizada del AST (ya validado) de una expresión.
+
+    variables son los nombres que recibe la función compilada; nombres es
+    el entorno seguro de evaluación (interpreter.cargar_numpy).
+    """
+    import copy
+    arbol = _Optimizador(frozenset(variables), nombres).visit(copy.deepcopy(arbol))
+    return ast.fix_missing_locations(arbol)
+
+# Funciones de Python que tienen una ufunc equivalente
+_UFUNCS_EQUIVALENTES = {abs: np.absolute}
+
+class _Traductor:
+    """Recorre el AST y emite (ufunc, operandos, búfer destino).
+
+    Un operando es ('v', nombre) para una variable, ('c', valor) para una
+    constante o ('t', índice) para un búfer temporal. Las subexpresiones
+    iguales se calculan una vez; cada temporal lleva la cuenta de los usos
+    que le quedan y, cuando llega a cero, la operación que lo lee escribe
+    encima. Así hacen falta pocos búferes, no uno por operación.
+    """
+
+    def __init__(self, variables, nombres):
+        self.variables = variables
+        # Del entorno de evaluación solo se usan las ufuncs y las constantes
+        funciones = ((k, _UFUNCS_EQUIVALENTES.get(v, v)) for k, v in nombres.items() if callable(v))
+        self.funciones = {k: v for k, v in funciones if isinstance(v, np.ufunc)}
+        self.constantes = {k: v for k, v in nombres.items() if isinstance(v, float)}
+        self.instrucciones = []
+        self.libres = []
+        self.temporales = 0
+        self.usos = {}        # Subexpresión (ast.dump) -> veces que se lee su valor
+        self.valores = {}     # Subexpresión -> operando ya calculado
+        self.restantes = {}   # Temporal -> lecturas pendientes
+
+    def contar(self, nodo):
+        """Cuenta las lecturas de cada subexpresión; una repetida se recorre una sola vez"""
+        if not isinstance(nodo, ast.expr) or isinstance(nodo, (ast.Constant, ast.Name)):
+            return
+        clave = ast.dump(nodo)
+        self.usos[clave] = self.usos.get(clave, 0) + 1
+        if self.usos[clave] == 1:
+            for hijo in ast.iter_child_nodes(nodo):
+                self.contar(hijo)
+
+    def destino(self, operandos):
+        """Búfer para el resultado: reutiliza un temporal que ya no se lee y libera el resto"""
+        muertos = []
+        for tipo, indice in operandos:
+            if tipo == 't':
+                self.restantes[indice] -= 1
+                if self.restantes[indice] == 0 and indice not in muertos:
+                    muertos.append(indice)
+        if muertos:
+            self.libres.extend(muertos[1:])
+            return muertos[0]
+        if self.libres:
+            return self.libres.pop()
+        self.temporales += 1
+        return self.temporales - 1
+
+    def emitir(self, ufunc, operandos, lecturas=1):
+        destino = self.destino(operandos)
+        self.instrucciones.append((ufunc, operandos, destino))
+        self.restantes[destino] = lecturas
+        return ('t', destino)
+
+    def leer_mas(self, operando, veces):
+        """Agrega lecturas a un operando que se usa varias veces en una misma operación"""
+        if operando[0] == 't':
+            self.restantes[operando[1]] += veces
+
+    def visitar(self, nodo):
+        if isinstance(nodo, ast.Expression):
+            self.contar(nodo.body)
+            return self.visitar(nodo.body)
+        if isinstance(nodo, ast.Constant):
+            if not _es_numero(nodo.value):
+                raise NoVectorizable(repr(nodo.value))
+            return ('c', nodo.value)
+        if isinstance(nodo, ast.Name):
+            if nodo.id in self.variables:
+                return ('v', nodo.id)
+            if nodo.id in self.constantes:
+                return ('c', self.constantes[nodo.id])
+            raise NoVectorizable(nodo.id)
+
+        clave = ast.dump(nodo)
+        if clave in self.valores:
+            return self.valores[clave]
+        if isinstance(nodo, ast.BinOp) and type(nodo.op) in _BINARIOS:
+            operando = self.binario(nodo)
+        elif isinstance(nodo, ast.UnaryOp) and type(nodo.op) in _UNARIOS:
+            ufunc, escalar = _UNARIOS[type(nodo.op)]
+            operando = self.operar(ufunc, escalar, [self.visitar(nodo.operand)])
+        elif isinstance(nodo, ast.Call):
+            operando = self.llamada(nodo)
+        else:
+            raise NoVectorizable(type(nodo).__name__)
+        if operando[0] == 't':
+            self.restantes[operando[1]] = self.usos.get(clave, 1)
+        self.valores[clave] = operando
+        return operando
+
+    def operar(self, ufunc, escalar, operandos):
+        """Emite la operación, o la calcula ya si todos los operandos son constantes"""
+        if all(tipo == 'c' for tipo, _ in operandos):
+            valor = _plegar(escalar, *(valor for _, valor in operandos))
+            if valor is None:
+                raise NoVectorizable("constante")
+            return ('c', valor)
+        return self.emitir(ufunc, operandos)
+
+    def binario(self, nodo):
+        ufunc, escalar = _BINARIOS[type(nodo.op)]
+        izquierdo, derecho = self.visitar(nodo.left), self.visitar(nodo.right)
+        if ufunc is np.power and izquierdo[0] != 'c' and derecho[0] == 'c':
+            if derecho[1] in _PRODUCTOS:
+                return self.productos(izquierdo, int(derecho[1]))
+            if derecho[1] in _POTENCIAS:
+                return self.emitir(_POTENCIAS[derecho[1]], [izquierdo])
+        return self.operar(ufunc, escalar, [izquierdo, derecho])
+
+    def productos(self, base, exponente):
+        """base**2, base**3 o base**4 con multiplicaciones"""
+        if exponente == 3:
+            self.leer_mas(base, 2)
+            cuadrado = self.emitir(np.multiply, [base, base])
+            return self.emitir(np.multiply, [cuadrado, base])
+        self.leer_mas(base, 1)
+        if exponente == 2:
+            return self.emitir(np.multiply, [base, base])
+        cuadrado = self.emitir(np.multiply, [base, base], lecturas=2)
+        return self.emitir(np.multiply, [cuadrado, cuadrado])
+
+    def llamada(self, nodo):
+        if not isinstance(nodo.func, ast.Name) or nodo.keywords or nodo.func.id not in self.funciones:
+            raise NoVectorizable("llamada")
+        ufunc = self.funciones[nodo.func.id]
+        if len(nodo.args) != ufunc.nin:
+            raise NoVectorizable("aridad")
+        return self.operar(ufunc, ufunc, [self.visitar(argumento) for argumento in nodo.args])
+
+class ProgramaBloques:
+    """Expresión traducida a ufuncs; se evalúa por bloques sobre arreglos float64"""
+
+    def __init__(self, instrucciones, temporales, variables):
+        self.instrucciones = instrucciones
+        self.temporales = temporales
+        self.variables = variables
+
+    def admite(self, entradas):
+        """True si todas las entradas son arreglos float64 de la misma forma"""
+        forma = None
+        for valor in entradas.values():
+            if not isinstance(valor, np.ndarray) or valor.dtype != np.float64:
+                return False
+            if forma is not None and valor.shape != forma:
+                return False
+            forma = valor.shape
+        return forma is not None
+
+    def evaluar(self, entradas):
+        forma = next(iter(entradas.values())).shape
+        planos = {nombre: valor.reshape(-1) for nombre, valor in entradas.items()}
+        total = int(np.prod(forma))
+        salida = np.empty(total)
+        bufferes = [np.empty(min(BLOQUE, total)) for _ in range(self.temporales)]
+        ultima = len(self.instrucciones) - 1
+
+        for inicio in range(0, total, BLOQUE):
+            fin = min(inicio + BLOQUE, total)
+            largo = fin - inicio
+            temporales = [b[:largo] for b in bufferes]
+            for indice, (ufunc, operandos, destino) in enumerate(self.instrucciones):
+                argumentos = []
+                for tipo, valor in operandos:
+                    if tipo == 'v':
+                        argumentos.append(planos[valor][inicio:fin])
+                    elif tipo == 't':
+                        argumentos.append(temporales[valor])
+                    else:
+                        argumentos.append(valor)
+                # La última operación escribe directo en la salida
+                out = salida[inicio:fin] if indice == ultima else temporales[destino]
+                ufunc(*argumentos, out=out)
+        return salida.reshape(forma)
+
+def traducir(arbol, variables, nombres):
+    """ProgramaBloques para el AST de una expresión, o None si no se puede traducir.
+
+    arbol ya pasó por optimizar(); nombres es el entorno seguro de evaluación.
+    Las expresiones que no hacen ninguna operación sobre las variables
+    (una constante, la variable sola) se dejan a eval.
+    """
+    traductor = _Traductor(frozenset(variables), nombres)
+    try:
+        resultado = traductor.visitar(arbol)
+    except NoVectorizable:
+        return None
+    if resultado[0] != 't':
+        return None
+    return ProgramaBloques(traductor.instrucciones, traductor.temporales, traductor.variables)
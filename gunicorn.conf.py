@@ -0,0 +1,35 @@
+"""
+Configuración de gunicorn (se carga sola desde el directorio de trabajo)
+
+Cada worker arranca su propio pool de dibujo (render_pool.py), de un
+proceso por defecto: la memoria de matplotlib crece con workers × procesos.
+Para ajustarlo (WEB_CONCURRENCY o --workers fija la cantidad de workers):
+- MATHVIEW_RENDERIZADORES=N da N procesos de dibujo por worker. Un worker
+  síncrono atiende una petición a la vez, así que más de uno solo sirve
+  con --threads; con núcleos de sobra conviene hasta núcleos / workers.
+- MATHVIEW_RENDERIZADORES=0 dibuja dentro de cada worker: sin procesos
+  extra, lo más liviano en memoria.
+
+/imagen/<hash> puede llegar a un worker distinto del que atendió /compilar:
+las imágenes se guardan en un directorio que comparten (MATHVIEW_ALMACEN,
+por defecto <tmp>/mathview; ver cache.AlmacenDisco).
+"""
+
+from render_pool import TIEMPO_MAXIMO
+
+# Más que el límite de un dibujo más la ejecución del programa: si un dibujo
+# se cuelga, el pool responde con un error antes de que se mate al worker
+timeout = TIEMPO_MAXIMO + 30
+
+def on_starting(server):
+    """Con --preload, el proceso maestro importa numpy y matplotlib una vez
+    y los workers los heredan ya cargados; sin --preload cada worker arranca
+    liviano y los carga en su primer gráfico"""
+    if server.cfg.preload_app:
+        from interpreter import precargar_graficos
+        precargar_graficos()
+
+def post_worker_init(worker):
+    """Arranca el pool de dibujo de cada worker sin demorar su arranque"""
+    import render_pool
+    render_pool.precalentar(esperar=False)
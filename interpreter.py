@@ -1,17 +1,25 @@
-import re
 import ast
 import math
-import numpy as np
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
+from functools import lru_cache
 from io import BytesIO
 import base64
-from matplotlib.animation import FuncAnimation, PillowWriter
+from ast_nodes import Programa
+from compiler import Compiler
+from cache import AlmacenDisco, ResponseCache, clave_contenido, clave_bytes
+from render_pool import renderizar
+from safe_eval import LimiteExcedido, compilar as compilar_seguro, costo_factorial, limitar
 
-# Configuración de matplotlib
-plt.style.use('dark_background')
-plt.rcParams.update({
+# numpy, matplotlib, Pillow (raster.py) y sampling.py se importan al primer
+# gráfico o función matemática: los programas que solo usan pri/put y
+# aritmética no pagan su carga, y los workers arrancan más rápido.
+# precargar_graficos() los importa de antemano (ver gunicorn.conf.py)
+
+# Versión de la salida del intérprete: cambiarla invalida las respuestas
+# guardadas en caché (ver cache.py)
+VERSION_INTERPRETE = "1.6"
+
+# Configuración de matplotlib (se aplica sobre el estilo dark_background)
+ESTILO_MATPLOTLIB = {
     'figure.facecolor': '#0a0e27',
     'axes.facecolor': '#111827',
     'axes.edgecolor': '#4ade80',
@@ -31,34 +39,242 @@ plt.rcParams.update({
     'savefig.dpi': 150,
     'savefig.bbox': 'tight',
     'savefig.facecolor': '#0a0e27'
-})
+}
+
+@lru_cache(maxsize=None)
+def pyplot():
+    """Importa y configura matplotlib una sola vez; retorna pyplot"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    plt.style.use('dark_background')
+    plt.rcParams.update(ESTILO_MATPLOTLIB)
+    return plt
+
+@lru_cache(maxsize=None)
+def huella_estilo():
+    """Huella del estilo: forma parte de la clave de la caché de gráficos.
+
+    Se arma con el estilo y la versión de matplotlib, sin importarlo, para
+    que los gráficos que no lo usan (ver raster.py) no paguen su carga.
+    """
+    from importlib.metadata import version
+    return clave_contenido("dark_background", sorted((k, repr(v)) for k, v in ESTILO_MATPLOTLIB.items()),
+                           version("matplotlib"))
+
+@lru_cache(maxsize=None)
+def lut_viridis():
+    """Paleta viridis como tabla RGB para el mapa de calor sin matplotlib"""
+    import numpy as np
+    import matplotlib
+    return (matplotlib.colormaps['viridis'](np.linspace(0, 1, 256))[:, :3] * 255).round().astype(np.uint8)
+
+# Resolución de muestreo de cada tipo de gráfico (draw2d usa muestreo
+# adaptativo, ver sampling.py; MUESTRAS_2D es la malla uniforme de respaldo)
+MUESTRAS_2D = 800
+MALLA_3D = 100  # Lado de respaldo si la resolución no se puede estimar
+
+# Formas de dibujar draw3d: superficie 3D o mapa de calor (imshow), más rápido
+MODOS_3D = ("superficie", "mapa")
+
+# Qué gráficos de un programa se devuelven: solo el último, todos como
+# lista de imágenes o todos en una sola figura con subgráficos
+ESCENAS = ("ultima", "lista", "subplots")
+# Gráficos que se conservan en los modos "lista" y "subplots": cada uno
+# guarda sus datos muestreados hasta el final (una malla 3D, unos MB)
+GRAFICOS_MAX_ESCENA = 30
+
+# Tamaño (px) de las ventanas win2d si no se indica, y sus límites
+ANCHO_VENTANA, ALTO_VENTANA = 800, 500
+ANCHO_MIN_VENTANA, ANCHO_MAX_VENTANA = 200, 1600
+ALTO_MIN_VENTANA, ALTO_MAX_VENTANA = 150, 1200
+
+# Formas de entregar un gráfico: imagen PNG o, para draw2d, la serie muestreada
+MODOS_GRAFICO = ("imagen", "datos")
+
+# Formatos de imagen en orden de preferencia: WebP, PNG con paleta de 256
+# colores y PNG a color completo (el de siempre, lo aceptan todos)
+FORMATOS_IMAGEN = ("webp", "png8", "png")
+
+# Ancho (px) de las imágenes: el cliente pide el de su pantalla y se redondea
+# hacia arriba a PASO_ANCHO para que anchos parecidos compartan la caché
+ANCHO_MIN_IMAGEN = 200
+ANCHO_MAX_IMAGEN = 1600
+PASO_ANCHO = 100
+
+@lru_cache(maxsize=None)
+def admite_webp():
+    from PIL import features
+    return features.check('webp')
+
+def elegir_formato(aceptados):
+    """El formato preferido entre los que acepta el cliente; PNG si no hay otro"""
+    for formato in FORMATOS_IMAGEN:
+        if formato in aceptados and (formato != "webp" or admite_webp()):
+            return formato
+    return "png"
+
+def ancho_imagen(ancho):
+    """Ancho pedido por el cliente, redondeado a PASO_ANCHO y acotado"""
+    ancho = -(-int(ancho) // PASO_ANCHO) * PASO_ANCHO
+    return min(max(ancho, ANCHO_MIN_IMAGEN), ANCHO_MAX_IMAGEN)
+
+def tipo_mime(datos):
+    """Tipo MIME de una imagen codificada según su firma"""
+    return "image/webp" if datos[8:12] == b"WEBP" else "image/png"
+
+# Imágenes codificadas indexadas por el hash de su contenido; la
+# respuesta lleva solo el hash y el navegador las pide a /imagen/<hash>,
+# que puede atender cualquier worker: el almacén está en disco
+almacen_imagenes = AlmacenDisco("imagenes", max_bytes=64 * 1024 * 1024)
+
+# Hash de la imagen ya dibujada de cada gráfico normalizado (64 bytes por entrada)
+graficos = ResponseCache(max_bytes=2 * 1024 * 1024)
+
+def guardar_imagen(datos):
+    """Guarda la imagen bajo el hash de su contenido y retorna el hash"""
+    digest = clave_bytes(datos)
+    almacen_imagenes.guardar(digest, datos)
+    return digest
+
+def imagen_guardada(clave):
+    """Hash de la imagen de un gráfico ya dibujado, si sigue en el almacén"""
+    digest = graficos.obtener(clave)
+    if digest is None:
+        return None
+    digest = digest.decode('ascii')
+    return digest if digest in almacen_imagenes else None
+
+def imagenes_disponibles(resultado):
+    """True si todas las imágenes y animaciones que nombra un resultado siguen guardadas"""
+    from animation import animaciones
+    salidas = [resultado] + list(resultado.get("imagenes") or [])
+    return (all(s["imagen"] in almacen_imagenes for s in salidas if s.get("imagen")) and
+            all(a["id"] in animaciones for a in resultado.get("animaciones") or []))
 
 # Utilidades de evaluación segura
 _SAFE_MATH = {k: getattr(math, k) for k in dir(math) if not k.startswith("_")}
-_SAFE_NUMPY = {
-    'sin': np.sin, 'cos': np.cos, 'tan': np.tan,
-    'exp': np.exp, 'log': np.log, 'ln': np.log, 'sqrt': np.sqrt,
-    'abs': np.abs, 'pi': np.pi, 'e': np.e,
-    'arctan2': np.arctan2, 'arcsin': np.arcsin,
-    'arccos': np.arccos, 'sinh': np.sinh, 'cosh': np.cosh
-}
+# Funciones de numpy: reemplazan a las de math con el mismo nombre. pi, e
+# (de math) y abs (de Python) ya sirven con arreglos: no cargan numpy
+_NOMBRES_NUMPY = frozenset({
+    'sin', 'cos', 'tan', 'exp', 'log', 'ln', 'sqrt',
+    'arctan2', 'arcsin', 'arccos', 'sinh', 'cosh'
+})
 _SAFE_NAMES = {}
 _SAFE_NAMES.update(_SAFE_MATH)
-_SAFE_NAMES.update(_SAFE_NUMPY)
+_SAFE_NAMES['abs'] = abs
+
+# 0! .. 170! exactos: los que se piden una y otra vez en bucles. 170! es
+# además el mayor factorial representable como float64
+_FACTORIALES = tuple(math.factorial(i) for i in range(171))
+
+# Coeficientes de la aproximación de Lanczos (g = 7, 9 términos) para Γ
+_LANCZOS_G = 7
+_LANCZOS = (
+    0.99999999999980993, 676.5203681218851, -1259.1392167224028,
+    771.32342877765313, -176.61502916214059, 12.507343278686905,
+    -0.13857109526572012, 9.9843695780195716e-6, 1.5056327351493116e-7
+)
 
 def factorial(n):
-    """Calcula factorial"""
+    """Calcula factorial.
+
+    Escalares: n! exacto de int(n) (1 si n <= 1), de la tabla hasta 170.
+    Arreglos (draw2d(fact(x), 0, 10)): Γ(x + 1) elemento a elemento, que
+    coincide con n! en los enteros; 1 donde x <= 1, como los escalares.
+    """
+    if getattr(n, 'ndim', 0) > 0:
+        return _factorial_arreglo(n)
     if n <= 1:
         return 1
-    result = 1
-    for i in range(2, int(n) + 1):
-        result *= i
-    return result
+    k = int(n)
+    return _FACTORIALES[k] if k < len(_FACTORIALES) else math.factorial(k)
+
+@lru_cache(maxsize=None)
+def _factoriales_float():
+    import numpy as np
+    return np.array(_FACTORIALES, dtype=np.float64)
+
+def _gamma(z):
+    """Γ(z) para un arreglo con z >= 2 (Lanczos en escala logarítmica: no desborda antes de tiempo)"""
+    import numpy as np
+    z = z - 1
+    serie = np.full_like(z, _LANCZOS[0])
+    for i, coeficiente in enumerate(_LANCZOS[1:], 1):
+        serie += coeficiente / (z + i)
+    t = z + _LANCZOS_G + 0.5
+    return np.exp(0.5 * math.log(2 * math.pi) + (z + 0.5) * np.log(t) - t + np.log(serie))
+
+def _factorial_arreglo(n):
+    """fact elemento a elemento: tabla exacta en los enteros, Γ(x + 1) entre ellos"""
+    import numpy as np
+    x = np.asarray(n, dtype=np.float64)
+    resultado = np.ones_like(x)
+    resultado[np.isnan(x)] = np.nan
+    mayores = x > 1
+    tabla = _factoriales_float()
+    enteros = mayores & (x == np.floor(x)) & (x < len(tabla))
+    resultado[enteros] = tabla[x[enteros].astype(np.intp)]
+    # Γ(x + 1) desborda float64 antes de x = 172
+    desbordan = x >= 172
+    resultado[desbordan] = np.inf
+    resto = mayores & ~enteros & ~desbordan
+    with np.errstate(over='ignore'):
+        resultado[resto] = _gamma(x[resto] + 1)
+    return resultado
 
 _SAFE_NAMES['fact'] = factorial
+limitar(factorial, costo_factorial)
+
+# Entorno global compartido por todas las evaluaciones: las variables del
+# programa se pasan como mapeo local, sin copiar este diccionario
+_ENTORNO_EVAL = {"__builtins__": {}}
+_ENTORNO_EVAL.update(_SAFE_NAMES)
+
+@lru_cache(maxsize=None)
+def cargar_numpy():
+    """Importa numpy y agrega sus funciones a los entornos de evaluación"""
+    import numpy as np
+    seguras = {
+        'sin': np.sin, 'cos': np.cos, 'tan': np.tan,
+        'exp': np.exp, 'log': np.log, 'ln': np.log, 'sqrt': np.sqrt,
+        'arctan2': np.arctan2, 'arcsin': np.arcsin,
+        'arccos': np.arccos, 'sinh': np.sinh, 'cosh': np.cosh
+    }
+    _SAFE_NAMES.update(seguras)
+    _ENTORNO_EVAL.update(seguras)
+    return seguras
+
+def precargar_graficos():
+    """Importa de antemano todo lo que se carga al primer gráfico.
+
+    Para servidores que importan la aplicación antes de crear los workers
+    (gunicorn --preload): los workers heredan los módulos ya cargados.
+    """
+    cargar_numpy()
+    pyplot()
+    lut_viridis()
+    huella_estilo()
+    import raster, sampling
+
+@lru_cache(maxsize=1024)
+def compilar_expresion(expr_src):
+    """Compila una expresión una sola vez; LRU acotado indexado por el texto.
+
+    Retorna (f(variables) -> valor, nombres que usa); f corre con los
+    límites de costo de safe_eval en lugar de eval.
+    """
+    return compilar_seguro(ast.parse(expr_src.replace('^', '**'), mode='eval'), _ENTORNO_EVAL)
 
 def compile_expr_1d(expr_src):
-    """Crea función f(x) que evalúa expr_src de forma segura."""
+    """Crea función f(x) que evalúa expr_src de forma segura.
+
+    El AST se optimiza (constantes, potencias) y sobre arreglos float64 la
+    expresión se evalúa por bloques sin temporales del tamaño de la malla
+    (evaluator); si no se puede traducir se usa safe_eval.
+    """
+    cargar_numpy()
+    from evaluator import optimizar, traducir
     try:
         expr_src = expr_src.replace('^', '**')
         node = ast.parse(expr_src, mode='eval')
@@ -72,18 +288,23 @@ def compile_expr_1d(expr_src):
             elif isinstance(sub, (ast.Import, ast.ImportFrom, ast.Lambda)):
                 raise ValueError("Constructos no permitidos")
         
-        code = compile(node, filename="<expr>", mode="eval")
+        node = optimizar(node, ('x', 'b'), _SAFE_NAMES)
+        evaluar, _ = compilar_seguro(node, _SAFE_NAMES)
+        programa = traducir(node, ('x', 'b'), _SAFE_NAMES)
         
         def f(x):
             env = {'x': x, 'b': x}
-            env.update(_SAFE_NAMES)
-            return eval(code, {"__builtins__": {}}, env)
+            if programa is not None and programa.admite(env):
+                return programa.evaluar(env)
+            return evaluar(env)
         return f
     except Exception as e:
         raise ValueError(f"Error compilando expresión: {e}")
 
 def compile_expr_2d(expr_src):
-    """Crea función f(x,y) que evalúa expr_src."""
+    """Crea función f(x,y) que evalúa expr_src (por bloques si se puede, ver compile_expr_1d)."""
+    cargar_numpy()
+    from evaluator import optimizar, traducir
     try:
         expr_src = expr_src.replace('^', '**')
         node = ast.parse(expr_src, mode='eval')
@@ -97,49 +318,272 @@ def compile_expr_2d(expr_src):
             elif isinstance(sub, (ast.Import, ast.ImportFrom, ast.Lambda)):
                 raise ValueError("Constructos no permitidos")
         
-        code = compile(node, filename="<expr2d>", mode="eval")
+        node = optimizar(node, ('x', 'y'), _SAFE_NAMES)
+        evaluar, _ = compilar_seguro(node, _SAFE_NAMES)
+        programa = traducir(node, ('x', 'y'), _SAFE_NAMES)
         
         def f(x, y):
             env = {'x': x, 'y': y}
-            env.update(_SAFE_NAMES)
-            return eval(code, {"__builtins__": {}}, env)
+            if programa is not None and programa.admite(env):
+                return programa.evaluar(env)
+            return evaluar(env)
         return f
     except Exception as e:
         raise ValueError(f"Error compilando expresión 2D: {e}")
 
-def png_from_figure(fig, dpi=100):
-    """Convierte figura matplotlib a PNG base64."""
+def compile_expr_animada(expr_src):
+    """Crea función f(x,t) para move/now/lost (t: tiempo en segundos)."""
+    cargar_numpy()
+    try:
+        expr_src = expr_src.replace('^', '**')
+        node = ast.parse(expr_src, mode='eval')
+        
+        for sub in ast.walk(node):
+            if isinstance(sub, ast.Call):
+                if not isinstance(sub.func, ast.Name):
+                    raise ValueError("Llamadas complejas no permitidas")
+            elif isinstance(sub, ast.Attribute):
+                raise ValueError("Acceso por atributo no permitido")
+            elif isinstance(sub, (ast.Import, ast.ImportFrom, ast.Lambda)):
+                raise ValueError("Constructos no permitidos")
+        
+        evaluar, _ = compilar_seguro(node, _SAFE_NAMES)
+        
+        def f(x, t):
+            return evaluar({'x': x, 't': t})
+        return f
+    except Exception as e:
+        raise ValueError(f"Error compilando expresión animada: {e}")
+
+def png_bytes_from_figure(fig, dpi=100):
+    """Convierte figura matplotlib a bytes PNG y la cierra."""
     buf = BytesIO()
     fig.savefig(buf, format='png', bbox_inches='tight', dpi=dpi)
-    buf.seek(0)
-    data64 = base64.b64encode(buf.read()).decode('utf-8')
-    plt.close(fig)
-    return data64
+    pyplot().close(fig)
+    return buf.getvalue()
+
+def imagen_de_figura(fig, dpi=100, formato="png", continuo=False):
+    """Codifica una figura matplotlib en el formato pedido y la cierra"""
+    if formato == "png":
+        return png_bytes_from_figure(fig, dpi)
+    from PIL import Image
+    from raster import codificar
+    # PNG sin comprimir como intermediario: savefig recorta el borde (bbox tight)
+    buf = BytesIO()
+    fig.savefig(buf, format='png', bbox_inches='tight', dpi=dpi, pil_kwargs={"compress_level": 0})
+    pyplot().close(fig)
+    return codificar(Image.open(buf).convert("RGB"), formato, continuo)
+
+def png_from_figure(fig, dpi=100):
+    """Convierte figura matplotlib a PNG base64."""
+    return base64.b64encode(png_bytes_from_figure(fig, dpi)).decode('utf-8')
+
+def serie_2d(x, y, titulo, etiqueta):
+    """Serie x/y como Float32 little-endian en base64, con los metadatos de los ejes."""
+    import numpy as np
+    from raster import limites
+    xs = np.asarray(x, dtype='<f4')
+    ys = np.asarray(y, dtype='<f4')
+    finitos = np.isfinite(ys)
+    # El cliente corta la curva en los NaN
+    ys = np.where(finitos, ys, np.float32(np.nan)).astype('<f4')
+    ymin, ymax = limites(ys[finitos].astype(np.float64))
+    return {
+        "tipo": "serie2d",
+        "formato": "float32le",
+        "n": int(xs.size),
+        "x": base64.b64encode(xs.tobytes()).decode('ascii'),
+        "y": base64.b64encode(ys.tobytes()).decode('ascii'),
+        "xmin": float(x[0]),
+        "xmax": float(x[-1]),
+        "ymin": ymin,
+        "ymax": ymax,
+        "titulo": titulo,
+        "etiqueta": etiqueta
+    }
+
+def normalizar_expresion(expr_src):
+    """Forma canónica de una expresión: su AST de Python, sin espacios ni paréntesis redundantes"""
+    return ast.dump(ast.parse(expr_src.replace('^', '**'), mode='eval'))
+
+def clave_grafico(tipo, expr, limites, muestras, figsize, dpi, formato="png"):
+    """Clave de la caché de gráficos.
+
+    El texto original también entra en la clave porque se dibuja en el título.
+    """
+    return clave_contenido(
+        tipo, normalizar_expresion(expr), expr, [repr(float(v)) for v in limites],
+        muestras, list(figsize), dpi, formato, huella_estilo()
+    )
+
+# ===== DIBUJO DE LA ESCENA =====
+# Cada llamada a draw2d/draw3d registra un elemento con los datos ya
+# muestreados; se dibujan al terminar el programa, solo los que se devuelven
+
+def dibujar_elemento(ax, elemento, fig):
+    """Dibuja un elemento de la escena en unos ejes de matplotlib"""
+    if elemento["tipo"] == "2d":
+        ax.plot(elemento["x"], elemento["y"], color='deepskyblue', linewidth=2, label=elemento["etiqueta"])
+        ax.set_title(elemento["titulo"], fontsize=14, fontweight='bold')
+        ax.set_xlabel('x', fontsize=12)
+        ax.set_ylabel('y', fontsize=12)
+        ax.legend()
+        ax.grid(True, alpha=0.3)
+    elif elemento["modo"] == "mapa":
+        xlim, ylim = elemento["xlim"], elemento["ylim"]
+        imagen = ax.imshow(elemento["Z"], extent=(*xlim, *ylim), origin='lower', cmap='viridis',
+                           aspect='auto', interpolation='bilinear')
+        ax.grid(False)
+        ax.set_title(elemento["titulo"], fontsize=14, fontweight='bold')
+        ax.set_xlabel('X', fontsize=11)
+        ax.set_ylabel('Y', fontsize=11)
+        fig.colorbar(imagen, ax=ax)
+    else:
+        surf = ax.plot_surface(elemento["XX"], elemento["YY"], elemento["Z"], cmap='viridis', alpha=0.9)
+        ax.set_title(elemento["titulo"], fontsize=14, fontweight='bold')
+        ax.set_xlabel('X', fontsize=11)
+        ax.set_ylabel('Y', fontsize=11)
+        ax.set_zlabel('Z', fontsize=11)
+        fig.colorbar(surf, ax=ax, shrink=0.5, aspect=5)
+
+def es_superficie(elemento):
+    return elemento["tipo"] == "3d" and elemento["modo"] == "superficie"
+
+def es_continuo(elemento):
+    """True si el gráfico es de tono continuo (mapa o superficie), no de líneas"""
+    return elemento["tipo"] == "3d"
+
+def dibujar_imagen(elemento):
+    """Imagen codificada de un elemento: sin matplotlib si se puede (ver raster.py)"""
+    from raster import admite_2d, dibujar_2d, admite_mapa, dibujar_mapa
+    # El tamaño de la figura a su dpi da el ancho final en píxeles
+    ancho = round(elemento["figsize"][0] * elemento["dpi"])
+    formato = elemento["formato"]
+    try:
+        if elemento["tipo"] == "2d":
+            x, y = elemento["x"], elemento["y"]
+            if admite_2d(x, y, elemento["etiqueta"]):
+                return dibujar_2d(x, y, elemento["titulo"], elemento["etiqueta"], ancho, formato)
+        elif elemento["modo"] == "mapa" and admite_mapa(elemento["Z"], elemento["xlim"], elemento["ylim"],
+                                                        elemento["titulo"]):
+            return dibujar_mapa(elemento["Z"], elemento["xlim"], elemento["ylim"], elemento["titulo"], lut_viridis(),
+                                ancho, formato)
+    except (ArithmeticError, ValueError):
+        # Datos que raster.py no previó: matplotlib sabe dibujarlos
+        pass
+
+    # Lo demás pasa por matplotlib, en un proceso de dibujo (ver render_pool.py)
+    return renderizar(dibujar_imagen_matplotlib, elemento)
+
+def dibujar_imagen_matplotlib(elemento):
+    """Imagen de un elemento dibujado con matplotlib"""
+    fig = pyplot().figure(figsize=elemento["figsize"])
+    if es_superficie(elemento):
+        from mpl_toolkits.mplot3d import Axes3D
+        ax = fig.add_subplot(111, projection='3d')
+    else:
+        ax = fig.add_subplot(111)
+    dibujar_elemento(ax, elemento, fig)
+    return imagen_de_figura(fig, elemento["dpi"], elemento["formato"], es_continuo(elemento))
+
+def dibujar_subplots(elementos, ancho=None, formato="png"):
+    """Todos los elementos en una figura, en una cuadrícula de hasta 2 columnas"""
+    columnas = min(len(elementos), 2)
+    filas = (len(elementos) + columnas - 1) // columnas
+    figsize = (7 * columnas, 5 * filas)
+    fig = pyplot().figure(figsize=figsize)
+    for indice, elemento in enumerate(elementos, start=1):
+        if es_superficie(elemento):
+            from mpl_toolkits.mplot3d import Axes3D
+            ax = fig.add_subplot(filas, columnas, indice, projection='3d')
+        else:
+            ax = fig.add_subplot(filas, columnas, indice)
+        dibujar_elemento(ax, elemento, fig)
+    fig.tight_layout()
+    dpi = ancho / figsize[0] if ancho else 100
+    return imagen_de_figura(fig, dpi, formato, any(es_continuo(e) for e in elementos))
+
+def precalentar_matplotlib():
+    """Dibuja una figura mínima (texto, ejes 3D, colorbar) para cargar fuentes y backends"""
+    import numpy as np
+    from mpl_toolkits.mplot3d import Axes3D
+    fig = pyplot().figure(figsize=(2, 2))
+    ax = fig.add_subplot(111, projection='3d')
+    superficie = ax.plot_surface(*np.meshgrid([0, 1], [0, 1]), np.zeros((2, 2)), cmap='viridis')
+    ax.set_title('Gráfico', fontsize=14, fontweight='bold')
+    fig.colorbar(superficie)
+    png_bytes_from_figure(fig)
+
+def construir_ast(codigo):
+    """Tokeniza y analiza código fuente, retornando su AST"""
+    from lexer import Lexer
+    from parser import Parser
+    tokens = Lexer().tokenizar(codigo)["tokens"]
+    return Parser(tokens).analizar()["ast"]
+
+class EntradaPendiente(Exception):
+    """Se lanza cuando put() necesita un valor que el usuario aún no envió"""
 
 class Interpreter:
-    def __init__(self, source_code, user_inputs=None):
-        self.source = source_code if isinstance(source_code, str) else ""
+    def __init__(self, programa, user_inputs=None, modo_grafico="imagen", modo_3d="superficie",
+                 modo_escena="ultima", ancho=None, formato="png"):
+        if isinstance(programa, str):
+            programa = construir_ast(programa)
+        self.programa = programa if isinstance(programa, Programa) else Programa()
         self.variables = {}
         self.salida_consola = []
         self.ultima_imagen = None
         self.tipo_imagen = "png"
+        self.modo_grafico = modo_grafico
+        self.modo_3d = modo_3d  # Modo de draw3d si el programa no indica otro
+        self.ultimo_grafico = None  # Serie de draw2d en modo "datos"
+        self.modo_escena = modo_escena
+        self.ancho = ancho  # Ancho de las imágenes en px (None: el de la figura a 100 dpi)
+        self.formato = formato
+        self.escena = []  # Gráficos registrados, se dibujan al terminar
+        self.graficos_descartados = 0  # Pasados de GRAFICOS_MAX_ESCENA
+        self.imagenes = []  # En los modos "lista" y "subplots"
+        self.ventana = None  # win2d abierto: sus move/now/lost
+        self.animaciones = []
         self.actions = []
-        self.user_inputs = user_inputs if user_inputs else []
+        self.user_inputs = list(user_inputs) if user_inputs else []
         self.input_index = 0
         self.solicitudes_input = []
         self.errores = []
+        # Un dibujo falló (p. ej. el pool de dibujo no respondió a tiempo):
+        # el error puede ser pasajero y la respuesta no se guarda en caché
+        self.error_dibujo = False
+        # Programa compilado: lista de instrucciones f(interp) -> siguiente_pc
+        self.codigo = Compiler().compilar(self.programa)
+        self.pc = 0
+        self.iteraciones = {}  # Contador de cada while, indexado por su pc
 
     def ejecutar(self):
-        """Ejecuta el código y retorna resultados."""
-        try:
-            if not self.source or not self.source.strip():
-                self.errores.append("⚠️ Código vacío")
-                return self.get_result()
+        """Ejecuta el programa y retorna resultados."""
+        if not self.programa.cuerpo:
+            self.errores.append("⚠️ Código vacío")
+            return self.get_result()
 
-            # CAMBIO CRÍTICO: Ejecutar código secuencialmente SIEMPRE
-            # Esto permite que las condicionales controlen qué gráficas se dibujan
-            self.ejecutar_codigo_secuencial()
+        return self.continuar()
 
+    def reanudar(self, valor):
+        """Reanuda una ejecución detenida en put() con un nuevo valor."""
+        self.user_inputs.append(str(valor))
+        self.solicitudes_input = []
+        return self.continuar()
+
+    def continuar(self):
+        """Ejecuta desde la instrucción actual hasta terminar o pedir input."""
+        try:
+            # Ejecutar el programa compilado secuencialmente: las
+            # condicionales controlan qué gráficas se dibujan
+            self.ejecutar_codigo()
+
+        except EntradaPendiente:
+            # Se necesita input, detener ejecución (self.pc queda en el put)
+            pass
+        except LimiteExcedido as e:
+            self.errores.append(f"❌ Límite de cálculo: {str(e)}")
         except SyntaxError as e:
             self.errores.append(f"❌ Error de sintaxis: {str(e)}")
         except NameError as e:
@@ -151,8 +595,15 @@ class Interpreter:
         except Exception as e:
             self.errores.append(f"❌ Error: {str(e)}")
 
+        # Una ejecución pausada en put() no devuelve gráficos todavía
+        if not self.esperando_input:
+            self.dibujar_escena()
         return self.get_result()
 
+    @property
+    def esperando_input(self):
+        return bool(self.solicitudes_input)
+
     def get_result(self):
         """Retorna el resultado de la ejecución."""
         return {
@@ -160,354 +611,199 @@ class Interpreter:
             "errores": self.errores,
             "imagen": self.ultima_imagen,
             "tipo_imagen": self.tipo_imagen,
+            "grafico": self.ultimo_grafico,
+            "imagenes": self.imagenes,
+            "animaciones": self.animaciones,
             "acciones": self.actions,
-            "solicitudes_input": self.solicitudes_input
+            "solicitudes_input": self.solicitudes_input,
+            "error_dibujo": self.error_dibujo
         }
 
-    def ejecutar_codigo_secuencial(self):
-        """Ejecuta código línea por línea"""
-        lineas = self.source.split(';')
-        
-        i = 0
-        while i < len(lineas):
-            linea = lineas[i].strip()
-            
-            if not linea:
-                i += 1
-                continue
-            
-            # Si hay solicitudes de input pendientes, detener ejecución
-            if self.solicitudes_input:
-                break
-            
-            # Detectar bloques while
-            if 'while' in linea and '{' in linea:
-                bloque_completo = linea
-                nivel_llaves = linea.count('{') - linea.count('}')
-                j = i + 1
-                
-                while nivel_llaves > 0 and j < len(lineas):
-                    bloque_completo += ';' + lineas[j]
-                    nivel_llaves += lineas[j].count('{') - lineas[j].count('}')
-                    j += 1
-                
-                self.ejecutar_while(bloque_completo)
-                i = j
-                continue
-            
-            # Detectar bloques if
-            if linea.startswith('if') and '(' in linea:
-                bloque_completo = linea
-                nivel_llaves = linea.count('{') - linea.count('}')
-                j = i + 1
-                
-                while nivel_llaves > 0 and j < len(lineas):
-                    bloque_completo += ';' + lineas[j]
-                    nivel_llaves += lineas[j].count('{') - lineas[j].count('}')
-                    j += 1
-                
-                # Buscar else if o else
-                while j < len(lineas):
-                    siguiente = lineas[j].strip()
-                    if siguiente.startswith('elif') or siguiente.startswith('else'):
-                        bloque_completo += ';' + siguiente
-                        if '{' in siguiente:
-                            nivel_llaves = siguiente.count('{') - siguiente.count('}')
-                            j += 1
-                            while nivel_llaves > 0 and j < len(lineas):
-                                bloque_completo += ';' + lineas[j]
-                                nivel_llaves += lineas[j].count('{') - lineas[j].count('}')
-                                j += 1
-                        else:
-                            j += 1
-                    else:
-                        break
-                
-                self.ejecutar_if(bloque_completo)
-                i = j
-                continue
-            
-            # Instrucción individual
+    def ejecutar_codigo(self):
+        """Ejecuta las instrucciones compiladas desde self.pc"""
+        codigo = self.codigo
+        fin = len(codigo)
+        pc = self.pc
+        while pc < fin:
             try:
-                self.ejecutar_instruccion(linea)
-                # Si se solicitó input, detener
-                if self.solicitudes_input:
-                    break
-            except StopIteration:
-                # Se necesita input, detener ejecución
-                break
-            except SyntaxError as e:
-                self.errores.append(f"❌ Error de sintaxis en línea: {linea[:30]}...")
-                break
-            except NameError as e:
-                self.errores.append(f"❌ Variable no definida: {str(e)}")
-                break
-            except ZeroDivisionError:
-                self.errores.append(f"❌ División por cero en: {linea[:30]}...")
-                break
+                pc = codigo[pc](self)
+            except (EntradaPendiente, SyntaxError, NameError, ZeroDivisionError, LimiteExcedido):
+                # Errores que detienen la ejecución del programa
+                self.pc = pc
+                raise
             except Exception as e:
                 self.errores.append(f"❌ Error: {str(e)}")
-            
-            i += 1
+                pc += 1
+        self.pc = pc
 
-    def ejecutar_instruccion(self, linea):
-        """Ejecuta una instrucción individual"""
-        linea = linea.strip()
-        
-        if not linea or linea == '}' or linea == '{':
-            return
-        
-        # Si ya tenemos solicitudes de input pendientes, no seguir ejecutando
-        if self.solicitudes_input:
-            return
-        
-        # draw2d(...)
-        if linea.startswith('draw2d('):
-            self.ejecutar_draw2d(linea)
-            return
-        
-        # draw3d(...)
-        if linea.startswith('draw3d('):
-            self.ejecutar_draw3d(linea)
-            return
-        
-        # Declaración con tipo
-        if re.match(r'^\s*(int|dec|ecu|string)\s+\w+', linea):
-            self.ejecutar_declaracion(linea)
-            return
-        
-        # Asignación
-        if re.match(r'^\s*\w+\s*=', linea):
-            self.ejecutar_asignacion(linea)
-            return
-        
-        # pri(...)
-        if linea.startswith('pri('):
-            self.ejecutar_pri(linea)
-            return
-        
-        # put(...) - Solicitar entrada
-        if linea.startswith('put('):
-            self.ejecutar_put(linea)
-            return
-        
-        # Incremento/decremento
-        if re.match(r'^\s*\w+\s*\+\+', linea):
-            var = re.match(r'(\w+)\s*\+\+', linea).group(1)
-            if var in self.variables:
-                self.variables[var] += 1
+    def ejecutar_put(self, var):
+        """put(n); - solicita entrada del usuario"""
+        # Si hay inputs proporcionados, usar el siguiente
+        if self.input_index < len(self.user_inputs):
+            valor_str = self.user_inputs[self.input_index]
+            self.input_index += 1
+
+            # Intentar convertir a número
+            try:
+                if '.' in valor_str:
+                    valor = float(valor_str)
+                else:
+                    valor = int(valor_str)
+            except:
+                valor = valor_str
+
+            self.variables[var] = valor
+            # No agregar a salida aquí, ya se muestra en el frontend
+        else:
+            # Solicitar input al usuario SOLO si no lo hemos pedido ya
+            if not self.solicitudes_input or self.solicitudes_input[-1]['variable'] != var:
+                # Obtener el último mensaje de pri() como prompt
+                prompt = f'{var}: '
+                if self.salida_consola:
+                    # Usar el último mensaje como prompt
+                    prompt = self.salida_consola[-1] if self.salida_consola[-1] else f'{var}: '
+
+                self.solicitudes_input.append({
+                    'variable': var,
+                    'mensaje': prompt,
+                    'salida_previa': list(self.salida_consola)  # Guardar salida hasta ahora
+                })
+            # Detener ejecución hasta recibir input
+            raise EntradaPendiente("Esperando input del usuario")
+
+    def ejecutar_draw2d(self, argumentos):
+        """Ejecuta draw2d directamente"""
+        if len(argumentos) != 3:
+            self.errores.append("Error en draw2d: se esperaban 3 argumentos (expresión, xmin, xmax)")
             return
-        
-        if re.match(r'^\s*\w+\s*--', linea):
-            var = re.match(r'(\w+)\s*--', linea).group(1)
-            if var in self.variables:
-                self.variables[var] -= 1
+        expr, xmin_expr, xmax_expr = argumentos
+        try:
+            xmin = float(self.evaluar_expresion(xmin_expr.texto))
+            xmax = float(self.evaluar_expresion(xmax_expr.texto))
+            if self.ventana is not None:
+                # Si el win2d resulta animado, la curva queda de fondo
+                self.ventana["fondo"].append([expr.texto, xmin, xmax])
+            self.crear_grafico_2d(expr.texto, xmin, xmax)
+        except Exception as e:
+            self.errores.append(f"Error en draw2d: {e}")
+
+    def ejecutar_draw3d(self, argumentos):
+        """Ejecuta draw3d directamente; un 6.º argumento opcional elige el modo"""
+        if len(argumentos) not in (5, 6):
+            self.errores.append("Error en draw3d: se esperaban 5 argumentos (expresión, xmin, xmax, ymin, ymax) y opcionalmente el modo")
             return
+        expr = argumentos[0]
+        modo = self.modo_3d
+        if len(argumentos) == 6:
+            if not argumentos[5].es_simple("CADENA") or argumentos[5].texto[1:-1] not in MODOS_3D:
+                self.errores.append(f"Error en draw3d: modo desconocido {argumentos[5].texto} (se esperaba \"superficie\" o \"mapa\")")
+                return
+            modo = argumentos[5].texto[1:-1]
+        try:
+            xmin, xmax, ymin, ymax = (float(self.evaluar_expresion(a.texto)) for a in argumentos[1:5])
+            self.crear_grafico_3d(expr.texto, xmin, xmax, ymin, ymax, modo)
+        except Exception as e:
+            self.errores.append(f"Error en draw3d: {e}")
 
-    def ejecutar_draw2d(self, linea):
-        """Ejecuta draw2d directamente"""
-        match = re.match(r'draw2d\s*\(\s*([^,]+)\s*,\s*([^,]+)\s*,\s*([^)]+)\s*\)', linea)
-        if match:
-            expr, xmin_str, xmax_str = match.groups()
-            try:
-                xmin = float(self.evaluar_expresion(xmin_str.strip()))
-                xmax = float(self.evaluar_expresion(xmax_str.strip()))
-                self.crear_grafico_2d(expr.strip(), xmin, xmax)
-            except Exception as e:
-                self.errores.append(f"Error en draw2d: {e}")
+    # ===== win2d: ANIMACIONES (ver animation.py) =====
 
-    def ejecutar_draw3d(self, linea):
-        """Ejecuta draw3d directamente"""
-        match = re.match(r'draw3d\s*\(\s*([^,]+)\s*,\s*([^,]+)\s*,\s*([^,]+)\s*,\s*([^,]+)\s*,\s*([^)]+)\s*\)', linea)
-        if match:
-            expr, xmin_str, xmax_str, ymin_str, ymax_str = match.groups()
-            try:
-                xmin = float(self.evaluar_expresion(xmin_str.strip()))
-                xmax = float(self.evaluar_expresion(xmax_str.strip()))
-                ymin = float(self.evaluar_expresion(ymin_str.strip()))
-                ymax = float(self.evaluar_expresion(ymax_str.strip()))
-                self.crear_grafico_3d(expr.strip(), xmin, xmax, ymin, ymax)
-            except Exception as e:
-                self.errores.append(f"Error en draw3d: {e}")
+    def abrir_ventana(self, nombre, argumentos):
+        """win2d nombre(ancho, alto) { ... }: lo que sigue puede animarse"""
+        ancho, alto = ANCHO_VENTANA, ALTO_VENTANA
+        try:
+            if len(argumentos) >= 2:
+                ancho = int(float(self.evaluar_expresion(argumentos[0].texto)))
+                alto = int(float(self.evaluar_expresion(argumentos[1].texto)))
+        except (TypeError, ValueError):
+            self.errores.append("Error en win2d: el tamaño debe ser (ancho, alto) en píxeles")
+        self.ventana = {
+            "nombre": nombre or "win2d",
+            "ancho": min(max(ancho, ANCHO_MIN_VENTANA), ANCHO_MAX_VENTANA),
+            "alto": min(max(alto, ALTO_MIN_VENTANA), ALTO_MAX_VENTANA),
+            "fondo": [], "curvas": [], "puntos": [], "fin": None,
+            "escena": len(self.escena)  # Gráficos registrados antes del bloque
+        }
 
-    def ejecutar_declaracion(self, linea):
-        """int n = 10; o int n;"""
-        match = re.match(r'(int|dec|ecu|string)\s+(\w+)(?:\s*=\s*(.+))?', linea)
-        if match:
-            tipo, var, valor = match.groups()
-            
-            if valor:
-                if valor.startswith('//') and valor.endswith('//'):
-                    valor_limpio = valor[2:-2].strip()
-                    self.variables[var] = valor_limpio
-                else:
-                    try:
-                        self.variables[var] = self.evaluar_expresion(valor)
-                    except Exception as e:
-                        self.errores.append(f"❌ Error al evaluar '{valor}': {str(e)}")
-                        self.variables[var] = 0
-            else:
-                valor_default = 0 if tipo in ['int', 'dec'] else ""
-                self.variables[var] = valor_default
-        else:
-            self.errores.append(f"❌ Declaración mal formada: {linea}")
+    def cerrar_ventana(self):
+        """Fin del bloque win2d: si tuvo move/now, registra la animación"""
+        ventana, self.ventana = self.ventana, None
+        if ventana is None or not (ventana["curvas"] or ventana["puntos"]):
+            return  # Sin animación: sus draw2d quedan como gráficos normales
 
-    def ejecutar_asignacion(self, linea):
-        """n = 10; o n = n + 1;"""
-        match = re.match(r'(\w+)\s*=\s*(.+)', linea)
-        if match:
-            var, expr = match.groups()
-            try:
-                self.variables[var] = self.evaluar_expresion(expr)
-            except Exception as e:
-                self.errores.append(f"❌ Error en asignación: {str(e)}")
-                self.variables[var] = 0
-        else:
-            self.errores.append(f"❌ Asignación mal formada: {linea}")
+        # Los draw2d del bloque pasan a ser el fondo de la animación
+        inicio = ventana.pop("escena")
+        self.escena[inicio:] = [e for e in self.escena[inicio:] if e["tipo"] != "2d"]
 
-    def ejecutar_pri(self, linea):
-        """pri(n); o pri("texto");"""
-        match = re.match(r'pri\s*\(\s*(.+?)\s*\)', linea)
-        if match:
-            contenido = match.group(1).strip()
-            
-            # Cadena
-            if (contenido.startswith('"') and contenido.endswith('"')) or \
-               (contenido.startswith("'") and contenido.endswith("'")):
-                texto = contenido[1:-1]
-                self.salida_consola.append(texto)
-            # Expresión //...//
-            elif contenido.startswith('//') and contenido.endswith('//'):
-                expr = contenido[2:-2]
-                self.salida_consola.append(expr)
-            # Variable
-            elif contenido in self.variables:
-                self.salida_consola.append(str(self.variables[contenido]))
-            # Expresión
-            else:
-                valor = self.evaluar_expresion(contenido)
-                self.salida_consola.append(str(valor))
+        from animation import evaluar, guardar, FPS
+        descripcion = dict(ventana, formato=self.formato)
+        # El cliente no muestra más ancho que el de su pantalla
+        if self.ancho and self.ancho < descripcion["ancho"]:
+            escala = self.ancho / descripcion["ancho"]
+            descripcion["ancho"], descripcion["alto"] = self.ancho, round(descripcion["alto"] * escala)
+        try:
+            cantidad = len(evaluar(descripcion)["t"])
+        except Exception as e:
+            self.errores.append(f"Error en win2d: {e}")
+            return
 
-    def ejecutar_put(self, linea):
-        """put(n); - solicita entrada del usuario"""
-        match = re.match(r'put\s*\(\s*(\w+)\s*\)', linea)
-        if match:
-            var = match.group(1)
-            
-            # Si hay inputs proporcionados, usar el siguiente
-            if self.input_index < len(self.user_inputs):
-                valor_str = self.user_inputs[self.input_index]
-                self.input_index += 1
-                
-                # Intentar convertir a número
-                try:
-                    if '.' in valor_str:
-                        valor = float(valor_str)
-                    else:
-                        valor = int(valor_str)
-                except:
-                    valor = valor_str
-                
-                self.variables[var] = valor
-                # No agregar a salida aquí, ya se muestra en el frontend
-            else:
-                # Solicitar input al usuario SOLO si no lo hemos pedido ya
-                if not self.solicitudes_input or self.solicitudes_input[-1]['variable'] != var:
-                    # Obtener el último mensaje de pri() como prompt
-                    prompt = f'{var}: '
-                    if self.salida_consola:
-                        # Usar el último mensaje como prompt
-                        prompt = self.salida_consola[-1] if self.salida_consola[-1] else f'{var}: '
-                    
-                    self.solicitudes_input.append({
-                        'variable': var,
-                        'mensaje': prompt,
-                        'salida_previa': list(self.salida_consola)  # Guardar salida hasta ahora
-                    })
-                # Detener ejecución hasta recibir input
-                raise StopIteration("Esperando input del usuario")
-
-    def ejecutar_while(self, bloque):
-        """Ejecuta bucle while"""
-        match = re.match(r'while\s*\(\s*(.+?)\s*\)\s*\{(.+)\}', bloque, re.DOTALL)
-        if not match:
-            self.errores.append("Error: sintaxis de while incorrecta")
+        self.animaciones.append({
+            "id": guardar(descripcion, huella_estilo()),
+            "nombre": descripcion["nombre"],
+            "cuadros": cantidad,
+            "fps": FPS,
+            "ancho": descripcion["ancho"],
+            "alto": descripcion["alto"]
+        })
+        self.salida_consola.append(f"✓ Animación generada ({cantidad} cuadros)")
+
+    def ejecutar_move(self, argumentos):
+        """move(expr, xmin, xmax); - curva y = f(x, t) dentro de win2d"""
+        if self.ventana is None:
+            self.errores.append("Error en move: solo es válida dentro de win2d")
             return
-        
-        condicion_str, cuerpo = match.groups()
-        
-        iteraciones = 0
-        max_iter = 1000
-        
-        while iteraciones < max_iter:
-            try:
-                condicion = self.evaluar_expresion(condicion_str)
-                if not condicion:
-                    break
-            except:
-                break
-            
-            instrucciones = cuerpo.split(';')
-            for inst in instrucciones:
-                inst = inst.strip()
-                if inst:
-                    self.ejecutar_instruccion(inst)
-            
-            iteraciones += 1
-
-    def ejecutar_if(self, bloque):
-        """Ejecuta condicional if/elif/else"""
-        # Extraer if principal
-        match_if = re.match(r'if\s*\(\s*(.+?)\s*\)\s*\{(.+?)(?=\}\s*(?:elif|else)|$)', bloque, re.DOTALL)
-        if not match_if:
-            self.errores.append("Error: sintaxis de if incorrecta")
+        if len(argumentos) != 3:
+            self.errores.append("Error en move: se esperaban 3 argumentos (expresión en x y t, xmin, xmax)")
             return
-        
-        condicion_if, cuerpo_if = match_if.groups()
-        
-        # Evaluar if
+        expr, xmin_expr, xmax_expr = argumentos
         try:
-            if self.evaluar_expresion(condicion_if):
-                # Ejecutar bloque if
-                instrucciones = cuerpo_if.split(';')
-                for inst in instrucciones:
-                    inst = inst.strip()
-                    if inst and inst != '}':
-                        self.ejecutar_instruccion(inst)
-                return  # Si el if se ejecutó, no evaluar elif/else
+            compile_expr_animada(expr.texto)
+            xmin = float(self.evaluar_expresion(xmin_expr.texto))
+            xmax = float(self.evaluar_expresion(xmax_expr.texto))
+            self.ventana["curvas"].append([expr.texto, xmin, xmax])
         except Exception as e:
-            self.errores.append(f"Error en if: {e}")
+            self.errores.append(f"Error en move: {e}")
+
+    def ejecutar_now(self, argumentos):
+        """now(x(t), y(t)); - punto que se mueve dentro de win2d"""
+        if self.ventana is None:
+            self.errores.append("Error en now: solo es válida dentro de win2d")
             return
-        
-        # Buscar elif
-        resto = bloque[match_if.end():]
-        matches_elif = list(re.finditer(r'(?:elif)\s*\(\s*(.+?)\s*\)\s*\{(.+?)\}', resto, re.DOTALL))
-        
-        for match_elif in matches_elif:
-            condicion_elif, cuerpo_elif = match_elif.groups()
-            try:
-                if self.evaluar_expresion(condicion_elif):
-                    instrucciones = cuerpo_elif.split(';')
-                    for inst in instrucciones:
-                        inst = inst.strip()
-                        if inst and inst != '}':
-                            self.ejecutar_instruccion(inst)
-                    return  # Si un elif se ejecutó, terminar
-            except:
-                continue
-        
-        # Buscar else
-        match_else = re.search(r'else\s*\{(.+?)\}', resto, re.DOTALL)
-        if match_else:
-            cuerpo_else = match_else.group(1)
-            instrucciones = cuerpo_else.split(';')
-            for inst in instrucciones:
-                inst = inst.strip()
-                if inst and inst != '}':
-                    self.ejecutar_instruccion(inst)
+        if len(argumentos) != 2:
+            self.errores.append("Error en now: se esperaban 2 argumentos (x(t), y(t))")
+            return
+        try:
+            for argumento in argumentos:
+                compile_expr_animada(argumento.texto)
+            self.ventana["puntos"].append([argumentos[0].texto, argumentos[1].texto])
+        except Exception as e:
+            self.errores.append(f"Error en now: {e}")
+
+    def ejecutar_lost(self, argumentos):
+        """lost(condición en t); - la animación termina cuando se cumple"""
+        if self.ventana is None:
+            self.errores.append("Error en lost: solo es válida dentro de win2d")
+            return
+        if len(argumentos) != 1:
+            self.errores.append("Error en lost: se esperaba 1 argumento (condición en t)")
+            return
+        try:
+            compile_expr_animada(argumentos[0].texto)
+            self.ventana["fin"] = argumentos[0].texto
+        except Exception as e:
+            self.errores.append(f"Error en lost: {e}")
 
     def evaluar_expresion(self, expr):
-        """Evalúa una expresión matemática"""
+        """Evalúa una expresión matemática contra las variables actuales"""
         try:
             expr = str(expr).strip()
             
@@ -515,14 +811,11 @@ class Interpreter:
             if not expr:
                 raise ValueError("Expresión vacía")
             
-            # Reemplazar variables
-            for var, val in self.variables.items():
-                expr = re.sub(r'\b' + re.escape(var) + r'\b', str(val), expr)
-            
-            expr = expr.replace('^', '**')
-            
-            env = dict(_SAFE_NAMES)
-            resultado = eval(expr, {"__builtins__": {}}, env)
+            # Las variables se resuelven por nombre en self.variables
+            evaluar, nombres = compilar_expresion(expr)
+            if _NOMBRES_NUMPY.intersection(nombres):
+                cargar_numpy()
+            resultado = evaluar(self.variables)
             
             return resultado
         except ZeroDivisionError:
@@ -533,57 +826,171 @@ class Interpreter:
             raise NameError(f"Variable '{var_name}' no está definida")
         except SyntaxError:
             raise SyntaxError(f"Sintaxis inválida en expresión: {expr}")
+        except LimiteExcedido:
+            # No se trata como texto: el programa debe detenerse con el error
+            raise
         except Exception as e:
             return expr
 
+    # ===== ESCENA =====
+
+    def registrar_grafico(self, elemento, mensaje):
+        """Agrega un gráfico a la escena; se dibuja al terminar el programa"""
+        if self.modo_escena == "ultima":
+            # Solo se devuelve el último: el anterior se descarta con sus datos.
+            # Dentro de win2d se conserva lo de antes del bloque y el último de
+            # cada tipo, porque los draw2d del bloque pueden pasar a ser fondo
+            if self.ventana is None:
+                self.escena.clear()
+            else:
+                inicio = self.ventana["escena"]
+                self.escena[inicio:] = [e for e in self.escena[inicio:] if e["tipo"] != elemento["tipo"]]
+        elif len(self.escena) >= GRAFICOS_MAX_ESCENA:
+            self.graficos_descartados += 1
+            return
+        elif self.modo_escena == "lista" and ("serie" in elemento or "bytes" in elemento):
+            # La serie o la imagen ya están armadas: las muestras no hacen falta
+            for clave in ("x", "y", "XX", "YY", "Z"):
+                elemento.pop(clave, None)
+        self.escena.append(elemento)
+        self.salida_consola.append(mensaje)
+
+    def dibujar_escena(self):
+        """Dibuja solo los gráficos que se devuelven según el modo de escena"""
+        escena, self.escena = self.escena, []
+        if self.graficos_descartados:
+            self.errores.append(f"Se omitieron {self.graficos_descartados} gráficos: en el modo "
+                                f"\"{self.modo_escena}\" se devuelven hasta {GRAFICOS_MAX_ESCENA}")
+            self.graficos_descartados = 0
+        if not escena:
+            return
+        try:
+            if self.modo_escena == "subplots" and len(escena) > 1:
+                clave = clave_contenido("subplots", [e["clave"] for e in escena], self.ancho)
+                digest = imagen_guardada(clave)
+                if digest is None:
+                    digest = guardar_imagen(renderizar(dibujar_subplots, escena, self.ancho, self.formato))
+                    graficos.guardar(clave, digest.encode('ascii'))
+                salidas = [{"imagen": digest}]
+            elif self.modo_escena == "ultima":
+                salidas = [self.resultado_elemento(escena[-1])]
+            else:
+                salidas = [self.resultado_elemento(e) for e in escena]
+        except Exception as e:
+            self.error_dibujo = True
+            self.errores.append(f"Error al dibujar los gráficos: {str(e)}")
+            return
+
+        ultimo = salidas[-1]
+        self.ultima_imagen = ultimo.get("imagen")
+        self.ultimo_grafico = ultimo.get("grafico")
+        self.tipo_imagen = self.formato
+        if self.modo_escena != "ultima":
+            self.imagenes = salidas
+
+    def resultado_elemento(self, elemento):
+        """{'imagen': hash de la imagen} o, en modo datos, {'grafico': serie}"""
+        if "serie" in elemento:
+            return {"grafico": elemento["serie"]}
+        digest = elemento.get("imagen")
+        if digest is None:
+            datos = elemento.get("bytes")
+            if datos is None:
+                datos = dibujar_imagen(elemento)
+            digest = guardar_imagen(datos)
+            graficos.guardar(elemento["clave"], digest.encode('ascii'))
+        return {"imagen": digest}
+
+    def dibujar_ya(self, elemento):
+        """Imagen de un elemento dibujada al registrarlo, anotando si el dibujo falló"""
+        try:
+            return dibujar_imagen(elemento)
+        except Exception:
+            self.error_dibujo = True
+            raise
+
+    def dpi_figura(self, figsize):
+        """dpi al que la figura sale del ancho pedido por el cliente"""
+        return self.ancho / figsize[0] if self.ancho else 100
+
     def crear_grafico_2d(self, expr, xmin, xmax):
-        """Crea gráfico 2D"""
+        """Registra un gráfico 2D con la curva ya muestreada"""
+        import numpy as np
+        from sampling import muestrear_2d, PRESUPUESTO_2D, es_serie
         try:
+            figsize = (8, 5)
+            dpi = self.dpi_figura(figsize)
             expr_py = expr.replace('^', '**')
             f = compile_expr_1d(expr_py)
-            
-            x = np.linspace(xmin, xmax, 800)
-            y = f(x)
-            
-            fig, ax = plt.subplots(figsize=(8, 5))
-            ax.plot(x, y, color='deepskyblue', linewidth=2, label=f'y = {expr}')
-            ax.set_title(f'Gráfico 2D: y = {expr}', fontsize=14, fontweight='bold')
-            ax.set_xlabel('x', fontsize=12)
-            ax.set_ylabel('y', fontsize=12)
-            ax.legend()
-            ax.grid(True, alpha=0.3)
-            
-            self.ultima_imagen = png_from_figure(fig)
-            self.tipo_imagen = "png"
-            self.salida_consola.append(f"✓ Gráfico 2D generado")
+            titulo = f'Gráfico 2D: y = {expr}'
+            etiqueta = f'y = {expr}'
+            clave = clave_grafico("2d", expr, (xmin, xmax), PRESUPUESTO_2D, figsize, dpi, self.formato)
+            elemento = {"tipo": "2d", "titulo": titulo, "etiqueta": etiqueta, "clave": clave,
+                        "figsize": figsize, "dpi": dpi, "formato": self.formato}
+
+            # Ya dibujado antes: no hace falta ni muestrear (salvo para subgráficos)
+            if self.modo_grafico != "datos" and self.modo_escena != "subplots":
+                digest = imagen_guardada(clave)
+                if digest is not None:
+                    elemento["imagen"] = digest
+                    self.registrar_grafico(elemento, "✓ Gráfico 2D generado")
+                    return
+
+            x, y = muestrear_2d(f, xmin, xmax, uniformes=MUESTRAS_2D)
+            elemento.update(x=x, y=y)
+
+            if es_serie(x, y) and np.isfinite(y).any():
+                # Modo datos: se envía la serie y el cliente la dibuja
+                if self.modo_grafico == "datos" and self.modo_escena != "subplots":
+                    elemento["serie"] = serie_2d(x, y, titulo, etiqueta)
+            else:
+                # Datos raros (p. ej. una constante): dibujar ya, para que
+                # los errores de matplotlib salgan en su lugar de la salida
+                elemento["bytes"] = self.dibujar_ya(elemento)
+
+            self.registrar_grafico(elemento, "✓ Gráfico 2D generado")
             
         except Exception as e:
             self.errores.append(f"Error en gráfico 2D: {str(e)}")
 
-    def crear_grafico_3d(self, expr, xmin, xmax, ymin, ymax):
-        """Crea gráfico 3D"""
+    def crear_grafico_3d(self, expr, xmin, xmax, ymin, ymax, modo="superficie"):
+        """Registra un gráfico 3D (superficie o mapa de calor) con la malla ya evaluada"""
+        import numpy as np
+        from sampling import resolucion_3d, malla_max_superficie, MALLA_MAX_MAPA, es_serie
         try:
+            figsize = (8, 6)
+            dpi = self.dpi_figura(figsize)
             expr_py = expr.replace('^', '**')
             f2 = compile_expr_2d(expr_py)
+
+            # Lado de la malla según la variación de la función y el
+            # presupuesto de latencia de cada modo (ver sampling.py)
+            maximo = MALLA_MAX_MAPA if modo == "mapa" else malla_max_superficie()
+            lado = resolucion_3d(f2, xmin, xmax, ymin, ymax, maximo) or MALLA_3D
+
+            clave = clave_grafico("3d", expr, (xmin, xmax, ymin, ymax), [modo, lado], figsize, dpi,
+                                  self.formato)
+            elemento = {"tipo": "3d", "modo": modo, "titulo": f'Gráfico 3D: z = {expr}', "clave": clave,
+                        "xlim": (xmin, xmax), "ylim": (ymin, ymax), "figsize": figsize, "dpi": dpi,
+                        "formato": self.formato}
+
+            if self.modo_escena != "subplots":
+                digest = imagen_guardada(clave)
+                if digest is not None:
+                    elemento["imagen"] = digest
+                    self.registrar_grafico(elemento, "✓ Gráfico 3D generado")
+                    return
             
-            X = np.linspace(xmin, xmax, 100)
-            Y = np.linspace(ymin, ymax, 100)
+            X = np.linspace(xmin, xmax, lado)
+            Y = np.linspace(ymin, ymax, lado)
             XX, YY = np.meshgrid(X, Y)
             Z = f2(XX, YY)
-            
-            from mpl_toolkits.mplot3d import Axes3D
-            fig = plt.figure(figsize=(8, 6))
-            ax = fig.add_subplot(111, projection='3d')
-            surf = ax.plot_surface(XX, YY, Z, cmap='viridis', alpha=0.9)
-            ax.set_title(f'Gráfico 3D: z = {expr}', fontsize=14, fontweight='bold')
-            ax.set_xlabel('X', fontsize=11)
-            ax.set_ylabel('Y', fontsize=11)
-            ax.set_zlabel('Z', fontsize=11)
-            fig.colorbar(surf, shrink=0.5, aspect=5)
-            
-            self.ultima_imagen = png_from_figure(fig, dpi=100)
-            self.tipo_imagen = "png"
-            self.salida_consola.append(f"✓ Gráfico 3D generado")
+            elemento.update(XX=XX, YY=YY, Z=Z)
+
+            if not es_serie(XX, Z):
+                elemento["bytes"] = self.dibujar_ya(elemento)
+
+            self.registrar_grafico(elemento, "✓ Gráfico 3D generado")
             
         except Exception as e:
-            self.errores.append(f"Error en gráfico 3D: {str(e)}")
\ No newline at end of file
+            self.errores.append(f"Error en gráfico 3D: {str(e)}")
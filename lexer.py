@@ -1,160 +1,191 @@
 import re
 
+# Palabras clave del lenguaje
+PALABRAS_CLAVE = {
+    "var": "VAR",
+    "int": "TIPO_ENTERO",
+    "dec": "TIPO_DECIMAL",
+    "pos": "TIPO_POSITIVO",
+    "bin": "TIPO_BINARIO",
+    "string": "TIPO_CADENA",
+    "chain": "TIPO_CHAIN",
+    "ecu": "TIPO_ECUACION",
+    "win2d": "VENTANA_2D",
+    "win3d": "VENTANA_3D",
+    "void": "TIPO_VACIO",
+    "true": "BOOLEANO_TRUE",
+    "false": "BOOLEANO_FALSE",
+    "if": "CONDICIONAL_IF",
+    "elif": "CONDICIONAL_ELIF",
+    "else": "CONDICIONAL_ELSE",
+    "while": "BUCLE_WHILE",
+    "return": "RETORNO",
+    "display": "FUNCION_DISPLAY",
+    "move": "FUNCION_MOVE",
+    "config": "FUNCION_CONFIG",
+    "draw2d": "FUNCION_DIBUJO_2D",
+    "draw3d": "FUNCION_DIBUJO_3D",
+    "plane2d": "FUNCION_PLANO_2D",
+    "plane3d": "FUNCION_PLANO_3D",
+    "vector2d": "FUNCION_VECTOR_2D",
+    "vector3d": "FUNCION_VECTOR_3D",
+    "text": "FUNCION_TEXTO",
+    "now": "FUNCION_NOW",
+    "lost": "FUNCION_LOST",
+    "put": "FUNCION_PUT",
+    "pri": "FUNCION_PRI",
+    "eva": "FUNCION_EVA",
+    "rem": "FUNCION_REM",
+    "fact": "FUNCION_FACT",
+    # Funciones matemáticas
+    "sin": "FUNCION_MATH",
+    "cos": "FUNCION_MATH",
+    "tan": "FUNCION_MATH",
+    "exp": "FUNCION_MATH",
+    "log": "FUNCION_MATH",
+    "ln": "FUNCION_MATH",
+    "sqrt": "FUNCION_MATH",
+    "abs": "FUNCION_MATH",
+    "arctan2": "FUNCION_MATH",
+    "arcsin": "FUNCION_MATH",
+    "arccos": "FUNCION_MATH",
+    "sinh": "FUNCION_MATH",
+    "cosh": "FUNCION_MATH",
+    "pi": "CONSTANTE_MATH",
+    "e": "CONSTANTE_MATH"
+}
+
+# Símbolos y operadores
+SIMBOLOS = {
+    '(': 'PAR_IZQ',
+    ')': 'PAR_DER',
+    '{': 'LLAVE_IZQ',
+    '}': 'LLAVE_DER',
+    '[': 'CORCH_IZQ',
+    ']': 'CORCH_DER',
+    ',': 'COMA',
+    ';': 'PUNTO_COMA',
+    ':': 'DOSPUNTOS',
+    '=': 'ASIGNACION',
+    '+': 'MAS',
+    '-': 'MENOS',
+    '*': 'MULT',
+    '/': 'DIV',
+    '%': 'MOD',
+    '^': 'POTENCIA',
+    '<': 'MENOR',
+    '>': 'MAYOR',
+    '==': 'IGUAL',
+    '!=': 'DIFERENTE',
+    '>=': 'MAYORIGUAL',
+    '<=': 'MENORIGUAL',
+    '**': 'POTENCIA',
+    '`': 'BACKTICK',
+    '++': 'INCREMENTO',
+    '--': 'DECREMENTO',
+    '+=': 'MAS_IGUAL',
+    '-=': 'MENOS_IGUAL'
+}
+
+# Escáner único: cada alternativa es un grupo con nombre, así el tipo de
+# lexema sale directamente del match. Los espacios previos se absorben en
+# el mismo match. Las alternativas más frecuentes van primero, respetando:
+# - Números negativos y decimales (-123, -45.67) antes que el operador '-'
+# - Expresiones entre //...// antes que los comentarios de línea; pegadas a
+#   las barras (//x^2//): '// texto // más' y '// texto' son comentarios
+# - Comentarios de bloque y de línea (se descartan) antes que el operador '/'
+# - Operadores dobles (==, !=, <=, >=, **, ++, --, +=, -=) antes que los simples
+_ESCANER = re.compile(r"""
+  \s*(?:
+    (?P<PALABRA>[a-zA-Z_][a-zA-Z0-9_]*\b)
+  | (?P<NUMERO>-?\d+\.?\d*)
+  | (?P<EXPRESION_MATH>//(?!\s)[^/\n]*[^/\s]//)
+  | (?P<COMENTARIO_BLOQUE>/\*.*?\*/)
+  | (?P<COMENTARIO_LINEA>//[^\n]*)
+  | (?P<OPERADOR>==|!=|<=|>=|\*\*|\+\+|--|\+=|-=|[+\-*/%=;:(),{}\[\]<>^`])
+  | (?P<CADENA>'[^']*'|"[^"]*")
+  | (?P<DESCONOCIDO>\w+)
+  | (?P<OTRO>.)
+  )
+""", re.VERBOSE | re.DOTALL)
+
+_DESCARTAR = {"COMENTARIO_BLOQUE", "COMENTARIO_LINEA", "OTRO"}
+
 class Lexer:
     def __init__(self):
-        # Palabras clave del lenguaje
-        self.PALABRAS_CLAVE = {
-            "var": "VAR",
-            "int": "TIPO_ENTERO",
-            "dec": "TIPO_DECIMAL",
-            "pos": "TIPO_POSITIVO",
-            "bin": "TIPO_BINARIO",
-            "string": "TIPO_CADENA",
-            "chain": "TIPO_CHAIN",
-            "ecu": "TIPO_ECUACION",
-            "win2d": "VENTANA_2D",
-            "win3d": "VENTANA_3D",
-            "void": "TIPO_VACIO",
-            "true": "BOOLEANO_TRUE",
-            "false": "BOOLEANO_FALSE",
-            "if": "CONDICIONAL_IF",
-            "elif": "CONDICIONAL_ELIF",
-            "else": "CONDICIONAL_ELSE",
-            "while": "BUCLE_WHILE",
-            "return": "RETORNO",
-            "display": "FUNCION_DISPLAY",
-            "move": "FUNCION_MOVE",
-            "config": "FUNCION_CONFIG",
-            "draw2d": "FUNCION_DIBUJO_2D",
-            "draw3d": "FUNCION_DIBUJO_3D",
-            "plane2d": "FUNCION_PLANO_2D",
-            "plane3d": "FUNCION_PLANO_3D",
-            "vector2d": "FUNCION_VECTOR_2D",
-            "vector3d": "FUNCION_VECTOR_3D",
-            "text": "FUNCION_TEXTO",
-            "now": "FUNCION_NOW",
-            "lost": "FUNCION_LOST",
-            "put": "FUNCION_PUT",
-            "pri": "FUNCION_PRI",
-            "eva": "FUNCION_EVA",
-            "rem": "FUNCION_REM",
-            "fact": "FUNCION_FACT",
-            # Funciones matemáticas
-            "sin": "FUNCION_MATH",
-            "cos": "FUNCION_MATH",
-            "tan": "FUNCION_MATH",
-            "exp": "FUNCION_MATH",
-            "log": "FUNCION_MATH",
-            "ln": "FUNCION_MATH",
-            "sqrt": "FUNCION_MATH",
-            "abs": "FUNCION_MATH",
-            "arctan2": "FUNCION_MATH",
-            "arcsin": "FUNCION_MATH",
-            "arccos": "FUNCION_MATH",
-            "sinh": "FUNCION_MATH",
-            "cosh": "FUNCION_MATH",
-            "pi": "CONSTANTE_MATH",
-            "e": "CONSTANTE_MATH"
-        }
-
-        # Símbolos y operadores
-        self.SIMBOLOS = {
-            '(': 'PAR_IZQ',
-            ')': 'PAR_DER',
-            '{': 'LLAVE_IZQ',
-            '}': 'LLAVE_DER',
-            '[': 'CORCH_IZQ',
-            ']': 'CORCH_DER',
-            ',': 'COMA',
-            ';': 'PUNTO_COMA',
-            ':': 'DOSPUNTOS',
-            '=': 'ASIGNACION',
-            '+': 'MAS',
-            '-': 'MENOS',
-            '*': 'MULT',
-            '/': 'DIV',
-            '%': 'MOD',
-            '^': 'POTENCIA',
-            '<': 'MENOR',
-            '>': 'MAYOR',
-            '==': 'IGUAL',
-            '!=': 'DIFERENTE',
-            '>=': 'MAYORIGUAL',
-            '<=': 'MENORIGUAL',
-            '**': 'POTENCIA',
-            '`': 'BACKTICK',
-            '++': 'INCREMENTO',
-            '--': 'DECREMENTO',
-            '+=': 'MAS_IGUAL',
-            '-=': 'MENOS_IGUAL'
-        }
+        self.PALABRAS_CLAVE = PALABRAS_CLAVE
+        self.SIMBOLOS = SIMBOLOS
 
     def tokenizar(self, codigo_fuente):
+        """Retorna tokens (lexema, tipo, línea, columna) y errores léxicos"""
         tokens = []
         errores = []
+        agregar = tokens.append
+        contar_saltos = codigo_fuente.count
+        ultimo_salto = codigo_fuente.rfind
 
-        # Eliminar comentarios
-        codigo_fuente = re.sub(r'//.*', '', codigo_fuente)
-        codigo_fuente = re.sub(r'/\*.*?\*/', '', codigo_fuente, flags=re.S)
-
-        # Patrón mejorado que captura:
-        # - Expresiones entre //...//
-        # - Números negativos: -123, -45.67
-        # - Operadores dobles: ==, !=, <=, >=, **, ++, --, +=, -=
-        # - Palabras: identificadores y palabras clave
-        # - Cadenas entre comillas
-        # - Símbolos individuales incluyendo `
-        patron = r'(//[^/]+//|\'[^\']*\'|"[^"]*"|-?\d+\.?\d*|==|!=|<=|>=|\*\*|\+\+|--|\+=|-=|\b\w+\b|[+\-*/%=;:(),{}\[\]<>^`])'
-        
-        partes = re.findall(patron, codigo_fuente)
-
-        for lexema in partes:
-            lexema_stripped = lexema.strip()
-            if not lexema_stripped:
-                continue
+        linea = 1
+        inicio_linea = 0
+        anterior = 0  # Posición hasta la que ya se contaron los saltos de línea
 
-            # Expresiones matemáticas entre //...//
-            if lexema_stripped.startswith('//') and lexema_stripped.endswith('//'):
-                tokens.append((lexema_stripped, "EXPRESION_MATH"))
+        for match in _ESCANER.finditer(codigo_fuente):
+            clase = match.lastgroup
+            if clase in _DESCARTAR:
                 continue
 
-            # Cadenas entre comillas
-            if (lexema_stripped.startswith('"') and lexema_stripped.endswith('"')) or \
-               (lexema_stripped.startswith("'") and lexema_stripped.endswith("'")):
-                tokens.append((lexema_stripped, "CADENA"))
-                continue
+            inicio = match.start(clase)
+            saltos = contar_saltos("\n", anterior, inicio)
+            if saltos:
+                linea += saltos
+                inicio_linea = ultimo_salto("\n", anterior, inicio) + 1
+            anterior = inicio
+            lexema = match.group(clase)
+            columna = inicio - inicio_linea + 1
 
-            # Palabra clave (case-insensitive para funciones)
-            lexema_lower = lexema_stripped.lower()
-            if lexema_lower in self.PALABRAS_CLAVE:
-                tokens.append((lexema_stripped, self.PALABRAS_CLAVE[lexema_lower]))
-                continue
+            if clase == "PALABRA":
+                # Palabra clave (case-insensitive para funciones) o identificador
+                agregar((lexema, PALABRAS_CLAVE.get(lexema.lower(), "IDENTIFICADOR"), linea, columna))
+            elif clase == "OPERADOR":
+                agregar((lexema, SIMBOLOS[lexema], linea, columna))
+            elif clase == "DESCONOCIDO":
+                # Si no coincide con nada, es desconocido
+                errores.append(f"Token desconocido: '{lexema}' (línea {linea}, columna {columna})")
+                agregar((lexema, "DESCONOCIDO", linea, columna))
+            else:
+                agregar((lexema, clase, linea, columna))
 
-            # Operadores de dos caracteres
-            if lexema_stripped in ['==', '!=', '<=', '>=', '**', '++', '--', '+=', '-=']:
-                tokens.append((lexema_stripped, self.SIMBOLOS[lexema_stripped]))
-                continue
+        return {
+            "tokens": tokens,
+            "errores": errores
+        }
 
-            # Símbolos de un carácter
-            if lexema_stripped in self.SIMBOLOS:
-                tokens.append((lexema_stripped, self.SIMBOLOS[lexema_stripped]))
-                continue
+    def limite_instruccion(self, codigo_fuente, inicio=0):
+        """Retorna la posición donde termina la instrucción de nivel superior
+        que empieza en `inicio`: tras un ';' fuera de bloques o tras la '}'
+        que cierra un bloque no seguido de else/elif."""
+        profundidad = 0
+        fin_bloque = None
 
-            # Números (incluyendo negativos y decimales)
-            if re.match(r'^-?\d+\.?\d*$', lexema_stripped):
-                tokens.append((lexema_stripped, "NUMERO"))
+        for match in _ESCANER.finditer(codigo_fuente, inicio):
+            clase = match.lastgroup
+            if clase in _DESCARTAR:
                 continue
 
-            # Identificadores
-            if re.match(r'^[a-zA-Z_][a-zA-Z0-9_]*$', lexema_stripped):
-                tokens.append((lexema_stripped, "IDENTIFICADOR"))
-                continue
+            lexema = match.group(clase)
+            if fin_bloque is not None:
+                if clase == "PALABRA" and lexema.lower() in ("else", "elif"):
+                    fin_bloque = None
+                else:
+                    return fin_bloque
 
-            # Si no coincide con nada, es desconocido
-            errores.append(f"Token desconocido: '{lexema_stripped}'")
-            tokens.append((lexema_stripped, "DESCONOCIDO"))
+            if clase == "OPERADOR":
+                if lexema == "{":
+                    profundidad += 1
+                elif lexema == "}":
+                    profundidad = max(profundidad - 1, 0)
+                    if profundidad == 0:
+                        fin_bloque = match.end()
+                elif lexema == ";" and profundidad == 0:
+                    return match.end()
 
-        return {
-            "tokens": tokens,
-            "errores": errores
-        }
\ No newline at end of file
+        return fin_bloque if fin_bloque is not None else len(codigo_fuente)
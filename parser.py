@@ -1,10 +1,49 @@
 from lexer import Lexer
+from ast_nodes import (
+    Programa, Expresion, Declaracion, Asignacion, Incremento, Imprimir,
+    Entrada, Condicional, Mientras, LlamadaGrafica, Ventana, Evaluacion
+)
+
+TIPOS_DECLARACION = ["TIPO_ENTERO", "TIPO_DECIMAL", "TIPO_ECUACION", "TIPO_CADENA",
+                     "TIPO_POSITIVO", "TIPO_BINARIO", "TIPO_CHAIN"]
+
+FUNCIONES_GRAFICAS = ["FUNCION_DIBUJO_2D", "FUNCION_DIBUJO_3D", "FUNCION_PLANO_2D",
+                      "FUNCION_PLANO_3D", "FUNCION_VECTOR_2D", "FUNCION_VECTOR_3D",
+                      "FUNCION_TEXTO", "FUNCION_MOVE", "FUNCION_NOW", "FUNCION_LOST",
+                      "FUNCION_CONFIG"]
+
+FUNCIONES_EXPRESION = ["FUNCION_REM", "FUNCION_EVA", "FUNCION_FACT", "FUNCION_MATH"]
+
+# Tokens que inician una instrucción: una expresión sin ';' termina al encontrarlos
+OPERADORES_BINARIOS = ["MAS", "MENOS", "MULT", "DIV", "ASIGNACION", "POTENCIA"]
+
+FUNCIONES_CON_PARENTESIS = ["FUNCION_PRI", "FUNCION_PUT", "FUNCION_DIBUJO_2D", "FUNCION_DIBUJO_3D"]
+
+CIERRES = {"PAR_DER": "PAR_IZQ", "LLAVE_DER": "LLAVE_IZQ", "CORCH_DER": "CORCH_IZQ"}
+
+MENSAJES_BALANCE = {
+    "PAR_IZQ": ("❌ Falta cerrar paréntesis ')' - Se abrieron más de los que se cerraron",
+                "❌ Paréntesis ')' de más - Se cerraron más de los que se abrieron"),
+    "LLAVE_IZQ": ("❌ Falta cerrar llave '}' - Se abrieron más de las que se cerraron",
+                  "❌ Llave '}' de más - Se cerraron más de las que se abrieron"),
+    "CORCH_IZQ": ("❌ Falta cerrar corchete ']'",
+                  "❌ Corchete ']' de más"),
+}
+
+INICIO_INSTRUCCION = set(TIPOS_DECLARACION) | set(FUNCIONES_GRAFICAS) | {
+    "FUNCION_PRI", "FUNCION_PUT", "CONDICIONAL_IF", "CONDICIONAL_ELIF",
+    "CONDICIONAL_ELSE", "BUCLE_WHILE", "VENTANA_2D", "VENTANA_3D", "FUNCION_DISPLAY"
+}
 
 class Parser:
-    def __init__(self, tokens):
+    def __init__(self, tokens, programa_completo=True):
         self.tokens = tokens
+        # False al analizar una sola instrucción (análisis incremental):
+        # se omiten las verificaciones que solo tienen sentido sobre todo el programa
+        self.programa_completo = programa_completo
         self.pos = 0
         self.errores = []
+        self.diagnosticos = []  # Errores con su línea y columna
         self.arbol = []
 
     def actual(self):
@@ -12,11 +51,16 @@ class Parser:
             return self.tokens[self.pos]
         return ("EOF", "EOF")
 
+    def siguiente(self):
+        if self.pos + 1 < len(self.tokens):
+            return self.tokens[self.pos + 1]
+        return ("EOF", "EOF")
+
     def avanzar(self):
         self.pos += 1
 
     def coincidir(self, tipo_esperado):
-        lexema, tipo = self.actual()
+        tipo = self.actual()[1]
         if tipo == tipo_esperado:
             self.avanzar()
             return True
@@ -25,302 +69,323 @@ class Parser:
             return False
 
     def analizar(self):
-        """Análisis con detección mejorada de errores"""
+        """Análisis con detección mejorada de errores; construye el AST"""
         
         # Verificar errores comunes antes de parsear
         self.verificar_errores_comunes()
         
-        # Si hay funciones gráficas simples, validar básicamente
-        tokens_str = ' '.join([t[0] for t in self.tokens])
-        
-        if 'draw2d' in tokens_str or 'draw3d' in tokens_str:
-            # Modo permisivo para gráficas
-            self.arbol.append("Código con funciones gráficas detectado")
-            return {
-                "estado": "correcto ✅",
-                "errores": self.errores,
-                "arbol": self.arbol
-            }
-        
-        # Análisis normal para código secuencial
+        programa = Programa()
         while self.actual()[1] != "EOF":
-            if not self.instruccion():
+            nodo = self.instruccion()
+            if nodo is None:
                 # Avanzar sin error fatal
                 self.avanzar()
+            else:
+                programa.cuerpo.append(nodo)
 
         return {
             "estado": "correcto ✅" if len(self.errores) == 0 else "con errores ❌",
             "errores": self.errores,
-            "arbol": self.arbol
+            "diagnosticos": self.diagnosticos,
+            "arbol": self.arbol,
+            "ast": programa
         }
     
     def verificar_errores_comunes(self):
-        """Detecta errores comunes antes del parsing"""
-        codigo_completo = ' '.join([t[0] for t in self.tokens])
-        
-        # 1. Detectar punto y coma duplicado
-        for i in range(len(self.tokens) - 1):
-            if self.tokens[i][1] == "PUNTO_COMA" and self.tokens[i+1][1] == "PUNTO_COMA":
-                self.errores.append("⚠️ Punto y coma duplicado en la línea")
-        
-        # 2. Verificar balance de paréntesis
-        parentesis_abiertos = sum(1 for t in self.tokens if t[1] == "PAR_IZQ")
-        parentesis_cerrados = sum(1 for t in self.tokens if t[1] == "PAR_DER")
-        if parentesis_abiertos > parentesis_cerrados:
-            self.errores.append("❌ Falta cerrar paréntesis ')' - Se abrieron más de los que se cerraron")
-        elif parentesis_cerrados > parentesis_abiertos:
-            self.errores.append("❌ Paréntesis ')' de más - Se cerraron más de los que se abrieron")
-        
-        # 3. Verificar balance de llaves
-        llaves_abiertas = sum(1 for t in self.tokens if t[1] == "LLAVE_IZQ")
-        llaves_cerradas = sum(1 for t in self.tokens if t[1] == "LLAVE_DER")
-        if llaves_abiertas > llaves_cerradas:
-            self.errores.append("❌ Falta cerrar llave '}' - Se abrieron más de las que se cerraron")
-        elif llaves_cerradas > llaves_abiertas:
-            self.errores.append("❌ Llave '}' de más - Se cerraron más de las que se abrieron")
-        
-        # 4. Verificar balance de corchetes
-        corchetes_abiertos = sum(1 for t in self.tokens if t[1] == "CORCH_IZQ")
-        corchetes_cerrados = sum(1 for t in self.tokens if t[1] == "CORCH_DER")
-        if corchetes_abiertos > corchetes_cerrados:
-            self.errores.append("❌ Falta cerrar corchete ']'")
-        elif corchetes_cerrados > corchetes_abiertos:
-            self.errores.append("❌ Corchete ']' de más")
+        """Detecta errores comunes antes del parsing en una sola pasada"""
+        # Balance de (), {} y []: aperturas pendientes y cierres sobrantes
+        abiertos = {"PAR_IZQ": [], "LLAVE_IZQ": [], "CORCH_IZQ": []}
+        sobrantes = {"PAR_IZQ": [], "LLAVE_IZQ": [], "CORCH_IZQ": []}
+        punto_coma_count = 0
+        tiene_codigo = False
+        anterior = None
         
-        # 5. Detectar operadores sueltos
-        operadores = ["MAS", "MENOS", "MULT", "DIV", "ASIGNACION", "POTENCIA"]
-        for i in range(len(self.tokens) - 1):
-            if self.tokens[i][1] in operadores and self.tokens[i+1][1] == "PUNTO_COMA":
-                self.errores.append(f"❌ Operador '{self.tokens[i][0]}' sin operando - Falta expresión después del operador")
-        
-        # 6. Detectar punto y coma antes de llave de cierre
-        for i in range(len(self.tokens) - 1):
-            if self.tokens[i][1] == "PUNTO_COMA" and self.tokens[i+1][1] == "LLAVE_DER":
-                # Esto es válido, no es error
-                pass
-        
-        # 7. Detectar declaraciones incompletas
-        for i in range(len(self.tokens) - 2):
-            if self.tokens[i][1] in ["TIPO_ENTERO", "TIPO_DECIMAL", "TIPO_CADENA", "TIPO_ECUACION"]:
-                if self.tokens[i+1][1] == "PUNTO_COMA":
-                    self.errores.append(f"❌ Declaración incompleta: falta nombre de variable después de '{self.tokens[i][0]}'")
-        
-        # 8. Detectar asignación sin valor
-        for i in range(len(self.tokens) - 1):
-            if self.tokens[i][1] == "ASIGNACION" and self.tokens[i+1][1] == "PUNTO_COMA":
-                self.errores.append("❌ Asignación sin valor: falta expresión después de '='")
-        
-        # 9. Detectar comas sueltas
-        for i in range(len(self.tokens)):
-            if self.tokens[i][1] == "COMA":
-                # Verificar que no esté al inicio o al final de una expresión
-                if i == 0 or i == len(self.tokens) - 1:
-                    self.errores.append("❌ Coma mal ubicada")
-                elif self.tokens[i+1][1] in ["PUNTO_COMA", "PAR_DER"]:
-                    self.errores.append("❌ Coma seguida de cierre - Falta argumento")
+        for token in self.tokens:
+            tipo = token[1]
+            
+            if anterior is not None:
+                tipo_anterior = anterior[1]
+                
+                if tipo == "PUNTO_COMA":
+                    # 1. Detectar punto y coma duplicado
+                    if tipo_anterior == "PUNTO_COMA":
+                        linea = token[2] if len(token) > 2 else "?"
+                        self.reportar(f"⚠️ Punto y coma duplicado en la línea {linea}", token, con_posicion=False)
+                    # 5. Detectar operadores sueltos
+                    elif tipo_anterior in OPERADORES_BINARIOS:
+                        self.reportar(f"❌ Operador '{anterior[0]}' sin operando - Falta expresión después del operador", anterior)
+                    # 7. Detectar declaraciones incompletas
+                    elif tipo_anterior in ["TIPO_ENTERO", "TIPO_DECIMAL", "TIPO_CADENA", "TIPO_ECUACION"]:
+                        self.reportar(f"❌ Declaración incompleta: falta nombre de variable después de '{anterior[0]}'", anterior)
+                    # 8. Detectar asignación sin valor
+                    if tipo_anterior == "ASIGNACION":
+                        self.reportar("❌ Asignación sin valor: falta expresión después de '='", anterior)
+                
+                # 9. Detectar comas seguidas de cierre
+                if tipo_anterior == "COMA" and tipo in ["PUNTO_COMA", "PAR_DER"] and anterior is not self.tokens[0]:
+                    self.reportar("❌ Coma seguida de cierre - Falta argumento", anterior)
+                
+                # 10 y 11. Palabras clave y funciones que requieren paréntesis
+                if tipo != "PAR_IZQ":
+                    self.verificar_parentesis_requerido(anterior)
+            
+            # 2, 3 y 4. Balance de paréntesis, llaves y corchetes
+            if tipo in abiertos:
+                abiertos[tipo].append(token)
+            elif tipo in CIERRES:
+                apertura = CIERRES[tipo]
+                if abiertos[apertura]:
+                    abiertos[apertura].pop()
+                else:
+                    sobrantes[apertura].append(token)
+            elif tipo == "PUNTO_COMA":
+                punto_coma_count += 1
+            elif tipo in ["IDENTIFICADOR", "NUMERO"]:
+                tiene_codigo = True
+            
+            anterior = token
         
-        # 10. Detectar palabras clave mal usadas
-        for i in range(len(self.tokens)):
-            if self.tokens[i][1] in ["CONDICIONAL_IF", "BUCLE_WHILE"]:
-                if i + 1 >= len(self.tokens) or self.tokens[i+1][1] != "PAR_IZQ":
-                    self.errores.append(f"❌ '{self.tokens[i][0]}' debe ir seguido de paréntesis '('")
+        if self.tokens:
+            # 9. Comas al inicio o al final
+            if self.tokens[0][1] == "COMA":
+                self.reportar("❌ Coma mal ubicada", self.tokens[0])
+            if len(self.tokens) > 1 and anterior[1] == "COMA":
+                self.reportar("❌ Coma mal ubicada", anterior)
+            # 10 y 11. El último token no puede ir seguido de '('
+            self.verificar_parentesis_requerido(anterior)
         
-        # 11. Detectar funciones sin paréntesis
-        funciones = ["FUNCION_PRI", "FUNCION_PUT", "FUNCION_DIBUJO_2D", "FUNCION_DIBUJO_3D"]
-        for i in range(len(self.tokens)):
-            if self.tokens[i][1] in funciones:
-                if i + 1 >= len(self.tokens) or self.tokens[i+1][1] != "PAR_IZQ":
-                    self.errores.append(f"❌ Función '{self.tokens[i][0]}' requiere paréntesis '()'")
+        for apertura, (falta, sobra) in MENSAJES_BALANCE.items():
+            diferencia = len(abiertos[apertura]) - len(sobrantes[apertura])
+            if diferencia > 0:
+                self.reportar(falta, abiertos[apertura][-1])
+            elif diferencia < 0:
+                self.reportar(sobra, sobrantes[apertura][-1])
         
         # 12. Detectar múltiples errores de punto y coma
-        punto_coma_count = sum(1 for t in self.tokens if t[1] == "PUNTO_COMA")
-        if punto_coma_count == 0 and len(self.tokens) > 3:
+        if self.programa_completo and punto_coma_count == 0 and len(self.tokens) > 3:
             # Solo advertir si hay código significativo
-            tiene_codigo = any(t[1] in ["IDENTIFICADOR", "NUMERO"] for t in self.tokens)
-            if tiene_codigo and 'draw' not in codigo_completo:
-                self.errores.append("⚠️ Advertencia: No se encontraron punto y coma ';' - Las instrucciones deben terminar con ';'")
+            if tiene_codigo and not any('draw' in t[0] for t in self.tokens):
+                self.reportar("⚠️ Advertencia: No se encontraron punto y coma ';' - Las instrucciones deben terminar con ';'", None)
+
+    def verificar_parentesis_requerido(self, token):
+        """Reporta if/while y funciones que no van seguidos de '('"""
+        if token[1] in ["CONDICIONAL_IF", "BUCLE_WHILE"]:
+            self.reportar(f"❌ '{token[0]}' debe ir seguido de paréntesis '('", token)
+        elif token[1] in FUNCIONES_CON_PARENTESIS:
+            self.reportar(f"❌ Función '{token[0]}' requiere paréntesis '()'", token)
+
+    def reportar(self, mensaje, token, con_posicion=True):
+        """Registra un error y el lugar (línea, columna) donde ocurrió"""
+        linea = columna = None
+        texto = mensaje
+        if token is not None and len(token) > 3:
+            linea, columna = token[2], token[3]
+            if con_posicion:
+                texto = f"{mensaje} (línea {linea}, columna {columna})"
+        self.errores.append(texto)
+        self.diagnosticos.append({"mensaje": mensaje, "linea": linea, "columna": columna})
 
     def instruccion(self):
-        lexema, tipo = self.actual()
+        """Analiza una instrucción y retorna su nodo (None si no se reconoce)"""
+        lexema, tipo = self.actual()[0], self.actual()[1]
 
         # Declaraciones de tipo
-        if tipo in ["TIPO_ENTERO", "TIPO_DECIMAL", "TIPO_ECUACION", "TIPO_CADENA"]:
+        if tipo in TIPOS_DECLARACION:
             self.avanzar()
-            self.coincidir("IDENTIFICADOR")
+            nombre = None
+            if self.actual()[1] == "IDENTIFICADOR":
+                nombre = self.actual()[0]
+                self.avanzar()
             
+            valor = None
             if self.actual()[1] == "ASIGNACION":
                 self.avanzar()
-                self.expresion()
+                valor = self.expresion()
             
             self.coincidir("PUNTO_COMA")
             self.arbol.append(f"Declaración {lexema}")
-            return True
+            return Declaracion(lexema.lower(), nombre, valor)
 
         # Asignación
         if tipo == "IDENTIFICADOR":
-            self.avanzar()
-            if self.actual()[1] in ["ASIGNACION", "MAS_IGUAL", "MENOS_IGUAL"]:
+            operador = self.siguiente()
+            if operador[1] in ["ASIGNACION", "MAS_IGUAL", "MENOS_IGUAL"]:
                 self.avanzar()
-                self.expresion()
+                self.avanzar()
+                valor = self.expresion()
                 self.coincidir("PUNTO_COMA")
                 self.arbol.append("Asignación")
-                return True
-            elif self.actual()[1] in ["INCREMENTO", "DECREMENTO"]:
+                return Asignacion(lexema, operador[0], valor)
+            elif operador[1] in ["INCREMENTO", "DECREMENTO"]:
+                self.avanzar()
                 self.avanzar()
                 self.coincidir("PUNTO_COMA")
                 self.arbol.append("Incremento")
-                return True
+                return Incremento(lexema, operador[0])
+            return None
 
         # pri(...)
         if tipo == "FUNCION_PRI":
             self.avanzar()
-            self.coincidir("PAR_IZQ")
-            self.expresion()
-            self.coincidir("PAR_DER")
+            argumento = self.entre_parentesis()
             self.coincidir("PUNTO_COMA")
             self.arbol.append("Impresión")
-            return True
+            return Imprimir(argumento)
 
         # put(...)
         if tipo == "FUNCION_PUT":
             self.avanzar()
-            self.coincidir("PAR_IZQ")
-            self.expresion()
-            self.coincidir("PAR_DER")
+            argumento = self.entre_parentesis()
             self.coincidir("PUNTO_COMA")
             self.arbol.append("Entrada")
-            return True
+            nombre = None
+            if argumento is not None and argumento.es_simple("IDENTIFICADOR"):
+                nombre = argumento.tokens[0][0]
+            return Entrada(nombre)
 
         # while
         if tipo == "BUCLE_WHILE":
             self.avanzar()
-            self.coincidir("PAR_IZQ")
-            self.expresion()
-            self.coincidir("PAR_DER")
-            self.coincidir("LLAVE_IZQ")
-            while self.actual()[1] not in ["LLAVE_DER", "EOF"]:
-                self.instruccion()
-            self.coincidir("LLAVE_DER")
+            condicion = self.entre_parentesis()
+            cuerpo = self.bloque()
             self.arbol.append("Bucle while")
-            return True
+            return Mientras(condicion, cuerpo)
 
-        # if / else if / else
+        # if / else if / elif / else
         if tipo == "CONDICIONAL_IF":
             self.avanzar()
-            self.coincidir("PAR_IZQ")
-            self.expresion()
-            self.coincidir("PAR_DER")
-            self.coincidir("LLAVE_IZQ")
-            while self.actual()[1] not in ["LLAVE_DER", "EOF"]:
-                self.instruccion()
-            self.coincidir("LLAVE_DER")
+            nodo = Condicional()
+            condicion = self.entre_parentesis()
+            nodo.ramas.append((condicion, self.bloque()))
             
             # Verificar else if / elif
-            while self.actual()[1] in ["CONDICIONAL_ELIF"] or \
-                  (self.actual()[1] == "CONDICIONAL_ELSE" and 
-                   self.pos + 1 < len(self.tokens) and 
-                   self.tokens[self.pos + 1][1] == "CONDICIONAL_IF"):
+            while self.actual()[1] == "CONDICIONAL_ELIF" or \
+                  (self.actual()[1] == "CONDICIONAL_ELSE" and
+                   self.siguiente()[1] == "CONDICIONAL_IF"):
                 
                 if self.actual()[1] == "CONDICIONAL_ELSE":
                     self.avanzar()  # else
                 self.avanzar()  # elif o if
-                self.coincidir("PAR_IZQ")
-                self.expresion()
-                self.coincidir("PAR_DER")
-                self.coincidir("LLAVE_IZQ")
-                while self.actual()[1] not in ["LLAVE_DER", "EOF"]:
-                    self.instruccion()
-                self.coincidir("LLAVE_DER")
+                condicion = self.entre_parentesis()
+                nodo.ramas.append((condicion, self.bloque()))
             
             # Verificar else
             if self.actual()[1] == "CONDICIONAL_ELSE":
                 self.avanzar()
-                self.coincidir("LLAVE_IZQ")
-                while self.actual()[1] not in ["LLAVE_DER", "EOF"]:
-                    self.instruccion()
-                self.coincidir("LLAVE_DER")
+                nodo.sino = self.bloque()
             
             self.arbol.append("Condicional if/elif/else")
-            return True
+            return nodo
 
         # Funciones gráficas
-        if tipo in ["FUNCION_DIBUJO_2D", "FUNCION_DIBUJO_3D", "FUNCION_PLANO_2D", 
-                    "FUNCION_TEXTO", "FUNCION_NOW", "FUNCION_DISPLAY"]:
+        if tipo in FUNCIONES_GRAFICAS:
             self.avanzar()
-            self.coincidir("PAR_IZQ")
-            # Consumir todo hasta cerrar paréntesis
-            depth = 1
-            while depth > 0 and self.actual()[1] != "EOF":
-                if self.actual()[1] == "PAR_IZQ":
-                    depth += 1
-                elif self.actual()[1] == "PAR_DER":
-                    depth -= 1
-                self.avanzar()
+            argumentos = self.argumentos()
             self.coincidir("PUNTO_COMA")
             self.arbol.append(f"Función {lexema}")
-            return True
+            return LlamadaGrafica(lexema.lower(), tipo, argumentos)
 
-        # win2d/win3d
-        if tipo in ["VENTANA_2D", "VENTANA_3D"]:
+        # win2d/win3d/display
+        if tipo in ["VENTANA_2D", "VENTANA_3D", "FUNCION_DISPLAY"]:
             self.avanzar()
-            self.coincidir("IDENTIFICADOR")
-            self.coincidir("PAR_IZQ")
-            # Consumir parámetros
-            depth = 1
-            while depth > 0 and self.actual()[1] != "EOF":
-                if self.actual()[1] == "PAR_IZQ":
-                    depth += 1
-                elif self.actual()[1] == "PAR_DER":
-                    depth -= 1
+            nombre = None
+            if self.actual()[1] == "IDENTIFICADOR":
+                nombre = self.actual()[0]
                 self.avanzar()
-            self.coincidir("LLAVE_IZQ")
-            while self.actual()[1] not in ["LLAVE_DER", "EOF"]:
-                self.instruccion()
-            self.coincidir("LLAVE_DER")
+            argumentos = self.argumentos()
+            cuerpo = self.bloque()
+            self.coincidir("PUNTO_COMA")
             self.arbol.append(f"Función {lexema}")
-            return True
+            return Ventana(lexema.lower(), nombre, argumentos, cuerpo)
+
+        # Funciones usadas como instrucción: fact(5);
+        if tipo in FUNCIONES_EXPRESION:
+            expresion = self.expresion()
+            self.coincidir("PUNTO_COMA")
+            return Evaluacion(expresion)
 
-        return False
+        return None
+
+    def bloque(self):
+        """Analiza '{ instrucciones }' y retorna la lista de nodos"""
+        cuerpo = []
+        if not self.coincidir("LLAVE_IZQ"):
+            return cuerpo
+        while self.actual()[1] not in ["LLAVE_DER", "EOF"]:
+            nodo = self.instruccion()
+            if nodo is None:
+                self.avanzar()
+            else:
+                cuerpo.append(nodo)
+        self.coincidir("LLAVE_DER")
+        return cuerpo
 
     def expresion(self):
-        """Expresión permisiva"""
-        lexema, tipo = self.actual()
-        
-        # Aceptar casi cualquier cosa como expresión
-        if tipo in ["NUMERO", "IDENTIFICADOR", "CADENA", "EXPRESION_MATH",
-                    "BOOLEANO_TRUE", "BOOLEANO_FALSE"]:
+        """Expresión permisiva: consume tokens hasta ';', '}' o el inicio de otra instrucción"""
+        inicio = self.pos
+        depth = 0
+        while self.actual()[1] != "EOF":
+            tipo = self.actual()[1]
+            if depth == 0 and (tipo in ["PUNTO_COMA", "LLAVE_IZQ", "LLAVE_DER"] or
+                               (tipo in INICIO_INSTRUCCION and self.pos > inicio)):
+                break
+            if tipo in ["PAR_IZQ", "CORCH_IZQ"]:
+                depth += 1
+            elif tipo in ["PAR_DER", "CORCH_DER"]:
+                if depth == 0:
+                    break
+                depth -= 1
             self.avanzar()
-            
-            # Operadores
-            while self.actual()[1] in [
-                "MAS", "MENOS", "MULT", "DIV", "POTENCIA", "MOD",
-                "MENOR", "MAYOR", "IGUAL", "DIFERENTE", "MENORIGUAL", "MAYORIGUAL"
-            ]:
-                self.avanzar()
-                if self.actual()[1] in ["NUMERO", "IDENTIFICADOR", "EXPRESION_MATH"]:
-                    self.avanzar()
-            
-            return True
-        
-        # Paréntesis
-        if tipo == "PAR_IZQ":
+        if self.pos == inicio:
+            return None
+        return Expresion(list(self.tokens[inicio:self.pos]))
+
+    def argumentos(self):
+        """Analiza '(a, b, ...)' y retorna la lista de expresiones"""
+        argumentos = []
+        if not self.coincidir("PAR_IZQ"):
+            return argumentos
+        inicio = self.pos
+        depth = 0
+        while self.actual()[1] != "EOF":
+            tipo = self.actual()[1]
+            if tipo in ["PAR_IZQ", "CORCH_IZQ"]:
+                depth += 1
+            elif tipo in ["PAR_DER", "CORCH_DER"]:
+                if depth == 0:
+                    break
+                depth -= 1
+            elif tipo == "COMA" and depth == 0:
+                if self.pos > inicio:
+                    argumentos.append(Expresion(list(self.tokens[inicio:self.pos])))
+                inicio = self.pos + 1
+            elif depth == 0 and tipo in ["PUNTO_COMA", "LLAVE_IZQ", "LLAVE_DER"]:
+                break
             self.avanzar()
-            self.expresion()
-            self.coincidir("PAR_DER")
-            return True
-        
-        # Funciones
-        if tipo in ["FUNCION_REM", "FUNCION_EVA", "FUNCION_FACT", "FUNCION_MATH"]:
+        if self.pos > inicio:
+            argumentos.append(Expresion(list(self.tokens[inicio:self.pos])))
+        self.coincidir("PAR_DER")
+        return argumentos
+
+    def entre_parentesis(self):
+        """Analiza '( expresión )' y retorna la expresión (o None si está vacía)"""
+        if self.actual()[1] != "PAR_IZQ":
+            # Sin paréntesis (ya reportado en verificar_errores_comunes)
+            return self.expresion()
+        self.avanzar()
+        inicio = self.pos
+        depth = 0
+        while self.actual()[1] != "EOF":
+            tipo = self.actual()[1]
+            if tipo == "PAR_IZQ":
+                depth += 1
+            elif tipo == "PAR_DER":
+                if depth == 0:
+                    break
+                depth -= 1
+            elif depth == 0 and tipo in ["PUNTO_COMA", "LLAVE_IZQ", "LLAVE_DER"]:
+                break
             self.avanzar()
-            if self.actual()[1] == "PAR_IZQ":
-                depth = 1
-                self.avanzar()
-                while depth > 0 and self.actual()[1] != "EOF":
-                    if self.actual()[1] == "PAR_IZQ":
-                        depth += 1
-                    elif self.actual()[1] == "PAR_DER":
-                        depth -= 1
-                    self.avanzar()
-            return True
-        
-        return True  # Permisivo
\ No newline at end of file
+        expresion = Expresion(list(self.tokens[inicio:self.pos])) if self.pos > inicio else None
+        self.coincidir("PAR_DER")
+        return expresion
@@ -0,0 +1,249 @@
+"""
+Renderizador rápido de gráficos 2D
+Dibuja ejes, rejilla, curva, título y leyenda directamente en una imagen de
+Pillow con el tema oscuro de MathView, sin crear figuras de matplotlib.
+Se usa para draw2d simples; lo que no admite lo sigue dibujando matplotlib.
+"""
+
+import importlib.util
+import math
+import os
+from io import BytesIO
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont, features
+
+# Colores del tema (ver rcParams en interpreter.py)
+COLOR_FIGURA = (10, 14, 39)        # figure.facecolor #0a0e27
+COLOR_EJES = (17, 24, 39)          # axes.facecolor #111827
+COLOR_BORDE = (74, 222, 128)       # axes.edgecolor #4ade80
+COLOR_TEXTO = (224, 231, 255)      # text.color #e0e7ff
+COLOR_MARCAS = (148, 163, 184)     # xtick.color #94a3b8
+COLOR_CURVA = (0, 191, 255)        # deepskyblue
+# grid.color #1e293b con alpha 0.3 sobre el fondo de los ejes
+COLOR_REJILLA = tuple(round(0.3 * r + 0.7 * f) for r, f in zip((30, 41, 59), COLOR_EJES))
+
+# Tamaño final (px) y factor de sobremuestreo para suavizar las líneas
+ANCHO, ALTO = 800, 500
+ALTO_MAPA = 600
+ESCALA = 2
+
+def _ruta_fuentes():
+    """Carpeta de fuentes DejaVu que trae matplotlib (sin importarlo)"""
+    spec = importlib.util.find_spec("matplotlib")
+    if spec is None or spec.origin is None:
+        return None
+    ruta = os.path.join(os.path.dirname(spec.origin), "mpl-data", "fonts", "ttf")
+    return ruta if os.path.exists(os.path.join(ruta, "DejaVuSans.ttf")) else None
+
+# Se usa la misma fuente que matplotlib; sin FreeType no hay fuentes escalables
+_RUTA_FUENTES = _ruta_fuentes() if features.check('freetype2') else None
+_fuentes = {}
+
+def fuente(tamano, negrita=False):
+    clave = (tamano, negrita)
+    if clave not in _fuentes:
+        archivo = "DejaVuSans-Bold.ttf" if negrita else "DejaVuSans.ttf"
+        _fuentes[clave] = ImageFont.truetype(os.path.join(_RUTA_FUENTES, archivo), tamano)
+    return _fuentes[clave]
+
+def rango_valido(vmin, vmax):
+    """True si [vmin, vmax] es creciente y de ancho finito (marcas() toma log10 del paso)"""
+    return vmin < vmax and math.isfinite(vmax - vmin)
+
+def admite_2d(x, y, etiqueta):
+    """True si el gráfico se puede dibujar aquí sin perder nada de matplotlib"""
+    if _RUTA_FUENTES is None:
+        return False
+    # Matplotlib interpreta '$...$' como texto matemático
+    if '$' in etiqueta or not etiqueta.isprintable():
+        return False
+    if not isinstance(y, np.ndarray) or y.shape != x.shape or y.dtype.kind not in 'fiub':
+        return False
+    # Rangos invertidos, de ancho cero o que desbordan quedan para matplotlib
+    if not rango_valido(float(x[0]), float(x[-1])):
+        return False
+    finitos = np.isfinite(y)
+    return bool(finitos.any()) and rango_valido(*limites(y[finitos]))
+
+def marcas(vmin, vmax, cantidad=6):
+    """Marcas 'redondas' (1, 2, 2.5, 5 × 10^k) dentro de [vmin, vmax]"""
+    bruto = (vmax - vmin) / cantidad
+    potencia = 10 ** math.floor(math.log10(bruto))
+    for factor in (1, 2, 2.5, 5, 10):
+        paso = factor * potencia
+        if paso >= bruto:
+            break
+    inicio = math.ceil(vmin / paso)
+    fin = math.floor(vmax / paso)
+    decimales = max(0, -math.floor(math.log10(paso) + 1e-9)) + (1 if factor == 2.5 else 0)
+    return [(k * paso, f"{k * paso if k else 0.0:.{decimales}f}".replace("-", "\u2212")) for k in range(inicio, fin + 1)]
+
+def limites(valores):
+    """Rango de datos con el margen de 5% que usa matplotlib"""
+    vmin, vmax = float(np.min(valores)), float(np.max(valores))
+    if vmax - vmin <= 1e-12 * max(1.0, abs(vmin), abs(vmax)):
+        margen = abs(vmin) * 0.05 if vmin else 0.05
+        return vmin - margen, vmax + margen
+    margen = (vmax - vmin) * 0.05
+    return vmin - margen, vmax + margen
+
+class _Ejes:
+    """Área de ejes sobre una imagen sobremuestreada y su transformación a píxeles"""
+
+    def __init__(self, ancho, alto, margen_derecho, xlim, ylim):
+        e = ESCALA
+        self.ancho, self.alto = ancho * e, alto * e
+        self.imagen = Image.new("RGB", (self.ancho, self.alto), COLOR_FIGURA)
+        self.lienzo = ImageDraw.Draw(self.imagen)
+        self.izq, self.der = 70 * e, self.ancho - margen_derecho * e
+        self.arriba, self.abajo = 40 * e, self.alto - 50 * e
+        self.xmin, self.xmax = xlim
+        self.ymin, self.ymax = ylim
+        self.marcas_x, self.marcas_y = marcas(*xlim), marcas(*ylim)
+
+    def a_pixel(self, vx, vy):
+        px = self.izq + (vx - self.xmin) / (self.xmax - self.xmin) * (self.der - self.izq)
+        py = self.abajo - (vy - self.ymin) / (self.ymax - self.ymin) * (self.abajo - self.arriba)
+        return px, py
+
+    def rejilla(self):
+        lienzo = self.lienzo
+        for valor, _ in self.marcas_x:
+            px, _ = self.a_pixel(valor, self.ymin)
+            lienzo.line([(px, self.arriba), (px, self.abajo)], fill=COLOR_REJILLA, width=ESCALA)
+        for valor, _ in self.marcas_y:
+            _, py = self.a_pixel(self.xmin, valor)
+            lienzo.line([(self.izq, py), (self.der, py)], fill=COLOR_REJILLA, width=ESCALA)
+
+    def recortar(self):
+        """Tapa con el fondo de la figura lo que se salió del área de los ejes"""
+        lienzo, ancho, alto = self.lienzo, self.ancho, self.alto
+        lienzo.rectangle([0, 0, ancho, self.arriba - 1], fill=COLOR_FIGURA)
+        lienzo.rectangle([0, self.abajo + 1, ancho, alto], fill=COLOR_FIGURA)
+        lienzo.rectangle([0, self.arriba, self.izq - 1, self.abajo], fill=COLOR_FIGURA)
+        lienzo.rectangle([self.der + 1, self.arriba, ancho, self.abajo], fill=COLOR_FIGURA)
+
+    def marco(self, titulo, etiqueta_x, etiqueta_y):
+        """Borde, marcas, título y etiquetas de los ejes"""
+        e, lienzo = ESCALA, self.lienzo
+        f_titulo, f_etiqueta, f_marca = fuente(14 * e, negrita=True), fuente(12 * e), fuente(10 * e)
+        izq, der, arriba, abajo = self.izq, self.der, self.arriba, self.abajo
+
+        lienzo.rectangle([izq, arriba, der, abajo], outline=COLOR_BORDE, width=e)
+        for valor, texto in self.marcas_x:
+            px, _ = self.a_pixel(valor, self.ymin)
+            lienzo.line([(px, abajo), (px, abajo + 4 * e)], fill=COLOR_MARCAS, width=e)
+            lienzo.text((px, abajo + 6 * e), texto, fill=COLOR_MARCAS, font=f_marca, anchor="ma")
+        for valor, texto in self.marcas_y:
+            _, py = self.a_pixel(self.xmin, valor)
+            lienzo.line([(izq - 4 * e, py), (izq, py)], fill=COLOR_MARCAS, width=e)
+            lienzo.text((izq - 6 * e, py), texto, fill=COLOR_MARCAS, font=f_marca, anchor="rm")
+
+        lienzo.text(((izq + der) / 2, arriba / 2), titulo, fill=COLOR_TEXTO, font=f_titulo, anchor="mm")
+        lienzo.text(((izq + der) / 2, self.alto - 14 * e), etiqueta_x, fill=COLOR_TEXTO, font=f_etiqueta, anchor="mm")
+        lienzo.text((16 * e, (arriba + abajo) / 2), etiqueta_y, fill=COLOR_TEXTO, font=f_etiqueta, anchor="mm")
+
+    def codificar(self, ancho=ANCHO, formato="png", continuo=False):
+        """Reduce la imagen sobremuestreada a `ancho` px (hasta ANCHO * ESCALA) y la codifica"""
+        if ancho == self.ancho // ESCALA:
+            imagen = self.imagen.reduce(ESCALA) if ESCALA > 1 else self.imagen
+        else:
+            ancho = min(ancho, self.ancho)
+            # Filtro de caja, como reduce(): sin halos que sumen colores a las líneas
+            imagen = self.imagen.resize((ancho, round(self.alto * ancho / self.ancho)), Image.BOX)
+        return codificar(imagen, formato, continuo)
+
+def codificar(imagen, formato="png", continuo=False):
+    """Bytes de una imagen RGB en uno de los formatos de interpreter.FORMATOS_IMAGEN.
+
+    Las imágenes de tono continuo (mapas, superficies) van en WebP con
+    pérdida, que las comprime mucho más; las de líneas y texto, sin pérdida.
+    """
+    buf = BytesIO()
+    if formato == "webp":
+        if continuo:
+            imagen.save(buf, format="WEBP", quality=90, method=2)
+        else:
+            imagen.save(buf, format="WEBP", lossless=True, quality=0, method=1)
+    elif formato == "png8":
+        # Paleta de 256 colores: las líneas del tema y la paleta viridis entran enteras
+        paleta = imagen.quantize(256, method=Image.Quantize.FASTOCTREE, dither=Image.Dither.NONE)
+        paleta.save(buf, format="PNG", compress_level=6)
+    else:
+        imagen.save(buf, format="PNG", compress_level=3)
+    return buf.getvalue()
+
+def dibujar_2d(x, y, titulo, etiqueta, ancho=ANCHO, formato="png"):
+    """Dibuja la curva y = f(x) y retorna los bytes de la imagen"""
+    finitos = np.isfinite(y)
+    ejes = _Ejes(ANCHO, ALTO, 20, (float(x[0]), float(x[-1])), limites(y[finitos]))
+    e, lienzo = ESCALA, ejes.lienzo
+    izq, der, arriba, abajo = ejes.izq, ejes.der, ejes.arriba, ejes.abajo
+
+    lienzo.rectangle([izq, arriba, der, abajo], fill=COLOR_EJES)
+    ejes.rejilla()
+
+    # Curva: un trazo por cada tramo de valores finitos
+    px, py = ejes.a_pixel(x, np.where(finitos, y, 0.0))
+    # Evitar coordenadas enormes fuera de la imagen (p. ej. cerca de polos)
+    py = np.clip(py, -ejes.alto, 2 * ejes.alto)
+    cortes = np.flatnonzero(np.diff(finitos.astype(np.int8))) + 1
+    for tramo_x, tramo_y, tramo_finito in zip(np.split(px, cortes), np.split(py, cortes), np.split(finitos, cortes)):
+        if tramo_finito[0] and len(tramo_x) > 1:
+            lienzo.line(list(zip(tramo_x.tolist(), tramo_y.tolist())), fill=COLOR_CURVA, width=2 * e, joint="curve")
+
+    ejes.recortar()
+    ejes.marco(titulo, "x", "y")
+
+    # Leyenda en la esquina superior derecha
+    f_marca = fuente(10 * e)
+    caja = lienzo.textbbox((0, 0), etiqueta, font=f_marca)
+    ancho_leyenda = caja[2] - caja[0] + 44 * e
+    x0, y0 = der - ancho_leyenda - 8 * e, arriba + 8 * e
+    lienzo.rounded_rectangle([x0, y0, der - 8 * e, y0 + 24 * e], radius=3 * e,
+                             fill=COLOR_EJES, outline=COLOR_REJILLA, width=e)
+    lienzo.line([(x0 + 8 * e, y0 + 12 * e), (x0 + 30 * e, y0 + 12 * e)], fill=COLOR_CURVA, width=2 * e)
+    lienzo.text((x0 + 36 * e, y0 + 12 * e), etiqueta, fill=COLOR_TEXTO, font=f_marca, anchor="lm")
+
+    return ejes.codificar(ancho, formato)
+
+def admite_mapa(z, xlim, ylim, titulo):
+    """True si el mapa de calor se puede dibujar aquí"""
+    if _RUTA_FUENTES is None or '$' in titulo or not titulo.isprintable():
+        return False
+    if not (rango_valido(*xlim) and rango_valido(*ylim)):
+        return False
+    return isinstance(z, np.ndarray) and z.ndim == 2 and z.dtype.kind in 'fiub' and bool(np.isfinite(z).any())
+
+def dibujar_mapa(z, xlim, ylim, titulo, lut, ancho=ANCHO, formato="png"):
+    """Mapa de calor de z (fila 0 = ymin) con barra de colores; lut es (256, 3) uint8"""
+    ejes = _Ejes(ANCHO, ALTO_MAPA, 110, xlim, ylim)
+    e, lienzo = ESCALA, ejes.lienzo
+    izq, der, arriba, abajo = ejes.izq, ejes.der, ejes.arriba, ejes.abajo
+
+    finitos = np.isfinite(z)
+    zmin, zmax = float(z[finitos].min()), float(z[finitos].max())
+    escala = 255.0 / (zmax - zmin) if zmax > zmin else 0.0
+    indices = np.clip((np.where(finitos, z, zmin) - zmin) * escala, 0, 255).astype(np.uint8)
+    pixeles = lut[indices]
+    pixeles[~finitos] = COLOR_EJES
+    # La fila 0 es ymin: en la imagen va abajo
+    mapa = Image.fromarray(np.ascontiguousarray(pixeles[::-1]), "RGB")
+    ejes.imagen.paste(mapa.resize((der - izq + 1, abajo - arriba + 1), Image.BILINEAR), (izq, arriba))
+
+    ejes.marco(titulo, "X", "Y")
+
+    # Barra de colores con sus marcas
+    f_marca = fuente(10 * e)
+    x0, x1 = der + 24 * e, der + 40 * e
+    barra = Image.fromarray(np.ascontiguousarray(lut[::-1, None, :].repeat(2, axis=1)), "RGB")
+    ejes.imagen.paste(barra.resize((x1 - x0 + 1, abajo - arriba + 1), Image.BILINEAR), (x0, arriba))
+    lienzo.rectangle([x0, arriba, x1, abajo], outline=COLOR_MARCAS, width=e)
+    if zmax > zmin:
+        for valor, texto in marcas(zmin, zmax):
+            py = abajo - (valor - zmin) / (zmax - zmin) * (abajo - arriba)
+            lienzo.line([(x1, py), (x1 + 4 * e, py)], fill=COLOR_MARCAS, width=e)
+            lienzo.text((x1 + 6 * e, py), texto, fill=COLOR_MARCAS, font=f_marca, anchor="lm")
+
+    return ejes.codificar(ancho, formato, continuo=True)
@@ -0,0 +1,92 @@
+"""
+Pool de procesos de dibujo
+Las figuras de matplotlib se dibujan en procesos aparte que ya importaron
+matplotlib, aplicaron el tema de interpreter.py y armaron la caché de
+fuentes. pyplot no es seguro entre hilos y savefig ocupa la CPU: así los
+workers de peticiones no se bloquean mientras se dibuja.
+
+Cada worker de gunicorn tiene su propio pool y cada proceso del pool carga
+matplotlib (decenas de MB), así que por defecto hay un proceso por worker:
+los dibujos de peticiones distintas corren en paralelo, uno por worker.
+MATHVIEW_RENDERIZADORES fija la cantidad de procesos por worker (0 = dibujar
+en el propio proceso); ver gunicorn.conf.py.
+
+TIEMPO_MAXIMO queda por debajo del timeout de los workers de gunicorn y del
+router de Heroku (30 s): un dibujo colgado termina en un error limpio y no
+en un worker matado a mitad de la respuesta.
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+PROCESOS = int(os.environ.get("MATHVIEW_RENDERIZADORES", 1))
+TIEMPO_MAXIMO = 25  # Segundos por dibujo
+
+_pool = None
+_pid = None
+_lock = threading.Lock()
+# Sin pool, el dibujo en el propio proceso se serializa entre hilos
+lock_pyplot = threading.Lock()
+
+def _preparar():
+    """Inicializador de cada proceso: importa y precalienta matplotlib"""
+    from interpreter import precalentar_matplotlib
+    precalentar_matplotlib()
+
+def _listo():
+    return os.getpid()
+
+def obtener_pool():
+    """Pool del proceso actual (se crea al primer uso); None si está desactivado"""
+    global _pool, _pid
+    if PROCESOS <= 0:
+        return None
+    with _lock:
+        # Tras un fork (p. ej. gunicorn --preload) el pool del padre no sirve
+        if _pool is None or _pid != os.getpid():
+            _pool = ProcessPoolExecutor(
+                max_workers=PROCESOS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_preparar
+            )
+            _pid = os.getpid()
+        return _pool
+
+def _descartar(pool):
+    """Olvida un pool roto (un proceso murió); el próximo dibujo crea otro"""
+    global _pool
+    with _lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def precalentar(esperar=True):
+    """Arranca y prepara todos los procesos ya, en lugar de en el primer dibujo.
+
+    Con esperar=False retorna enseguida y los procesos se preparan en paralelo.
+    """
+    pool = obtener_pool()
+    if pool is None:
+        return
+    futuros = [pool.submit(_listo) for _ in range(PROCESOS)]
+    if esperar:
+        for futuro in futuros:
+            futuro.result(timeout=TIEMPO_MAXIMO)
+
+def renderizar(funcion, *args):
+    """Ejecuta funcion(*args) -> bytes en un proceso de dibujo.
+
+    funcion debe ser una función de módulo (se envía por pickle). Si el pool
+    está desactivado o se rompió, dibuja en el propio proceso.
+    """
+    pool = obtener_pool()
+    if pool is not None:
+        try:
+            return pool.submit(funcion, *args).result(timeout=TIEMPO_MAXIMO)
+        except BrokenProcessPool:
+            _descartar(pool)
+    with lock_pyplot:
+        return funcion(*args)
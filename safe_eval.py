@@ -0,0 +1,320 @@
+"""
+Evaluador seguro de expresiones
+Reemplaza a eval: el AST de la expresión se valida y se traduce una sola vez
+a closures f(variables) -> valor (como compiler.py con las instrucciones).
+Antes de cada operación que puede crecer sin control se estima su costo;
+si pasa de los límites se lanza LimiteExcedido en lugar de dejar al worker
+calculando 9**9**9 o armando una cadena de gigabytes.
+
+Se admiten constantes, nombres, operadores aritméticos, de bits, lógicos y
+de comparación, if en línea, listas, tuplas, índices y llamadas a funciones
+por nombre. Atributos, comprensiones, lambdas, f-strings, diccionarios y
+demás constructos se rechazan al compilar.
+"""
+
+import ast
+import math
+import operator
+import sys
+
+# Bits de un entero: los que caben en las cifras que str() acepta convertir
+# (4300 por defecto: unos 14 000 bits), así todo resultado se puede imprimir.
+# Con el límite de Python desactivado (0) se admiten 65536 bits
+_CIFRAS_MAX = sys.get_int_max_str_digits()
+BITS_MAX = int((_CIFRAS_MAX - 1) * math.log2(10)) if _CIFRAS_MAX else 1 << 16
+# Elementos de una cadena, lista o tupla
+LARGO_MAX = 1 << 20
+
+_LN2 = math.log(2)
+
+class LimiteExcedido(Exception):
+    """Una operación superaría los límites de costo del evaluador"""
+
+def _es_entero(valor):
+    return isinstance(valor, int)
+
+def _es_secuencia(valor):
+    return isinstance(valor, (str, bytes, list, tuple))
+
+def _tamano(secuencia):
+    """Elementos de una secuencia contando los de las listas anidadas.
+
+    Se estima por el primer elemento: [[0] * 1000] * 1000 son 10^6 aunque
+    la lista externa solo tenga 1000 referencias.
+    """
+    tamano = 1
+    while _es_secuencia(secuencia) and not isinstance(secuencia, (str, bytes)) and secuencia:
+        tamano *= len(secuencia)
+        secuencia = secuencia[0]
+    return tamano * (len(secuencia) if isinstance(secuencia, (str, bytes)) else 1)
+
+def _exceder(descripcion):
+    raise LimiteExcedido(f"{descripcion} es demasiado grande para calcularlo")
+
+# ===== OPERADORES CON COSTO =====
+
+def _suma(a, b):
+    if _es_secuencia(a) and _es_secuencia(b) and _tamano(a) + _tamano(b) > LARGO_MAX:
+        _exceder(f"Una secuencia de {_tamano(a) + _tamano(b)} elementos")
+    return a + b
+
+def _producto(a, b):
+    if _es_entero(a) and _es_entero(b):
+        if a.bit_length() + b.bit_length() > BITS_MAX:
+            _exceder("El producto de dos enteros tan grandes")
+    elif _es_secuencia(a) and _es_entero(b) or _es_entero(a) and _es_secuencia(b):
+        secuencia, veces = (a, b) if _es_secuencia(a) else (b, a)
+        if _tamano(secuencia) * veces > LARGO_MAX:
+            _exceder(f"Una secuencia de {_tamano(secuencia) * veces} elementos")
+    return a * b
+
+def _potencia(a, b):
+    if _es_entero(a) and _es_entero(b) and b > 1 and abs(a) > 1:
+        if b > BITS_MAX or b * math.log2(abs(a)) > BITS_MAX:
+            _exceder(f"La potencia con exponente {b}")
+    return a ** b
+
+def _desplazamiento(a, b):
+    if _es_entero(a) and _es_entero(b) and a and a.bit_length() + b > BITS_MAX:
+        _exceder(f"El desplazamiento de {b} bits")
+    return a << b
+
+def _modulo(a, b):
+    # '%d' % n con ancho arbitrario reservaría memoria sin límite
+    if isinstance(a, (str, bytes)):
+        raise TypeError("Formato de cadenas con % no permitido")
+    return a % b
+
+_BINARIOS = {
+    ast.Add: _suma,
+    ast.Sub: operator.sub,
+    ast.Mult: _producto,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: _modulo,
+    ast.Pow: _potencia,
+    ast.LShift: _desplazamiento,
+    ast.RShift: operator.rshift,
+    ast.BitOr: operator.or_,
+    ast.BitXor: operator.xor,
+    ast.BitAnd: operator.and_,
+    ast.MatMult: operator.matmul,
+}
+_UNARIOS = {
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+    ast.Not: operator.not_,
+    ast.Invert: operator.invert,
+}
+_COMPARACIONES = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.Is: operator.is_,
+    ast.IsNot: operator.is_not,
+    ast.In: lambda a, b: a in b,
+    ast.NotIn: lambda a, b: a not in b,
+}
+
+# ===== FUNCIONES CON COSTO =====
+
+def _numero(valor):
+    """float de un escalar real (inf si no cabe), o None (arreglos, cadenas...)"""
+    if isinstance(valor, bool) or getattr(valor, 'ndim', 0) > 0:
+        return None
+    try:
+        return float(valor)
+    except OverflowError:
+        return math.inf
+    except (TypeError, ValueError):
+        return None
+
+def costo_factorial(n, *_):
+    """n! de un escalar: log2(n!) bits"""
+    n = _numero(n)
+    if n is not None and n > 1 and (n > BITS_MAX or math.lgamma(int(n) + 1) / _LN2 > BITS_MAX):
+        _exceder(f"El factorial de {n:g}")
+
+def _costo_perm(n, k=None):
+    """perm(n, k) = n! / (n - k)!"""
+    n, k = _numero(n), _numero(k if k is not None else n)
+    if n is None or k is None or not 0 <= k <= n:
+        return
+    bits = (math.lgamma(n + 1) - math.lgamma(n - k + 1)) / _LN2
+    # Con n enorme la diferencia de lgamma no es confiable (inf - inf)
+    if not bits <= BITS_MAX:
+        _exceder(f"Las permutaciones de {n:g} en {k:g}")
+
+def _costo_comb(n, k):
+    """comb(n, k) = n! / (k! (n - k)!)"""
+    n, k = _numero(n), _numero(k)
+    if n is None or k is None or not 0 <= k <= n:
+        return
+    bits = (math.lgamma(n + 1) - math.lgamma(k + 1) - math.lgamma(n - k + 1)) / _LN2
+    if not bits <= BITS_MAX:
+        _exceder(f"El número combinatorio de {n:g} en {k:g}")
+
+def _costo_productoria(*valores):
+    """prod(lista) y lcm(a, b, ...): a lo sumo la suma de los bits de los enteros"""
+    if len(valores) == 1 and _es_secuencia(valores[0]):
+        valores = valores[0]
+    if sum(v.bit_length() for v in valores if _es_entero(v)) > BITS_MAX:
+        _exceder("El producto de esos enteros")
+
+# Funciones que pueden tardar o reservar sin límite según sus argumentos,
+# por identidad (un alias como f = fact sigue controlado)
+_COSTOS = {}
+
+def limitar(funcion, costo):
+    """Registra costo(*args), que lanza LimiteExcedido si la llamada sería demasiado cara"""
+    _COSTOS[id(funcion)] = costo
+
+limitar(math.factorial, costo_factorial)
+limitar(math.perm, _costo_perm)
+limitar(math.comb, _costo_comb)
+limitar(math.prod, _costo_productoria)
+limitar(math.lcm, _costo_productoria)
+
+# ===== COMPILACIÓN =====
+
+class _Compilador:
+    """Traduce nodos del AST a closures f(variables) -> valor.
+
+    Los nombres se buscan primero en las variables y después en el entorno
+    (como eval con variables locales y entorno global); el entorno se
+    consulta al evaluar, así ve las funciones que se agreguen después
+    (interpreter.cargar_numpy).
+    """
+
+    def __init__(self, entorno):
+        self.entorno = entorno
+        self.nombres = set()
+        self._traductores = {
+            ast.Expression: lambda nodo: self.compilar(nodo.body),
+            ast.Constant: self.constante,
+            ast.Name: self.nombre,
+            ast.BinOp: self.binario,
+            ast.UnaryOp: self.unario,
+            ast.BoolOp: self.logico,
+            ast.Compare: self.comparacion,
+            ast.IfExp: self.condicional,
+            ast.Call: self.llamada,
+            ast.List: self.secuencia,
+            ast.Tuple: self.secuencia,
+            ast.Subscript: self.indice,
+            ast.Slice: self.rebanada,
+        }
+
+    def compilar(self, nodo):
+        traductor = self._traductores.get(type(nodo))
+        if traductor is None:
+            raise ValueError(f"Constructo no permitido: {type(nodo).__name__}")
+        return traductor(nodo)
+
+    def constante(self, nodo):
+        valor = nodo.value
+        return lambda variables: valor
+
+    def nombre(self, nodo):
+        identificador = nodo.id
+        if identificador.startswith('__'):
+            raise ValueError(f"Nombre no permitido: {identificador}")
+        self.nombres.add(identificador)
+        entorno = self.entorno
+        def f(variables):
+            if identificador in variables:
+                return variables[identificador]
+            try:
+                return entorno[identificador]
+            except KeyError:
+                raise NameError(f"name '{identificador}' is not defined") from None
+        return f
+
+    def binario(self, nodo):
+        operacion = _BINARIOS.get(type(nodo.op))
+        if operacion is None:
+            raise ValueError(f"Operador no permitido: {type(nodo.op).__name__}")
+        izquierdo, derecho = self.compilar(nodo.left), self.compilar(nodo.right)
+        return lambda variables: operacion(izquierdo(variables), derecho(variables))
+
+    def unario(self, nodo):
+        operacion = _UNARIOS[type(nodo.op)]
+        operando = self.compilar(nodo.operand)
+        return lambda variables: operacion(operando(variables))
+
+    def logico(self, nodo):
+        operandos = [self.compilar(valor) for valor in nodo.values]
+        es_and = isinstance(nodo.op, ast.And)
+        def f(variables):
+            # Corto circuito: retorna el operando que decide, como and/or
+            for operando in operandos:
+                valor = operando(variables)
+                if bool(valor) != es_and:
+                    return valor
+            return valor
+        return f
+
+    def comparacion(self, nodo):
+        izquierdo = self.compilar(nodo.left)
+        pasos = [(_COMPARACIONES[type(op)], self.compilar(derecho))
+                 for op, derecho in zip(nodo.ops, nodo.comparators)]
+        intermedios, (comparar_ultimo, ultimo) = pasos[:-1], pasos[-1]
+        def f(variables):
+            # a < b < c: cada operando se evalúa una vez y se corta al primer
+            # falso; el último resultado se retorna tal cual (x > 0 con arreglos)
+            actual = izquierdo(variables)
+            for comparar, derecho in intermedios:
+                siguiente = derecho(variables)
+                resultado = comparar(actual, siguiente)
+                if not resultado:
+                    return resultado
+                actual = siguiente
+            return comparar_ultimo(actual, ultimo(variables))
+        return f
+
+    def condicional(self, nodo):
+        prueba, si, sino = self.compilar(nodo.test), self.compilar(nodo.body), self.compilar(nodo.orelse)
+        return lambda variables: si(variables) if prueba(variables) else sino(variables)
+
+    def llamada(self, nodo):
+        if not isinstance(nodo.func, ast.Name):
+            raise ValueError("Llamadas complejas no permitidas")
+        if nodo.keywords or any(isinstance(a, ast.Starred) for a in nodo.args):
+            raise ValueError("Argumentos con nombre o desempaquetados no permitidos")
+        funcion = self.nombre(nodo.func)
+        argumentos = [self.compilar(argumento) for argumento in nodo.args]
+        def f(variables):
+            llamable = funcion(variables)
+            valores = [argumento(variables) for argumento in argumentos]
+            costo = _COSTOS.get(id(llamable))
+            if costo is not None:
+                costo(*valores)
+            return llamable(*valores)
+        return f
+
+    def secuencia(self, nodo):
+        if any(isinstance(e, ast.Starred) for e in nodo.elts):
+            raise ValueError("Desempaquetado no permitido")
+        elementos = [self.compilar(elemento) for elemento in nodo.elts]
+        tipo = list if isinstance(nodo, ast.List) else tuple
+        return lambda variables: tipo([elemento(variables) for elemento in elementos])
+
+    def indice(self, nodo):
+        valor, indice = self.compilar(nodo.value), self.compilar(nodo.slice)
+        return lambda variables: valor(variables)[indice(variables)]
+
+    def rebanada(self, nodo):
+        partes = [self.compilar(p) if p is not None else (lambda variables: None)
+                  for p in (nodo.lower, nodo.upper, nodo.step)]
+        return lambda variables: slice(*(parte(variables) for parte in partes))
+
+def compilar(arbol, entorno):
+    """(f(variables) -> valor, nombres que usa) para un AST de ast.parse(mode='eval').
+
+    Lanza ValueError si la expresión usa un constructo no permitido.
+    """
+    compilador = _Compilador(entorno)
+    return compilador.compilar(arbol), frozenset(compilador.nombres)
@@ -0,0 +1,176 @@
+"""
+Muestreo adaptativo de curvas para draw2d
+Parte de una malla gruesa y subdivide, de forma vectorizada, solo los
+intervalos donde la curva se dobla más de lo que se ve en pantalla o salta
+(p. ej. polos de tan). Las zonas planas quedan con pocos puntos.
+"""
+
+import numpy as np
+
+# Puntos de la malla inicial y máximo total de puntos por curva
+MUESTRAS_INICIALES = 129
+PRESUPUESTO_2D = 3000
+
+# Desplazamiento de cada punto interior de la malla inicial, en fracciones
+# del paso: con una malla exactamente uniforme, cos(2*pi*x) en [0, 128] da
+# el mismo valor en todos los puntos y se vería como una recta (aliasing).
+# Es fijo para que el mismo gráfico salga siempre igual
+_DESPLAZAMIENTOS = np.random.default_rng(13).uniform(-0.3, 0.3, MUESTRAS_INICIALES)
+_DESPLAZAMIENTOS[[0, -1]] = 0.0
+
+# Tamaño aproximado del área de los ejes (px) y tolerancia de la aproximación
+ANCHO_PX = 700
+ALTO_PX = 400
+TOLERANCIA_PX = 0.5
+# No se subdivide por debajo de 1/4 de píxel
+SUBPIXELES = 4
+# Un salto de más de esta fracción del alto entre dos puntos vecinos es sospechoso
+SALTO = 0.1
+
+def es_serie(x, y):
+    """True si y es un arreglo real con una muestra por cada x"""
+    return isinstance(y, np.ndarray) and y.shape == x.shape and y.dtype.kind in 'fiub'
+
+def puntajes(x, y):
+    """Error estimado (px) de cada intervalo [x_i, x_i+1] al dibujarlo como recta"""
+    finitos = np.isfinite(y)
+    puntaje = np.zeros(len(x) - 1)
+
+    validos = y[finitos]
+    rango = float(validos.max() - validos.min()) if validos.size else 0.0
+    escala_y = ALTO_PX / rango if rango > 0 else 0.0
+
+    # Curvatura: distancia de cada punto interior a la cuerda de sus vecinos
+    if len(x) > 2:
+        izq, centro, der = y[:-2], y[1:-1], y[2:]
+        t = (x[1:-1] - x[:-2]) / (x[2:] - x[:-2])
+        desvio = np.abs(centro - (izq + t * (der - izq))) * escala_y
+        desvio = np.where(finitos[:-2] & finitos[1:-1] & finitos[2:], desvio, 0.0)
+        puntaje[:-1] = np.maximum(puntaje[:-1], desvio)
+        puntaje[1:] = np.maximum(puntaje[1:], desvio)
+
+    # Saltos entre vecinos y bordes del dominio (un extremo finito y el otro no)
+    ambos = finitos[:-1] & finitos[1:]
+    salto = np.where(ambos, np.abs(np.diff(np.where(finitos, y, 0.0))) * escala_y, 0.0)
+    puntaje = np.maximum(puntaje, np.where(salto > SALTO * ALTO_PX, salto, 0.0))
+    puntaje = np.where(finitos[:-1] != finitos[1:], np.inf, puntaje)
+    return puntaje, salto
+
+def malla_inicial(xmin, xmax):
+    """MUESTRAS_INICIALES puntos crecientes de xmin a xmax, casi uniformes"""
+    x, paso = np.linspace(xmin, xmax, MUESTRAS_INICIALES, retstep=True)
+    return x + _DESPLAZAMIENTOS * paso
+
+def muestrear_2d(f, xmin, xmax, presupuesto=PRESUPUESTO_2D, uniformes=800):
+    """Muestrea y = f(x) en [xmin, xmax] con a lo sumo `presupuesto` puntos.
+
+    Si f no devuelve una serie real (p. ej. una constante), se usa la malla
+    uniforme de `uniformes` puntos de siempre.
+    """
+    # Un rango invertido se muestrea creciente: los anchos de intervalo
+    # negativos nunca pasarían de ancho_min
+    xmin, xmax = sorted((xmin, xmax))
+    x = malla_inicial(xmin, xmax)
+    with np.errstate(all='ignore'):
+        y = f(x)
+    if not es_serie(x, y):
+        x = np.linspace(xmin, xmax, uniformes)
+        return x, f(x)
+    y = y.astype(np.float64)
+
+    ancho_min = (xmax - xmin) / (ANCHO_PX * SUBPIXELES)
+    with np.errstate(all='ignore'):
+        while len(x) < presupuesto:
+            puntaje, _ = puntajes(x, y)
+            anchos = np.diff(x)
+            candidatos = np.flatnonzero((puntaje > TOLERANCIA_PX) & (anchos > ancho_min))
+            if candidatos.size == 0:
+                break
+
+            # Sin presupuesto para todos: primero los intervalos más anchos, así
+            # la curva se refina de forma pareja en todo el rango
+            disponibles = presupuesto - len(x)
+            if candidatos.size > disponibles:
+                orden = np.lexsort((-puntaje[candidatos], -anchos[candidatos]))
+                candidatos = np.sort(candidatos[orden[:disponibles]])
+
+            medios = (x[candidatos] + x[candidatos + 1]) / 2
+            nuevos = np.broadcast_to(f(medios), medios.shape).astype(np.float64)
+            x = np.insert(x, candidatos + 1, medios)
+            y = np.insert(y, candidatos + 1, nuevos)
+
+        # Con el presupuesto agotado la curva no está resuelta (p. ej. una
+        # oscilación más rápida que un píxel): se dibuja tal cual
+        if len(x) >= presupuesto:
+            return x, y
+        return cortar_polos(x, y, ancho_min)
+
+def cortar_polos(x, y, ancho_min):
+    """Inserta un NaN en cada polo para cortar el trazo en lugar de unir +∞ con -∞.
+
+    Un polo es un salto que sigue ahí con intervalos de un subpíxel, con
+    cambio de signo y valores que crecen en magnitud hacia el salto por
+    ambos lados en los dos vecinos (en un cruce por cero decrecen).
+    """
+    _, salto = puntajes(x, y)
+    i = np.flatnonzero((salto > SALTO * ALTO_PX) & (np.diff(x) <= 2 * ancho_min))
+    i = i[(i >= 2) & (i + 3 < len(x))]
+    a = np.abs(y)
+    crece_izq = (a[i - 2] < a[i - 1]) & (a[i - 1] < a[i])
+    crece_der = (a[i + 3] < a[i + 2]) & (a[i + 2] < a[i + 1])
+    polos = i[(np.sign(y[i]) != np.sign(y[i + 1])) & crece_izq & crece_der]
+    if polos.size:
+        x = np.insert(x, polos + 1, (x[polos] + x[polos + 1]) / 2)
+        y = np.insert(y, polos + 1, np.nan)
+    return x, y
+
+# ===== RESOLUCIÓN DE draw3d =====
+
+# Lado de la malla de sondeo y límites del lado de la malla final
+MALLA_SONDEO = 25
+MALLA_MIN_3D = 30
+MALLA_MAX_SUPERFICIE = 100
+MALLA_MAX_MAPA = 300
+# Error máximo de la interpolación lineal entre nodos, como fracción del rango de z
+TOLERANCIA_3D = 0.002
+
+# Costo aproximado de plot_surface + colorbar + savefig (medido en ms):
+# un costo fijo más uno por celda de la malla
+COSTO_BASE_SUPERFICIE_MS = 190
+COSTO_CELDA_SUPERFICIE_MS = 0.02
+PRESUPUESTO_3D_MS = 400
+
+def malla_max_superficie(presupuesto_ms=PRESUPUESTO_3D_MS):
+    """Lado de malla más grande que entra en el presupuesto de latencia"""
+    celdas = max(presupuesto_ms - COSTO_BASE_SUPERFICIE_MS, 0) / COSTO_CELDA_SUPERFICIE_MS
+    return int(min(max(np.sqrt(celdas), MALLA_MIN_3D), MALLA_MAX_SUPERFICIE))
+
+def resolucion_3d(f2, xmin, xmax, ymin, ymax, maximo):
+    """Lado de la malla para z = f2(x, y) según cuánto varía la función.
+
+    Evalúa una malla de sondeo y estima con segundas diferencias cuántos
+    nodos hacen falta para que la interpolación lineal quede bajo
+    TOLERANCIA_3D. Retorna None si f2 no devuelve una malla real.
+    """
+    XX, YY = np.meshgrid(np.linspace(xmin, xmax, MALLA_SONDEO), np.linspace(ymin, ymax, MALLA_SONDEO))
+    with np.errstate(all='ignore'):
+        Z = f2(XX, YY)
+    if not es_serie(XX, Z):
+        return None
+
+    finitos = np.isfinite(Z)
+    if not finitos.any():
+        return MALLA_MIN_3D
+    rango = float(Z[finitos].max() - Z[finitos].min())
+    if rango == 0:
+        return MALLA_MIN_3D
+
+    with np.errstate(all='ignore'):
+        d2x = np.abs(Z[:, :-2] - 2 * Z[:, 1:-1] + Z[:, 2:])
+        d2y = np.abs(Z[:-2, :] - 2 * Z[1:-1, :] + Z[2:, :])
+    curvatura = max(np.nanmax(np.where(np.isfinite(d2x), d2x, 0.0)),
+                    np.nanmax(np.where(np.isfinite(d2y), d2y, 0.0))) / rango
+
+    # El error de interpolar linealmente es ~d2/8 y cae con el cuadrado del paso
+    lado = 1 + (MALLA_SONDEO - 1) * np.sqrt(curvatura / (8 * TOLERANCIA_3D))
+    return int(min(max(np.ceil(lado), MALLA_MIN_3D), maximo))
@@ -1,37 +1,51 @@
 """
 Analizador Semántico para MathView
-Detecta errores semánticos según las especificaciones del lenguaje
+Detecta errores semánticos según las especificaciones del lenguaje.
+Recorre el AST construido por el Parser y anota el tipo de cada expresión.
 """
 
+from ast_nodes import (
+    Declaracion, Asignacion, Incremento, Imprimir, Entrada,
+    Condicional, Mientras, LlamadaGrafica, Ventana, Evaluacion
+)
+
+OPERADORES_ARITMETICOS = ["MAS", "MENOS", "MULT", "DIV", "POTENCIA", "MOD"]
+OPERADORES_COMPARACION = ["MENOR", "MAYOR", "IGUAL", "DIFERENTE", "MENORIGUAL", "MAYORIGUAL"]
+
 class SemanticAnalyzer:
-    def __init__(self, tokens):
-        self.tokens = tokens
-        self.pos = 0
+    def __init__(self, programa):
+        self.programa = programa
         self.errores = []
         self.advertencias = []
         
         # Tabla de símbolos: {nombre: {'tipo': str, 'ambito': int, 'inicializada': bool}}
         self.tabla_simbolos = {}
         self.ambito_actual = 0
-        self.pila_ambitos = [{}]  # Stack de ámbitos
+        self.pila_ambitos = [{}]  # Stack de ámbitos: símbolos declarados en cada uno
+        # Vista aplanada para búsquedas O(1): {nombre: [info más externa, ..., info visible]}
+        self.simbolos_visibles = {}
         
         # Contexto de ejecución
         self.en_contexto_grafico = False
         self.en_funcion = None  # Guarda info de función actual {'nombre': str, 'tipo_retorno': str}
         
-    def actual(self):
-        if self.pos < len(self.tokens):
-            return self.tokens[self.pos]
-        return ("EOF", "EOF")
-    
-    def avanzar(self):
-        self.pos += 1
+        self._visitantes = {
+            Declaracion: self.analizar_declaracion,
+            Asignacion: self.analizar_asignacion,
+            Incremento: self.analizar_incremento_decremento,
+            Imprimir: self.analizar_pri,
+            Entrada: self.analizar_put,
+            Condicional: self.analizar_if,
+            Mientras: self.analizar_while,
+            LlamadaGrafica: self.analizar_funcion_grafica,
+            Ventana: self.analizar_contexto_grafico,
+            Evaluacion: self.analizar_funcion_matematica,
+        }
     
     def analizar(self):
         """Realiza análisis semántico completo"""
         try:
-            while self.actual()[1] != "EOF":
-                self.analizar_instruccion()
+            self.analizar_bloque(self.programa.cuerpo)
         except Exception as e:
             self.errores.append(f"Error crítico en análisis semántico: {str(e)}")
         
@@ -41,76 +55,30 @@ class SemanticAnalyzer:
             "tabla_simbolos": self.tabla_simbolos
         }
     
-    def analizar_instruccion(self):
+    def analizar_bloque(self, instrucciones, nuevo_ambito=False):
+        """Analiza una lista de instrucciones, opcionalmente en un ámbito propio"""
+        if nuevo_ambito:
+            self.entrar_nuevo_ambito()
+        for nodo in instrucciones:
+            self.analizar_instruccion(nodo)
+        if nuevo_ambito:
+            self.salir_ambito()
+    
+    def analizar_instruccion(self, nodo):
         """Analiza una instrucción"""
-        lexema, tipo = self.actual()
-        
-        # Declaraciones
-        if tipo in ["TIPO_ENTERO", "TIPO_DECIMAL", "TIPO_CADENA", "TIPO_ECUACION", 
-                    "TIPO_POSITIVO", "TIPO_BINARIO", "TIPO_CHAIN"]:
-            self.analizar_declaracion()
-            return
-        
-        # Asignaciones
-        if tipo == "IDENTIFICADOR":
-            siguiente = self.tokens[self.pos + 1] if self.pos + 1 < len(self.tokens) else None
-            if siguiente and siguiente[1] in ["ASIGNACION", "MAS_IGUAL", "MENOS_IGUAL"]:
-                self.analizar_asignacion()
-                return
-            elif siguiente and siguiente[1] in ["INCREMENTO", "DECREMENTO"]:
-                self.analizar_incremento_decremento()
-                return
-        
-        # Funciones de salida
-        if tipo == "FUNCION_PRI":
-            self.analizar_pri()
-            return
-        
-        # Funciones de entrada
-        if tipo == "FUNCION_PUT":
-            self.analizar_put()
-            return
-        
-        # Control de flujo
-        if tipo == "CONDICIONAL_IF":
-            self.analizar_if()
-            return
-        
-        if tipo == "BUCLE_WHILE":
-            self.analizar_while()
-            return
-        
-        # Funciones gráficas
-        if tipo in ["FUNCION_DIBUJO_2D", "FUNCION_DIBUJO_3D", "FUNCION_PLANO_2D", 
-                    "FUNCION_TEXTO", "FUNCION_MOVE", "FUNCION_NOW", "FUNCION_LOST"]:
-            self.analizar_funcion_grafica(lexema, tipo)
-            return
-        
-        # Contextos gráficos
-        if tipo in ["VENTANA_2D", "VENTANA_3D", "FUNCION_DISPLAY"]:
-            self.analizar_contexto_grafico()
-            return
-        
-        # Funciones de evaluación
-        if tipo in ["FUNCION_EVA", "FUNCION_REM", "FUNCION_FACT"]:
-            self.analizar_funcion_matematica()
-            return
-        
-        # Avanzar si no coincide con nada
-        self.avanzar()
+        visitante = self._visitantes.get(type(nodo))
+        if visitante is not None:
+            visitante(nodo)
     
-    def analizar_declaracion(self):
+    def analizar_declaracion(self, nodo):
         """3.2. Errores en Declaraciones"""
-        tipo_token, _ = self.actual()
-        tipo_var = tipo_token
-        self.avanzar()
+        tipo_var = nodo.tipo
         
-        if self.actual()[1] != "IDENTIFICADOR":
+        if nodo.nombre is None:
             self.errores.append("Error semántico: se esperaba nombre de variable en declaración")
             return
         
-        nombre_var = self.actual()[0]
-        self.avanzar()
+        nombre_var = nodo.nombre
         
         # 3.2.2. Redefinición de símbolo en el mismo ámbito
         ambito_actual = self.pila_ambitos[-1]
@@ -119,13 +87,10 @@ class SemanticAnalyzer:
             return
         
         # Verificar inicialización
-        tiene_inicializacion = False
-        tipo_inicializacion = None
+        tiene_inicializacion = nodo.valor is not None
         
-        if self.actual()[1] == "ASIGNACION":
-            tiene_inicializacion = True
-            self.avanzar()
-            tipo_inicializacion = self.analizar_expresion()
+        if tiene_inicializacion:
+            tipo_inicializacion = self.analizar_expresion(nodo.valor)
             
             # 3.2.3. Inicialización con tipo incompatible
             if not self.tipos_compatibles(tipo_var, tipo_inicializacion):
@@ -135,37 +100,27 @@ class SemanticAnalyzer:
                 )
         
         # Registrar símbolo
-        ambito_actual[nombre_var] = {
+        self.declarar_simbolo(nombre_var, {
             'tipo': self.normalizar_tipo(tipo_var),
             'inicializada': tiene_inicializacion,
             'ambito': self.ambito_actual
-        }
-        
-        # Consumir punto y coma
-        if self.actual()[1] == "PUNTO_COMA":
-            self.avanzar()
+        })
     
-    def analizar_asignacion(self):
+    def analizar_asignacion(self, nodo):
         """3.3. Errores en Asignaciones"""
-        nombre_var = self.actual()[0]
-        self.avanzar()
-        
-        operador = self.actual()[1]
-        self.avanzar()
+        nombre_var = nodo.nombre
         
         # 3.3.1. Asignación a símbolo no existente
-        if not self.simbolo_existe(nombre_var):
+        info_var = self.obtener_info_simbolo(nombre_var)
+        if info_var is None:
             self.errores.append(f"Error semántico: símbolo '{nombre_var}' no declarado para asignación.")
-            # Consumir resto de expresión
-            self.consumir_hasta("PUNTO_COMA")
             return
         
         # Obtener tipo de variable
-        info_var = self.obtener_info_simbolo(nombre_var)
         tipo_var = info_var['tipo']
         
         # Analizar expresión del lado derecho
-        tipo_expr = self.analizar_expresion()
+        tipo_expr = self.analizar_expresion(nodo.valor)
         
         # 3.3.2. Tipo incompatible en asignación
         if not self.tipos_compatibles(tipo_var, tipo_expr):
@@ -175,330 +130,190 @@ class SemanticAnalyzer:
         
         # Marcar como inicializada
         info_var['inicializada'] = True
-        
-        # Consumir punto y coma
-        if self.actual()[1] == "PUNTO_COMA":
-            self.avanzar()
     
-    def analizar_incremento_decremento(self):
+    def analizar_incremento_decremento(self, nodo):
         """3.3.3. Incremento en tipo no numérico"""
-        nombre_var = self.actual()[0]
-        self.avanzar()
-        
-        operador = self.actual()[0]  # ++ o --
-        self.avanzar()
+        nombre_var = nodo.nombre
+        operador = nodo.operador  # ++ o --
         
         # Verificar que existe
-        if not self.simbolo_existe(nombre_var):
+        info_var = self.obtener_info_simbolo(nombre_var)
+        if info_var is None:
             self.errores.append(f"Error semántico: variable '{nombre_var}' no declarada.")
             return
         
         # Verificar que es numérico
-        info_var = self.obtener_info_simbolo(nombre_var)
         if info_var['tipo'] not in ['int', 'dec', 'pos']:
             self.errores.append(
                 f"Error semántico: {operador} aplicado a tipo no numérico '{info_var['tipo']}'."
             )
-        
-        # Consumir punto y coma
-        if self.actual()[1] == "PUNTO_COMA":
-            self.avanzar()
     
-    def analizar_pri(self):
+    def analizar_pri(self, nodo):
         """3.5.1. Salida de expresión no válida"""
-        self.avanzar()  # consumir 'pri'
-        
-        if self.actual()[1] != "PAR_IZQ":
-            self.errores.append("Error semántico: se esperaba '(' después de 'pri'")
+        argumento = nodo.argumento
+        if argumento is None:
             return
         
-        self.avanzar()  # consumir '('
-        
         # Analizar argumento
-        lexema, tipo = self.actual()
+        lexema, tipo = argumento.tokens[0][0], argumento.tokens[0][1]
         
         if tipo == "CADENA":
             # Las cadenas son válidas
-            self.avanzar()
+            argumento.tipo = "string"
         elif tipo == "IDENTIFICADOR":
             # Verificar que la variable existe
             if not self.simbolo_existe(lexema):
                 self.errores.append(f"Error semántico: argumento no válido en 'pri'. Variable '{lexema}' no declarada.")
-            self.avanzar()
+            else:
+                self.analizar_expresion(argumento)
         elif tipo in ["NUMERO", "EXPRESION_MATH"]:
-            self.avanzar()
+            self.analizar_expresion(argumento)
         else:
             # Intentar analizar como expresión
-            tipo_expr = self.analizar_expresion()
-        
-        if self.actual()[1] == "PAR_DER":
-            self.avanzar()
-        
-        if self.actual()[1] == "PUNTO_COMA":
-            self.avanzar()
+            self.analizar_expresion(argumento)
     
-    def analizar_put(self):
+    def analizar_put(self, nodo):
         """Entrada de usuario"""
-        self.avanzar()  # consumir 'put'
-        
-        if self.actual()[1] != "PAR_IZQ":
+        if nodo.nombre is None:
             return
         
-        self.avanzar()  # consumir '('
-        
-        if self.actual()[1] == "IDENTIFICADOR":
-            nombre_var = self.actual()[0]
-            
-            # 3.2.1. Variable no declarada
-            if not self.simbolo_existe(nombre_var):
-                self.errores.append(f"Error semántico: variable '{nombre_var}' no declarada para 'put'.")
-            else:
-                # Marcar como inicializada
-                info = self.obtener_info_simbolo(nombre_var)
-                info['inicializada'] = True
-            
-            self.avanzar()
-        
-        if self.actual()[1] == "PAR_DER":
-            self.avanzar()
+        nombre_var = nodo.nombre
         
-        if self.actual()[1] == "PUNTO_COMA":
-            self.avanzar()
+        # 3.2.1. Variable no declarada
+        info = self.obtener_info_simbolo(nombre_var)
+        if info is None:
+            self.errores.append(f"Error semántico: variable '{nombre_var}' no declarada para 'put'.")
+        else:
+            # Marcar como inicializada
+            info['inicializada'] = True
     
-    def analizar_if(self):
+    def analizar_if(self, nodo):
         """3.6.1. Condición no booleana"""
-        self.avanzar()  # consumir 'if'
-        
-        if self.actual()[1] != "PAR_IZQ":
-            return
-        
-        self.avanzar()  # consumir '('
-        
-        # Analizar condición
-        tipo_condicion = self.analizar_expresion()
-        
-        # Verificar que es booleana (comparación)
-        if tipo_condicion not in ['bool', 'comparacion']:
-            # Buscar si hay operadores de comparación
-            if not self.tiene_operador_comparacion():
-                self.advertencias.append(
-                    "Advertencia semántica: la condición debería ser una expresión booleana o comparación explícita."
-                )
-        
-        if self.actual()[1] == "PAR_DER":
-            self.avanzar()
-        
-        # Analizar bloque
-        if self.actual()[1] == "LLAVE_IZQ":
-            self.entrar_nuevo_ambito()
-            self.avanzar()
-            
-            while self.actual()[1] not in ["LLAVE_DER", "EOF"]:
-                self.analizar_instruccion()
-            
-            if self.actual()[1] == "LLAVE_DER":
-                self.avanzar()
+        for indice, (condicion, cuerpo) in enumerate(nodo.ramas):
+            if condicion is not None:
+                tipo_condicion = self.analizar_expresion(condicion)
+                
+                # Verificar que es booleana (comparación), solo en el if principal
+                if indice == 0 and tipo_condicion not in ['bool', 'comparacion']:
+                    # Buscar si hay operadores de comparación
+                    if not self.tiene_operador_comparacion(condicion):
+                        self.advertencias.append(
+                            "Advertencia semántica: la condición debería ser una expresión booleana o comparación explícita."
+                        )
             
-            self.salir_ambito()
+            # Analizar bloque
+            self.analizar_bloque(cuerpo, nuevo_ambito=True)
         
-        # Manejar elif/else
-        while self.actual()[1] in ["CONDICIONAL_ELIF", "CONDICIONAL_ELSE"]:
-            if self.actual()[1] == "CONDICIONAL_ELIF":
-                self.avanzar()
-                if self.actual()[1] == "PAR_IZQ":
-                    self.avanzar()
-                    self.analizar_expresion()
-                    if self.actual()[1] == "PAR_DER":
-                        self.avanzar()
-            else:
-                self.avanzar()  # consumir 'else'
-            
-            if self.actual()[1] == "LLAVE_IZQ":
-                self.entrar_nuevo_ambito()
-                self.avanzar()
-                
-                while self.actual()[1] not in ["LLAVE_DER", "EOF"]:
-                    self.analizar_instruccion()
-                
-                if self.actual()[1] == "LLAVE_DER":
-                    self.avanzar()
-                
-                self.salir_ambito()
+        # Manejar else
+        if nodo.sino is not None:
+            self.analizar_bloque(nodo.sino, nuevo_ambito=True)
     
-    def analizar_while(self):
+    def analizar_while(self, nodo):
         """Bucle while"""
-        self.avanzar()  # consumir 'while'
-        
-        if self.actual()[1] != "PAR_IZQ":
-            return
-        
-        self.avanzar()  # consumir '('
-        
         # Analizar condición
-        self.analizar_expresion()
-        
-        if self.actual()[1] == "PAR_DER":
-            self.avanzar()
+        if nodo.condicion is not None:
+            self.analizar_expresion(nodo.condicion)
         
         # Analizar bloque
-        if self.actual()[1] == "LLAVE_IZQ":
-            self.entrar_nuevo_ambito()
-            self.avanzar()
-            
-            while self.actual()[1] not in ["LLAVE_DER", "EOF"]:
-                self.analizar_instruccion()
-            
-            if self.actual()[1] == "LLAVE_DER":
-                self.avanzar()
-            
-            self.salir_ambito()
+        self.analizar_bloque(nodo.cuerpo, nuevo_ambito=True)
     
-    def analizar_funcion_grafica(self, nombre, tipo):
+    def analizar_funcion_grafica(self, nodo):
         """3.8.1. Sentencia gráfica fuera de contexto"""
         # draw2d, draw3d, text, move, now, lost requieren contexto gráfico
-        if tipo in ["FUNCION_DIBUJO_2D", "FUNCION_DIBUJO_3D"]:
+        if nodo.tipo in ["FUNCION_DIBUJO_2D", "FUNCION_DIBUJO_3D"]:
             # Permitir draw2d y draw3d fuera de contexto (según tu código actual)
             pass
-        elif tipo in ["FUNCION_TEXTO", "FUNCION_MOVE", "FUNCION_NOW", "FUNCION_LOST"]:
+        elif nodo.tipo in ["FUNCION_TEXTO", "FUNCION_MOVE", "FUNCION_NOW", "FUNCION_LOST"]:
             # 3.9.1. Animación fuera de contexto gráfico
             if not self.en_contexto_grafico:
                 self.errores.append(
-                    f"Error semántico: '{nombre}' solo es válida dentro de contextos de visualización "
+                    f"Error semántico: '{nodo.nombre}' solo es válida dentro de contextos de visualización "
                     f"(display, win2d, win3d)."
                 )
-        
-        # Consumir función completa
-        self.avanzar()
-        if self.actual()[1] == "PAR_IZQ":
-            depth = 1
-            self.avanzar()
-            while depth > 0 and self.actual()[1] != "EOF":
-                if self.actual()[1] == "PAR_IZQ":
-                    depth += 1
-                elif self.actual()[1] == "PAR_DER":
-                    depth -= 1
-                self.avanzar()
-        
-        if self.actual()[1] == "PUNTO_COMA":
-            self.avanzar()
     
-    def analizar_contexto_grafico(self):
+    def analizar_contexto_grafico(self, nodo):
         """Analiza win2d, win3d, display"""
-        self.avanzar()  # consumir palabra clave
-        
-        if self.actual()[1] == "IDENTIFICADOR":
-            self.avanzar()
-        
-        if self.actual()[1] == "PAR_IZQ":
-            depth = 1
-            self.avanzar()
-            while depth > 0 and self.actual()[1] != "EOF":
-                if self.actual()[1] == "PAR_IZQ":
-                    depth += 1
-                elif self.actual()[1] == "PAR_DER":
-                    depth -= 1
-                self.avanzar()
-        
         # Entrar en contexto gráfico
-        if self.actual()[1] == "LLAVE_IZQ":
-            self.en_contexto_grafico = True
-            self.entrar_nuevo_ambito()
-            self.avanzar()
-            
-            while self.actual()[1] not in ["LLAVE_DER", "EOF"]:
-                self.analizar_instruccion()
-            
-            if self.actual()[1] == "LLAVE_DER":
-                self.avanzar()
-            
-            self.salir_ambito()
-            self.en_contexto_grafico = False
+        contexto_anterior = self.en_contexto_grafico
+        self.en_contexto_grafico = True
+        self.analizar_bloque(nodo.cuerpo, nuevo_ambito=True)
+        self.en_contexto_grafico = contexto_anterior
     
-    def analizar_funcion_matematica(self):
+    def analizar_funcion_matematica(self, nodo):
         """3.4.1. Invocación de función simbólica con parámetros incorrectos"""
-        nombre_func = self.actual()[0]
-        self.avanzar()
-        
-        if self.actual()[1] == "PAR_IZQ":
-            # Por ahora solo consumir, se podría validar firma
-            depth = 1
-            self.avanzar()
-            while depth > 0 and self.actual()[1] != "EOF":
-                if self.actual()[1] == "PAR_IZQ":
-                    depth += 1
-                elif self.actual()[1] == "PAR_DER":
-                    depth -= 1
-                self.avanzar()
+        # Por ahora solo anotar el tipo, se podría validar firma
+        nodo.expresion.tipo = "dec"
     
-    def analizar_expresion(self):
-        """Analiza una expresión y retorna su tipo"""
-        lexema, tipo = self.actual()
+    def analizar_expresion(self, expresion):
+        """Analiza una expresión, anota su tipo en el nodo y lo retorna"""
+        if expresion is None:
+            return "unknown"
+        tipo, _ = self.tipo_desde(expresion.tokens, 0)
+        expresion.tipo = tipo
+        return tipo
+    
+    def tipo_desde(self, tokens, pos):
+        """Deduce el tipo de la expresión que empieza en tokens[pos]; retorna (tipo, pos_siguiente)"""
+        if pos >= len(tokens):
+            return "unknown", pos
+        
+        lexema, tipo = tokens[pos][0], tokens[pos][1]
         
         if tipo == "NUMERO":
-            self.avanzar()
-            return "int" if '.' not in lexema else "dec"
+            return ("int" if '.' not in lexema else "dec"), pos + 1
         
         elif tipo == "CADENA":
-            self.avanzar()
-            return "string"
+            return "string", pos + 1
         
         elif tipo == "EXPRESION_MATH":
-            self.avanzar()
-            return "ecu"
+            return "ecu", pos + 1
         
         elif tipo == "IDENTIFICADOR":
-            if not self.simbolo_existe(lexema):
+            info = self.obtener_info_simbolo(lexema)
+            if info is None:
                 self.errores.append(f"Error semántico: variable '{lexema}' no declarada.")
-                self.avanzar()
-                return "unknown"
+                return "unknown", pos + 1
             
-            info = self.obtener_info_simbolo(lexema)
-            self.avanzar()
+            pos += 1
+            operador = tokens[pos][1] if pos < len(tokens) else "EOF"
             
             # Verificar operadores
-            if self.actual()[1] in ["MAS", "MENOS", "MULT", "DIV", "POTENCIA", "MOD"]:
+            if operador in OPERADORES_ARITMETICOS:
                 # Operación aritmética
-                self.avanzar()
-                tipo_derecha = self.analizar_expresion()
-                return self.resolver_tipo_operacion(info['tipo'], tipo_derecha)
+                tipo_derecha, pos = self.tipo_desde(tokens, pos + 1)
+                return self.resolver_tipo_operacion(info['tipo'], tipo_derecha), pos
             
-            elif self.actual()[1] in ["MENOR", "MAYOR", "IGUAL", "DIFERENTE", "MENORIGUAL", "MAYORIGUAL"]:
+            elif operador in OPERADORES_COMPARACION:
                 # Comparación
-                self.avanzar()
-                self.analizar_expresion()
-                return "bool"
+                _, pos = self.tipo_desde(tokens, pos + 1)
+                return "bool", pos
             
-            return info['tipo']
+            return info['tipo'], pos
         
         elif tipo == "PAR_IZQ":
-            self.avanzar()
-            tipo_interno = self.analizar_expresion()
-            if self.actual()[1] == "PAR_DER":
-                self.avanzar()
-            return tipo_interno
+            tipo_interno, pos = self.tipo_desde(tokens, pos + 1)
+            if pos < len(tokens) and tokens[pos][1] == "PAR_DER":
+                pos += 1
+            return tipo_interno, pos
         
         elif tipo in ["BOOLEANO_TRUE", "BOOLEANO_FALSE"]:
-            self.avanzar()
-            return "bool"
+            return "bool", pos + 1
         
         elif tipo in ["FUNCION_MATH", "FUNCION_REM", "FUNCION_EVA", "FUNCION_FACT"]:
-            self.avanzar()
-            if self.actual()[1] == "PAR_IZQ":
+            pos += 1
+            if pos < len(tokens) and tokens[pos][1] == "PAR_IZQ":
                 depth = 1
-                self.avanzar()
-                while depth > 0 and self.actual()[1] != "EOF":
-                    if self.actual()[1] == "PAR_IZQ":
+                pos += 1
+                while depth > 0 and pos < len(tokens):
+                    if tokens[pos][1] == "PAR_IZQ":
                         depth += 1
-                    elif self.actual()[1] == "PAR_DER":
+                    elif tokens[pos][1] == "PAR_DER":
                         depth -= 1
-                    self.avanzar()
-            return "dec"
+                    pos += 1
+            return "dec", pos
         
         else:
-            # Avanzar para no quedarse atascado
-            if tipo not in ["PUNTO_COMA", "PAR_DER", "COMA", "EOF"]:
-                self.avanzar()
-            return "unknown"
+            return "unknown", pos + 1
     
     # ===== MÉTODOS AUXILIARES =====
     
@@ -508,24 +323,29 @@ class SemanticAnalyzer:
         self.pila_ambitos.append({})
     
     def salir_ambito(self):
-        """Sale del ámbito actual"""
+        """Sale del ámbito actual, restaurando los símbolos que ocultaba"""
         if len(self.pila_ambitos) > 1:
-            self.pila_ambitos.pop()
+            visibles = self.simbolos_visibles
+            for nombre in self.pila_ambitos.pop():
+                pila = visibles[nombre]
+                pila.pop()
+                if not pila:
+                    del visibles[nombre]
             self.ambito_actual -= 1
     
+    def declarar_simbolo(self, nombre, info):
+        """Registra un símbolo en el ámbito actual, ocultando los externos"""
+        self.pila_ambitos[-1][nombre] = info
+        self.simbolos_visibles.setdefault(nombre, []).append(info)
+    
     def simbolo_existe(self, nombre):
         """Verifica si un símbolo existe en cualquier ámbito"""
-        for ambito in reversed(self.pila_ambitos):
-            if nombre in ambito:
-                return True
-        return False
+        return nombre in self.simbolos_visibles
     
     def obtener_info_simbolo(self, nombre):
-        """Obtiene información de un símbolo"""
-        for ambito in reversed(self.pila_ambitos):
-            if nombre in ambito:
-                return ambito[nombre]
-        return None
+        """Obtiene información del símbolo visible (None si no existe)"""
+        pila = self.simbolos_visibles.get(nombre)
+        return pila[-1] if pila else None
     
     def normalizar_tipo(self, tipo_token):
         """Convierte token de tipo a nombre de tipo"""
@@ -568,16 +388,6 @@ class SemanticAnalyzer:
             return "int"
         return "dec"
     
-    def tiene_operador_comparacion(self):
-        """Verifica si hay un operador de comparación cercano"""
-        for i in range(max(0, self.pos - 3), min(len(self.tokens), self.pos + 3)):
-            if self.tokens[i][1] in ["MENOR", "MAYOR", "IGUAL", "DIFERENTE", "MENORIGUAL", "MAYORIGUAL"]:
-                return True
-        return False
-    
-    def consumir_hasta(self, tipo_token):
-        """Consume tokens hasta encontrar el especificado"""
-        while self.actual()[1] != tipo_token and self.actual()[1] != "EOF":
-            self.avanzar()
-        if self.actual()[1] == tipo_token:
-            self.avanzar()
+    def tiene_operador_comparacion(self, expresion):
+        """Verifica si la expresión contiene un operador de comparación"""
+        return any(t[1] in OPERADORES_COMPARACION for t in expresion.tokens)
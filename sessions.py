@@ -0,0 +1,69 @@
+"""
+Sesiones de ejecución pausadas en put()
+Guarda el estado de un Interpreter detenido esperando entrada para poder
+reanudarlo con un solo valor nuevo, en lugar de re-ejecutar todo el programa.
+"""
+
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+class SessionStore:
+    """Almacén en memoria con expiración (TTL) y desalojo LRU por tamaño"""
+
+    def __init__(self, ttl=600, max_sesiones=256):
+        self.ttl = ttl
+        self.max_sesiones = max_sesiones
+        self._sesiones = OrderedDict()  # token -> (expira_en, estado)
+        self._lock = threading.Lock()
+
+    def guardar(self, estado):
+        """Guarda el estado y retorna el token de continuación"""
+        token = secrets.token_urlsafe(16)
+        ahora = time.monotonic()
+        with self._lock:
+            self._purgar(ahora)
+            self._sesiones[token] = (ahora + self.ttl, estado)
+            # Desalojar las sesiones usadas hace más tiempo
+            while len(self._sesiones) > self.max_sesiones:
+                self._sesiones.popitem(last=False)
+        return token
+
+    def tomar(self, token):
+        """Retira y retorna el estado de una sesión (None si no existe o expiró)"""
+        if not isinstance(token, str):
+            return None
+        with self._lock:
+            entrada = self._sesiones.pop(token, None)
+        if entrada is None:
+            return None
+        expira_en, estado = entrada
+        if expira_en < time.monotonic():
+            return None
+        return estado
+
+    def obtener(self, token):
+        """Retorna el estado de una sesión sin retirarlo, renovando su TTL"""
+        if not isinstance(token, str):
+            return None
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._sesiones.pop(token, None)
+            if entrada is None or entrada[0] < ahora:
+                return None
+            # Reinsertar al final: sigue siendo la más reciente en expirar
+            self._sesiones[token] = (ahora + self.ttl, entrada[1])
+        return entrada[1]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sesiones)
+
+    def _purgar(self, ahora):
+        """Elimina las sesiones expiradas (el orden de inserción es el de expiración)"""
+        while self._sesiones:
+            token, (expira_en, _) = next(iter(self._sesiones.items()))
+            if expira_en >= ahora:
+                break
+            del self._sesiones[token]
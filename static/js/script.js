@@ -3,6 +3,18 @@ let userInputs = [];
 let esperandoInput = false;
 let codigoActual = '';
 let salidaPreviaGuardada = [];
+let sesionActual = null;  // Token para reanudar una ejecución pausada en put()
+// Opciones de la página, p. ej. /?modo_grafico=datos&escena=lista; sin
+// ellas, imágenes y solo el último gráfico, como responde el servidor
+const opcionesPagina = new URLSearchParams(window.location.search);
+// 'datos': draw2d llega como serie x/y y se dibuja en el canvas; 'imagen': PNG
+const MODO_GRAFICO = opcionesPagina.get('modo_grafico') === 'datos' ? 'datos' : 'imagen';
+// 'lista': todos los gráficos del programa; 'subplots': todos en una figura;
+// 'ultima': solo el último
+const MODO_ESCENA = ['lista', 'subplots'].includes(opcionesPagina.get('escena'))
+    ? opcionesPagina.get('escena') : 'ultima';
+// Formatos de imagen que acepta el navegador, el servidor elige el primero que sepa codificar
+const FORMATOS_IMAGEN = ['webp', 'png8', 'png'];
 
 // Elementos del DOM
 const codigoTextarea = document.getElementById('codigo');
@@ -19,9 +31,12 @@ const estadoIcono = document.getElementById('estado-icono');
 const estadoTexto = document.getElementById('estado-texto');
 const visualizacion = document.getElementById('visualizacion');
 const grafico = document.getElementById('grafico');
+const graficoCanvas = document.getElementById('grafico-canvas');
+const graficosExtra = document.getElementById('graficos-extra');
 const tokensOutput = document.getElementById('tokens-output');
 const tokenCount = document.getElementById('token-count');
 const lineCount = document.getElementById('line-count');
+const lintCount = document.getElementById('lint-count');
 
 // ===== EJEMPLOS =====
 
@@ -173,6 +188,85 @@ function actualizarLineCount() {
     lineCount.textContent = `Líneas: ${lines}`;
 }
 
+// ===== ANÁLISIS INCREMENTAL =====
+// El servidor guarda el documento; en cada pausa al escribir solo se envía
+// el tramo editado y se re-analizan las instrucciones afectadas
+
+let documentoActual = null;   // { token, version, texto }
+let temporizadorLint = null;
+let lintEnCurso = false;
+
+codigoTextarea.addEventListener('input', () => {
+    clearTimeout(temporizadorLint);
+    temporizadorLint = setTimeout(analizarDocumento, 300);
+});
+
+function calcularCambio(anterior, actual) {
+    // Un único reemplazo: prefijo y sufijo comunes se conservan
+    let inicio = 0;
+    const limite = Math.min(anterior.length, actual.length);
+    while (inicio < limite && anterior[inicio] === actual[inicio]) inicio++;
+    let finAnterior = anterior.length;
+    let finActual = actual.length;
+    while (finAnterior > inicio && finActual > inicio && anterior[finAnterior - 1] === actual[finActual - 1]) {
+        finAnterior--;
+        finActual--;
+    }
+    return { inicio: inicio, fin: finAnterior, texto: actual.substring(inicio, finActual) };
+}
+
+function analizarDocumento() {
+    if (lintEnCurso) {
+        temporizadorLint = setTimeout(analizarDocumento, 300);
+        return;
+    }
+    const texto = codigoTextarea.value;
+    let url = '/documento';
+    let cuerpo = { codigo: texto };
+
+    if (documentoActual) {
+        if (documentoActual.texto === texto) return;
+        url = `/documento/${documentoActual.token}/editar`;
+        cuerpo = {
+            version: documentoActual.version,
+            cambios: [calcularCambio(documentoActual.texto, texto)]
+        };
+    }
+
+    lintEnCurso = true;
+    fetch(url, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(cuerpo)
+    })
+    .then(response => response.json().then(data => ({ ok: response.ok, data: data })))
+    .then(({ ok, data }) => {
+        lintEnCurso = false;
+        if (!ok) {
+            // Documento expirado o versión desfasada: abrirlo de nuevo
+            documentoActual = null;
+            if (data.estado === 'documento_expirado' || data.estado === 'version_desfasada') {
+                analizarDocumento();
+            }
+            return;
+        }
+        documentoActual = { token: data.documento, version: data.version, texto: texto };
+        mostrarDiagnosticos(data.diagnosticos);
+    })
+    .catch(() => {
+        lintEnCurso = false;
+        documentoActual = null;
+    });
+}
+
+function mostrarDiagnosticos(diagnosticos) {
+    const problemas = diagnosticos.filter(d => d.fase !== 'advertencia').length;
+    lintCount.textContent = `Problemas: ${problemas}`;
+    lintCount.title = diagnosticos
+        .map(d => d.linea ? `Línea ${d.linea}, columna ${d.columna}: ${d.mensaje}` : d.mensaje)
+        .join('\n');
+}
+
 // ===== FUNCIONES DE COMPILACIÓN =====
 
 function compilar(esNuevaCompilacion = false) {
@@ -187,6 +281,7 @@ function compilar(esNuevaCompilacion = false) {
         userInputs = [];
         codigoActual = codigo;
         salidaPreviaGuardada = [];
+        sesionActual = null;
         limpiarSoloConsola();
         // ARREGLO: Ocultar visualización al iniciar nueva compilación
         visualizacion.classList.add('oculto');
@@ -202,7 +297,11 @@ function compilar(esNuevaCompilacion = false) {
         },
         body: JSON.stringify({
             codigo: codigoActual,
-            inputs: userInputs
+            inputs: userInputs,
+            modo_grafico: MODO_GRAFICO,
+            escena: MODO_ESCENA,
+            ancho: anchoGrafico(),
+            formatos: FORMATOS_IMAGEN
         })
     })
     .then(response => response.json())
@@ -223,6 +322,9 @@ function procesarRespuesta(data) {
         mostrarTokens(data.tokens);
     }
     
+    // Solo una respuesta 'necesita_input' deja una sesión reanudable
+    sesionActual = data.estado === 'necesita_input' ? (data.sesion || null) : null;
+    
     switch(data.estado) {
         case 'correcto':
             mostrarEstado('correcto', '✅ Compilación exitosa');
@@ -288,11 +390,23 @@ function mostrarSalida(data) {
     }
     
     // ARREGLO: Solo mostrar imagen si existe, sino ocultarla
-    if (data.imagen) {
+    graficosExtra.innerHTML = '';
+    if (data.grafico) {
+        mostrarSerie(data.grafico);
+    } else if (data.imagen) {
         mostrarImagen(data.imagen);
     } else {
         visualizacion.classList.add('oculto');
     }
+    
+    // Los gráficos anteriores al último van antes, en el orden del programa
+    if (data.imagenes && data.imagenes.length > 1) {
+        mostrarGraficosAnteriores(data.imagenes.slice(0, -1));
+    }
+
+    if (data.animaciones && data.animaciones.length > 0) {
+        mostrarAnimaciones(data.animaciones, Boolean(data.grafico || data.imagen));
+    }
 }
 
 function mostrarSalidaPrevia(lineas) {
@@ -322,7 +436,50 @@ function enviarInput() {
     consolaInput.classList.add('oculto');
     esperandoInput = false;
     
-    compilar(false);
+    if (sesionActual) {
+        continuarEjecucion(valor);
+    } else {
+        compilar(false);
+    }
+}
+
+// Reanuda la ejecución pausada en el servidor enviando solo el nuevo valor
+function continuarEjecucion(valor) {
+    const sesion = sesionActual;
+    sesionActual = null;
+    btnCompilar.disabled = true;
+    
+    fetch('/continuar', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify({
+            sesion: sesion,
+            valor: valor
+        })
+    })
+    .then(response => {
+        // Sesión no disponible: re-ejecutar con todas las entradas
+        if (response.status === 410) {
+            return null;
+        }
+        return response.json();
+    })
+    .then(data => {
+        if (data === null) {
+            compilar(false);
+            return;
+        }
+        procesarRespuesta(data);
+        btnCompilar.disabled = false;
+    })
+    .catch(error => {
+        mostrarEstado('error', `❌ Error de conexión: ${error.message}`);
+        agregarLineaConsola(`Error: ${error.message}`, 'error');
+        btnCompilar.disabled = false;
+        esperandoInput = false;
+    });
 }
 
 function mostrarErrores(errores) {
@@ -331,9 +488,305 @@ function mostrarErrores(errores) {
     });
 }
 
-function mostrarImagen(imagenBase64) {
+// Ancho del área del gráfico en píxeles físicos: el servidor dibuja a esa resolución
+function anchoGrafico() {
+    const ancho = visualizacion.clientWidth || visualizacion.parentElement.clientWidth;
+    // Descontar el relleno de la tarjeta y del contenedor del gráfico
+    return Math.round(Math.max(ancho - 80, 200) * (window.devicePixelRatio || 1));
+}
+
+// Las imágenes llegan como el hash de su contenido; el navegador las cachea
+function urlImagen(digest) {
+    return `/imagen/${digest}`;
+}
+
+// Imagen que ya no está en el almacén (404): se re-ejecuta el programa una
+// sola vez, como con una sesión expirada, y el servidor la vuelve a dibujar
+let imagenReintentada = null;
+
+function reintentarImagen(digest) {
+    if (imagenReintentada === digest || btnCompilar.disabled) {
+        return;
+    }
+    imagenReintentada = digest;
+    compilar(false);
+}
+
+function mostrarImagen(digest) {
+    visualizacion.classList.remove('oculto');
+    graficoCanvas.classList.add('oculto');
+    grafico.classList.remove('oculto');
+    grafico.onerror = () => reintentarImagen(digest);
+    grafico.src = urlImagen(digest);
+}
+
+function mostrarGraficosAnteriores(graficos) {
+    graficos.forEach(item => {
+        if (item.grafico) {
+            const canvas = document.createElement('canvas');
+            canvas.width = graficoCanvas.width;
+            canvas.height = graficoCanvas.height;
+            graficosExtra.appendChild(canvas);
+            dibujarSerie(canvas, item.grafico);
+        } else if (item.imagen) {
+            const img = document.createElement('img');
+            img.alt = 'Gráfico generado';
+            img.onerror = () => reintentarImagen(item.imagen);
+            img.src = urlImagen(item.imagen);
+            graficosExtra.appendChild(img);
+        }
+    });
+}
+
+// ===== ANIMACIONES DE win2d =====
+
+function mostrarAnimaciones(animaciones, hayGrafico) {
     visualizacion.classList.remove('oculto');
-    grafico.src = `data:image/png;base64,${imagenBase64}`;
+    if (!hayGrafico) {
+        grafico.classList.add('oculto');
+        graficoCanvas.classList.add('oculto');
+    }
+    animaciones.forEach(animacion => {
+        const canvas = document.createElement('canvas');
+        canvas.width = animacion.ancho;
+        canvas.height = animacion.alto;
+        graficosExtra.appendChild(canvas);
+        reproducirAnimacion(canvas, animacion);
+    });
+}
+
+function concatenarBytes(a, b) {
+    const resultado = new Uint8Array(a.length + b.length);
+    resultado.set(a);
+    resultado.set(b, a.length);
+    return resultado;
+}
+
+// Reproduce una animación mientras llega: cada registro del flujo es
+// [largo uint32 big-endian][imagen] y se muestra apenas se decodifica
+function reproducirAnimacion(canvas, animacion) {
+    const ctx = canvas.getContext('2d');
+    const cuadros = [];
+    const duracionCuadro = 1000 / animacion.fps;
+    let completa = false;
+    let inicio = null;
+
+    function dibujar(ahora) {
+        // Otra ejecución reemplazó el canvas: terminar
+        if (!canvas.isConnected) {
+            return;
+        }
+        if (cuadros.length > 0) {
+            if (inicio === null) {
+                inicio = ahora;
+            }
+            let indice = Math.floor((ahora - inicio) / duracionCuadro);
+            if (completa) {
+                indice %= cuadros.length;
+            } else if (indice >= cuadros.length) {
+                // El flujo va más lento que la reproducción: esperar al siguiente cuadro
+                indice = cuadros.length - 1;
+                inicio = ahora - indice * duracionCuadro;
+            }
+            ctx.drawImage(cuadros[indice], 0, 0, canvas.width, canvas.height);
+        }
+        requestAnimationFrame(dibujar);
+    }
+    requestAnimationFrame(dibujar);
+
+    fetch(`/animacion/${animacion.id}`)
+        .then(async response => {
+            if (!response.ok) {
+                throw new Error(`HTTP ${response.status}`);
+            }
+            const lector = response.body.getReader();
+            let pendiente = new Uint8Array(0);
+            while (true) {
+                const { done, value } = await lector.read();
+                if (done) {
+                    break;
+                }
+                pendiente = concatenarBytes(pendiente, value);
+                // Sacar todos los registros completos; el resto espera más bytes
+                while (pendiente.length >= 4) {
+                    const largo = new DataView(pendiente.buffer, pendiente.byteOffset, 4).getUint32(0);
+                    if (pendiente.length < 4 + largo) {
+                        break;
+                    }
+                    const imagen = new Blob([pendiente.subarray(4, 4 + largo)]);
+                    pendiente = pendiente.slice(4 + largo);
+                    cuadros.push(await createImageBitmap(imagen));
+                }
+            }
+            completa = true;
+        })
+        .catch(error => {
+            agregarLineaConsola(`Error en la animación ${animacion.nombre}: ${error.message}`, 'error');
+        });
+}
+
+// ===== GRÁFICOS EN MODO DATOS =====
+
+const TEMA_GRAFICO = {
+    figura: '#0a0e27',
+    ejes: '#111827',
+    borde: '#4ade80',
+    texto: '#e0e7ff',
+    marcas: '#94a3b8',
+    rejilla: 'rgba(30, 41, 59, 0.3)',
+    curva: 'deepskyblue'
+};
+
+function decodificarFloat32(base64) {
+    // Float32 little-endian (el orden nativo de casi todos los navegadores)
+    const binario = atob(base64);
+    const bytes = new Uint8Array(binario.length);
+    for (let i = 0; i < binario.length; i++) {
+        bytes[i] = binario.charCodeAt(i);
+    }
+    const vista = new DataView(bytes.buffer);
+    const valores = new Float32Array(bytes.length / 4);
+    for (let i = 0; i < valores.length; i++) {
+        valores[i] = vista.getFloat32(i * 4, true);
+    }
+    return valores;
+}
+
+function marcasEje(min, max, cantidad = 6) {
+    // Marcas "redondas" (1, 2, 2.5, 5 × 10^k), como raster.py
+    const bruto = (max - min) / cantidad;
+    const potencia = Math.pow(10, Math.floor(Math.log10(bruto)));
+    let paso = potencia;
+    let factorElegido = 1;
+    for (const factor of [1, 2, 2.5, 5, 10]) {
+        paso = factor * potencia;
+        factorElegido = factor;
+        if (paso >= bruto) break;
+    }
+    const decimales = Math.max(0, -Math.floor(Math.log10(paso) + 1e-9)) + (factorElegido === 2.5 ? 1 : 0);
+    const marcas = [];
+    for (let k = Math.ceil(min / paso); k <= Math.floor(max / paso); k++) {
+        marcas.push({ valor: k * paso, texto: (k === 0 ? 0 : k * paso).toFixed(decimales) });
+    }
+    return marcas;
+}
+
+function mostrarSerie(serie) {
+    visualizacion.classList.remove('oculto');
+    grafico.classList.add('oculto');
+    graficoCanvas.classList.remove('oculto');
+    dibujarSerie(graficoCanvas, serie);
+}
+
+function dibujarSerie(canvas, serie) {
+    const xs = decodificarFloat32(serie.x);
+    const ys = decodificarFloat32(serie.y);
+    const ctx = canvas.getContext('2d');
+    const ancho = canvas.width;
+    const alto = canvas.height;
+    const izq = 70, der = ancho - 20, arriba = 40, abajo = alto - 50;
+    const { xmin, xmax, ymin, ymax } = serie;
+
+    const aPixelX = x => izq + (x - xmin) / (xmax - xmin) * (der - izq);
+    const aPixelY = y => abajo - (y - ymin) / (ymax - ymin) * (abajo - arriba);
+
+    ctx.fillStyle = TEMA_GRAFICO.figura;
+    ctx.fillRect(0, 0, ancho, alto);
+    ctx.fillStyle = TEMA_GRAFICO.ejes;
+    ctx.fillRect(izq, arriba, der - izq, abajo - arriba);
+
+    const marcasX = marcasEje(xmin, xmax);
+    const marcasY = marcasEje(ymin, ymax);
+
+    // Rejilla
+    ctx.strokeStyle = TEMA_GRAFICO.rejilla;
+    ctx.lineWidth = 1;
+    ctx.beginPath();
+    marcasX.forEach(m => { ctx.moveTo(aPixelX(m.valor), arriba); ctx.lineTo(aPixelX(m.valor), abajo); });
+    marcasY.forEach(m => { ctx.moveTo(izq, aPixelY(m.valor)); ctx.lineTo(der, aPixelY(m.valor)); });
+    ctx.stroke();
+
+    // Curva: los NaN cortan el trazo
+    ctx.save();
+    ctx.beginPath();
+    ctx.rect(izq, arriba, der - izq, abajo - arriba);
+    ctx.clip();
+    ctx.strokeStyle = TEMA_GRAFICO.curva;
+    ctx.lineWidth = 2;
+    ctx.lineJoin = 'round';
+    ctx.beginPath();
+    let enTrazo = false;
+    for (let i = 0; i < serie.n; i++) {
+        if (Number.isNaN(ys[i])) {
+            enTrazo = false;
+            continue;
+        }
+        const px = aPixelX(xs[i]);
+        const py = Math.max(-alto, Math.min(2 * alto, aPixelY(ys[i])));
+        if (enTrazo) {
+            ctx.lineTo(px, py);
+        } else {
+            ctx.moveTo(px, py);
+            enTrazo = true;
+        }
+    }
+    ctx.stroke();
+    ctx.restore();
+
+    ctx.strokeStyle = TEMA_GRAFICO.borde;
+    ctx.lineWidth = 1;
+    ctx.strokeRect(izq + 0.5, arriba + 0.5, der - izq - 1, abajo - arriba - 1);
+
+    // Marcas y textos
+    ctx.fillStyle = TEMA_GRAFICO.marcas;
+    ctx.strokeStyle = TEMA_GRAFICO.marcas;
+    ctx.font = '10px "DejaVu Sans", sans-serif';
+    ctx.beginPath();
+    ctx.textAlign = 'center';
+    ctx.textBaseline = 'top';
+    marcasX.forEach(m => {
+        const px = aPixelX(m.valor);
+        ctx.moveTo(px, abajo);
+        ctx.lineTo(px, abajo + 4);
+        ctx.fillText(m.texto, px, abajo + 6);
+    });
+    ctx.textAlign = 'right';
+    ctx.textBaseline = 'middle';
+    marcasY.forEach(m => {
+        const py = aPixelY(m.valor);
+        ctx.moveTo(izq - 4, py);
+        ctx.lineTo(izq, py);
+        ctx.fillText(m.texto, izq - 6, py);
+    });
+    ctx.stroke();
+
+    ctx.fillStyle = TEMA_GRAFICO.texto;
+    ctx.textAlign = 'center';
+    ctx.font = 'bold 14px "DejaVu Sans", sans-serif';
+    ctx.fillText(serie.titulo, (izq + der) / 2, arriba / 2);
+    ctx.font = '12px "DejaVu Sans", sans-serif';
+    ctx.fillText('x', (izq + der) / 2, alto - 14);
+    ctx.fillText('y', 16, (arriba + abajo) / 2);
+
+    // Leyenda en la esquina superior derecha
+    ctx.font = '10px "DejaVu Sans", sans-serif';
+    const anchoLeyenda = ctx.measureText(serie.etiqueta).width + 44;
+    const x0 = der - anchoLeyenda - 8, y0 = arriba + 8;
+    ctx.fillStyle = TEMA_GRAFICO.ejes;
+    ctx.fillRect(x0, y0, anchoLeyenda, 24);
+    ctx.strokeStyle = TEMA_GRAFICO.borde;
+    ctx.globalAlpha = 0.3;
+    ctx.strokeRect(x0 + 0.5, y0 + 0.5, anchoLeyenda - 1, 23);
+    ctx.globalAlpha = 1;
+    ctx.strokeStyle = TEMA_GRAFICO.curva;
+    ctx.lineWidth = 2;
+    ctx.beginPath();
+    ctx.moveTo(x0 + 8, y0 + 12);
+    ctx.lineTo(x0 + 30, y0 + 12);
+    ctx.stroke();
+    ctx.fillStyle = TEMA_GRAFICO.texto;
+    ctx.textAlign = 'left';
+    ctx.fillText(serie.etiqueta, x0 + 36, y0 + 12);
 }
 
 function agregarLineaConsola(texto, tipo = 'salida') {
@@ -430,5 +883,6 @@ function limpiar() {
     consolaInput.classList.add('oculto');
     userInputs = [];
     esperandoInput = false;
+    sesionActual = null;
     actualizarLineCount();
 }
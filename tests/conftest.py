@@ -0,0 +1,22 @@
+"""Configuración de pytest: los módulos de MathView están en la raíz del repositorio"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from app import app
+
+
+@pytest.fixture
+def cliente():
+    return app.test_client()
+
+
+@pytest.fixture
+def ejecutar(cliente):
+    """Compila y ejecuta un programa con /compilar y retorna la respuesta JSON"""
+    def f(codigo, inputs=()):
+        return cliente.post('/compilar', json={'codigo': codigo, 'inputs': list(inputs)}).get_json()
+    return f
@@ -0,0 +1,76 @@
+"""Almacén de imágenes compartido entre workers"""
+
+import json
+import os
+import subprocess
+import sys
+
+from cache import AlmacenDisco, clave_bytes
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_guarda_y_obtiene(tmp_path):
+    almacen = AlmacenDisco("prueba", directorio=str(tmp_path))
+    clave = clave_bytes(b"imagen")
+    almacen.guardar(clave, b"imagen")
+    assert clave in almacen
+    assert almacen.obtener(clave) == b"imagen"
+    # Otro proceso abriría el mismo directorio
+    assert AlmacenDisco("prueba", directorio=str(tmp_path)).obtener(clave) == b"imagen"
+
+
+def test_rechaza_claves_que_no_son_hashes(tmp_path):
+    almacen = AlmacenDisco("prueba", directorio=str(tmp_path))
+    almacen.guardar("../fuera", b"x")
+    assert not os.path.exists(tmp_path / "fuera")
+    assert almacen.obtener("..") is None
+    assert ".." not in almacen
+
+
+def test_desaloja_lo_usado_hace_mas_tiempo(tmp_path):
+    almacen = AlmacenDisco("prueba", max_bytes=250, directorio=str(tmp_path))
+    claves = [clave_bytes(bytes([i]) * 100) for i in range(3)]
+    for i, clave in enumerate(claves):
+        almacen.guardar(clave, bytes([i]) * 100)
+        os.utime(os.path.join(almacen.directorio, clave), (i, i))
+    almacen.guardar(clave_bytes(b"z" * 100), b"z" * 100)
+    assert claves[0] not in almacen and claves[1] not in almacen
+    assert claves[2] in almacen and len(almacen) == 2
+
+
+def test_imagen_dibujada_en_otro_proceso(cliente):
+    """/compilar en un worker y GET /imagen/<hash> en otro"""
+    script = (
+        "import json\n"
+        "from app import app\n"
+        "r = app.test_client().post('/compilar', json={'codigo': 'draw2d(cos(x) * 0.375, -4, 4);'})\n"
+        "print(json.dumps(r.get_json()))\n"
+    )
+    entorno = dict(os.environ, MATHVIEW_RENDERIZADORES="0")
+    salida = subprocess.run([sys.executable, "-c", script], cwd=RAIZ, env=entorno,
+                            capture_output=True, text=True, check=True).stdout
+    digest = json.loads(salida.strip().splitlines()[-1])["imagen"]
+
+    respuesta = cliente.get(f"/imagen/{digest}")
+    assert respuesta.status_code == 200
+    assert respuesta.mimetype.startswith("image/")
+
+
+def test_animacion_registrada_en_otro_proceso(cliente):
+    """/compilar con win2d en un worker y GET /animacion/<id> en otro"""
+    script = (
+        "import json\n"
+        "from app import app\n"
+        "codigo = 'win2d w(400, 300) { move(sin(x - 0.625 * t), 0, 6); lost(t > 1); }'\n"
+        "r = app.test_client().post('/compilar', json={'codigo': codigo})\n"
+        "print(json.dumps(r.get_json()))\n"
+    )
+    entorno = dict(os.environ, MATHVIEW_RENDERIZADORES="0")
+    salida = subprocess.run([sys.executable, "-c", script], cwd=RAIZ, env=entorno,
+                            capture_output=True, text=True, check=True).stdout
+    (animacion,) = json.loads(salida.strip().splitlines()[-1])["animaciones"]
+
+    respuesta = cliente.get(f"/animacion/{animacion['id']}")
+    assert respuesta.status_code == 200
+    assert len(respuesta.get_data()) > 0
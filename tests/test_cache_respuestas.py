@@ -0,0 +1,27 @@
+"""Caché de respuestas de /compilar"""
+
+import interpreter
+
+
+def test_no_guarda_respuestas_con_dibujo_fallido(ejecutar, monkeypatch):
+    codigo = "draw3d(x*y + 0.125, -2, 2, -2, 2);"
+
+    def pool_sin_respuesta(funcion, *args):
+        raise TimeoutError("el pool de dibujo no respondió")
+
+    monkeypatch.setattr(interpreter, "renderizar", pool_sin_respuesta)
+    fallida = ejecutar(codigo)
+    assert fallida["estado"] == "con_errores"
+
+    monkeypatch.undo()
+    respuesta = ejecutar(codigo)
+    assert respuesta["estado"] == "correcto", respuesta["errores"]
+    assert respuesta["imagen"]
+
+
+def test_guarda_respuestas_correctas(cliente):
+    datos = {"codigo": "pri(6 * 7);"}
+    primera = cliente.post('/compilar', json=datos)
+    segunda = cliente.post('/compilar', json=datos)
+    assert not primera.cache_control.no_store
+    assert segunda.get_data() == primera.get_data()
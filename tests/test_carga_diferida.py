@@ -0,0 +1,28 @@
+"""numpy se importa solo cuando una expresión lo necesita"""
+
+import os
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def numpy_cargado(codigo):
+    """True si ejecutar el programa en un proceso nuevo importó numpy"""
+    script = (
+        "import sys\n"
+        "from app import app\n"
+        f"app.test_client().post('/compilar', json={{'codigo': {codigo!r}}})\n"
+        "print('numpy' in sys.modules)\n"
+    )
+    entorno = dict(os.environ, MATHVIEW_RENDERIZADORES="0")
+    salida = subprocess.run([sys.executable, "-c", script], cwd=RAIZ, env=entorno,
+                            capture_output=True, text=True, check=True).stdout
+    return salida.strip().endswith("True")
+
+
+def test_abs_pi_y_e_no_cargan_numpy():
+    assert not numpy_cargado("pri(abs(-2) + pi + e);")
+
+
+def test_funciones_de_numpy_lo_cargan():
+    assert numpy_cargado("pri(sqrt(2));")
@@ -0,0 +1,61 @@
+"""Análisis incremental de documentos"""
+
+import pytest
+from documents import Documento
+
+CODIGO = "int a = 1;\nint b = 2;\nif (a < b) {\n    pri(a);\n} else {\n    pri(b);\n}\npri(c);\n"
+
+
+def editar(documento, inicio, fin, texto):
+    documento.aplicar_cambios([{"inicio": inicio, "fin": fin, "texto": texto}])
+    return documento
+
+
+@pytest.mark.parametrize("inicio, fin, texto", [
+    (8, 9, "5"),                          # Cambia un valor
+    (0, 10, ""),                          # Borra la declaración de a
+    (20, 21, ""),                         # Borra un ';': une dos instrucciones
+    (len(CODIGO), len(CODIGO), "int c = 3;\n"),
+    (len("int a = 1;\n"), len("int a = 1;\n"), 'pri("a; b");\n'),  # ';' dentro de una cadena
+    (0, 0, "/* "),                        # Comentario sin cerrar
+])
+def test_igual_que_analizar_de_cero(inicio, fin, texto):
+    documento = editar(Documento(CODIGO), inicio, fin, texto)
+    esperado = Documento(documento.texto)
+    assert documento.texto == CODIGO[:inicio] + texto + CODIGO[fin:]
+    assert documento.diagnosticos() == esperado.diagnosticos()
+    assert len(documento.segmentos) == len(esperado.segmentos)
+
+
+def test_reanaliza_solo_lo_editado():
+    documento = Documento(CODIGO * 20)
+    editar(documento, 8, 9, "5")
+    assert documento.reanalizados <= 2
+    assert len(documento.segmentos) == len(Documento(documento.texto).segmentos) > 80
+
+
+def test_posicion_de_los_diagnosticos():
+    documento = Documento(CODIGO)
+    (diagnostico,) = [d for d in documento.diagnosticos() if d["fase"] == "semantico"]
+    assert diagnostico["linea"] == 8
+    assert "'c'" in diagnostico["mensaje"]
+
+
+def test_rango_invalido():
+    with pytest.raises(ValueError):
+        editar(Documento(CODIGO), 5, 2, "")
+
+
+def test_endpoints(cliente):
+    abierto = cliente.post('/documento', json={'codigo': CODIGO}).get_json()
+    token, version = abierto["documento"], abierto["version"]
+    assert abierto["estado"] == "con_errores"
+
+    cambios = [{"inicio": len(CODIGO), "fin": len(CODIGO), "texto": "int c = 3;\n"}]
+    editado = cliente.post(f'/documento/{token}/editar', json={'version': version, 'cambios': cambios}).get_json()
+    # pri(c) usa c antes de declararla: sigue con errores, pero la versión avanza
+    assert editado["version"] == version + 1
+
+    desfasado = cliente.post(f'/documento/{token}/editar', json={'version': version, 'cambios': []})
+    assert desfasado.status_code == 409
+    assert cliente.post('/documento/no-existe/editar', json={'version': 0, 'cambios': []}).status_code == 410
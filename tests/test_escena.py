@@ -0,0 +1,48 @@
+"""Gráficos que la escena conserva hasta el final del programa según el modo"""
+
+import pytest
+from interpreter import GRAFICOS_MAX_ESCENA, Interpreter
+
+BUCLE = 'int i = 0; while (i < %d) { draw3d(sin(3*x*y), -10, 10, -10, 10, "mapa"); i = i + 1; }'
+
+
+def ejecutar_midiendo(codigo, **opciones):
+    """(resultado, máximo de gráficos que tuvo la escena a la vez)"""
+    interprete = Interpreter(codigo, **opciones)
+    registrar, maximo = interprete.registrar_grafico, [0]
+
+    def registrar_midiendo(elemento, mensaje):
+        registrar(elemento, mensaje)
+        maximo[0] = max(maximo[0], len(interprete.escena))
+
+    interprete.registrar_grafico = registrar_midiendo
+    return interprete.ejecutar(), maximo[0]
+
+
+def test_ultima_conserva_un_solo_grafico():
+    resultado, maximo = ejecutar_midiendo(BUCLE % 50)
+    assert maximo == 1
+    assert resultado["imagen"] and not resultado["errores"]
+
+
+@pytest.mark.parametrize("modo", ["lista", "subplots"])
+def test_lista_y_subplots_tienen_tope(modo):
+    n = GRAFICOS_MAX_ESCENA + 5
+    resultado, maximo = ejecutar_midiendo(BUCLE % n, modo_escena=modo)
+    assert maximo == GRAFICOS_MAX_ESCENA
+    assert resultado["errores"] == [
+        f'Se omitieron 5 gráficos: en el modo "{modo}" se devuelven hasta {GRAFICOS_MAX_ESCENA}']
+
+
+def test_lista_descarta_las_muestras_ya_dibujadas():
+    interprete = Interpreter('draw2d(sin(x), -3, 3);', modo_grafico="datos", modo_escena="lista")
+    interprete.ejecutar_codigo()
+    (elemento,) = interprete.escena
+    assert "serie" in elemento and "x" not in elemento and "y" not in elemento
+
+
+def test_ultima_dentro_de_win2d_conserva_el_fondo():
+    codigo = 'draw3d(x*y, -1, 1, -1, 1); win2d w(400, 300) { draw2d(x, 0, 1); draw2d(x^2, 0, 1); move(sin(x + t), 0, 6); }'
+    resultado, maximo = ejecutar_midiendo(codigo)
+    assert maximo <= 2
+    assert resultado["animaciones"] and resultado["imagen"]
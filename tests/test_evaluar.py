@@ -0,0 +1,42 @@
+"""Endpoint /evaluar"""
+
+import pytest
+
+
+def test_evalua_puntos(cliente):
+    respuesta = cliente.post('/evaluar', json={'expresion': 'x^2', 'x': [1, 2, 3]})
+    assert respuesta.status_code == 200
+    assert respuesta.get_json()["valores"] == [1.0, 4.0, 9.0]
+
+
+@pytest.mark.parametrize("expresion", ["fact(10^8)", "x + 9^9^9"])
+def test_limite_de_calculo_es_error_400(cliente, expresion):
+    respuesta = cliente.post('/evaluar', json={'expresion': expresion, 'x': [1, 2]})
+    assert respuesta.status_code == 400
+    datos = respuesta.get_json()
+    assert datos["estado"] == "error"
+    assert datos["mensaje"].startswith("Error evaluando la expresión:")
+
+
+# x[1] no existe en el último bloque, que tiene un solo punto
+PUNTOS_CON_ERROR_AL_FINAL = 65536 + 1
+
+
+def test_error_en_un_bloque_posterior_cierra_el_json(cliente):
+    x = list(range(PUNTOS_CON_ERROR_AL_FINAL))
+    respuesta = cliente.post('/evaluar', json={'expresion': 'x[1]', 'x': x})
+    assert respuesta.status_code == 200
+    datos = respuesta.get_json()
+    assert datos["estado"] == "error"
+    assert datos["mensaje"].startswith("Error evaluando la expresión:")
+    assert len(datos["valores"]) < PUNTOS_CON_ERROR_AL_FINAL
+
+
+def test_error_en_un_bloque_posterior_corta_el_binario(cliente):
+    import numpy as np
+    x = np.arange(PUNTOS_CON_ERROR_AL_FINAL, dtype='<f8')
+    respuesta = cliente.post('/evaluar?expresion=x[1]&variables=x', data=x.tobytes(),
+                             content_type='application/octet-stream',
+                             headers={'Accept': 'application/octet-stream'})
+    assert respuesta.content_length == x.nbytes
+    assert len(respuesta.get_data()) < x.nbytes
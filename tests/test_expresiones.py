@@ -0,0 +1,37 @@
+"""Texto de las expresiones reconstruido desde los tokens"""
+
+import pytest
+from ast_nodes import unir_lexemas
+from lexer import Lexer
+
+
+def texto(codigo):
+    return unir_lexemas(Lexer().tokenizar(codigo)["tokens"])
+
+
+@pytest.mark.parametrize("codigo, esperado", [
+    ("1e-5", "1e-5"),
+    ("2.5e3", "2.5e3"),
+    ("1E+3", "1E+3"),
+    ("x*1e300", "x * 1e300"),
+    ("2*e-1", "2 * e -1"),
+    ("2 e -1", "2 e -1"),
+])
+def test_literales_con_exponente(codigo, esperado):
+    assert texto(codigo) == esperado
+
+
+@pytest.mark.parametrize("codigo, salida", [
+    ("dec x = 1e-5; pri(x);", "1e-05"),
+    ("dec x = 2.5e3; pri(x);", "2500.0"),
+    ("dec x = 3 * 1E+2; pri(x);", "300.0"),
+])
+def test_programas_con_exponente(ejecutar, codigo, salida):
+    respuesta = ejecutar(codigo)
+    assert respuesta["estado"] == "correcto"
+    assert respuesta["salida"] == salida
+
+
+def test_grafico_con_exponente(ejecutar):
+    respuesta = ejecutar("draw2d(x, 0, 1e-300);")
+    assert respuesta["estado"] == "correcto", respuesta["errores"]
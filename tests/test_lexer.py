@@ -0,0 +1,38 @@
+"""Escáner del lexer: comentarios, expresiones //...// y posiciones"""
+
+import pytest
+from lexer import Lexer
+
+
+def tokens(codigo):
+    return Lexer().tokenizar(codigo)["tokens"]
+
+
+@pytest.mark.parametrize("comentario", [
+    "// resultado // ok",
+    "// x^2 //",
+    "//x^2 // ok",
+    "// sin cerrar",
+])
+def test_comentarios_de_linea(comentario):
+    assert [t[0] for t in tokens(f"int n = 1; {comentario}\npri(n);")] == \
+        ["int", "n", "=", "1", ";", "pri", "(", "n", ")", ";"]
+
+
+def test_expresion_entre_barras():
+    assert [(t[0], t[1]) for t in tokens("//x^2 + 1//")] == [("//x^2 + 1//", "EXPRESION_MATH")]
+
+
+def test_posiciones():
+    codigo = "int n = 1;\n/* varias\nlíneas */  pri(n);"
+    assert [(t[0], t[2], t[3]) for t in tokens(codigo)] == [
+        ("int", 1, 1), ("n", 1, 5), ("=", 1, 7), ("1", 1, 9), (";", 1, 10),
+        ("pri", 3, 12), ("(", 3, 15), ("n", 3, 16), (")", 3, 17), (";", 3, 18),
+    ]
+
+
+def test_limite_de_instruccion():
+    codigo = "if (n > 1) { pri(n); } else { pri(0); } int m = 2;"
+    fin = Lexer().limite_instruccion(codigo)
+    assert codigo[:fin] == "if (n > 1) { pri(n); } else { pri(0); }"
+    assert codigo[fin:].strip() == "int m = 2;"
@@ -0,0 +1,25 @@
+"""Límites de costo del evaluador seguro"""
+
+import sys
+
+import pytest
+import safe_eval
+
+
+def test_enteros_admitidos_se_pueden_imprimir():
+    limite = sys.get_int_max_str_digits()
+    if limite:
+        assert len(str(2 ** safe_eval.BITS_MAX)) <= limite
+
+
+@pytest.mark.parametrize("codigo", ["pri(10^5000);", "pri(fact(2000));"])
+def test_resultado_que_no_se_puede_imprimir_excede_el_limite(ejecutar, codigo):
+    respuesta = ejecutar(codigo)
+    assert respuesta["estado"] == "con_errores"
+    assert respuesta["errores"][0].startswith("❌ Límite de cálculo:")
+
+
+def test_entero_grande_dentro_del_limite(ejecutar):
+    respuesta = ejecutar("pri(10^4000);")
+    assert respuesta["estado"] == "correcto"
+    assert respuesta["salida"] == "1" + "0" * 4000
@@ -0,0 +1,33 @@
+"""Muestreo adaptativo de draw2d"""
+
+import numpy as np
+import pytest
+from sampling import MUESTRAS_INICIALES, PRESUPUESTO_2D, muestrear_2d
+
+
+def test_rango_invertido_se_muestrea_como_el_normal():
+    f = lambda x: np.sin(50 * x)
+    x, y = muestrear_2d(f, 10, 0)
+    x_normal, y_normal = muestrear_2d(f, 0, 10)
+    assert np.all(np.diff(x) > 0)
+    assert len(x) == len(x_normal) == PRESUPUESTO_2D
+    assert not np.isnan(y).any()
+
+
+def test_funcion_periodica_con_el_paso_de_la_malla_no_queda_plana():
+    x, y = muestrear_2d(lambda x: np.cos(2 * np.pi * x), 0, 128)
+    assert len(x) > MUESTRAS_INICIALES
+    assert np.ptp(y) > 1.9
+
+
+def test_curva_suave_usa_pocos_puntos():
+    x, y = muestrear_2d(lambda x: x ** 2, -3, 3)
+    assert len(x) < 400
+    assert (x[0], x[-1]) == (-3, 3)
+
+
+@pytest.mark.parametrize("xmin, xmax", [(-5, 5), (5, -5)])
+def test_polos_cortados(xmin, xmax):
+    x, y = muestrear_2d(np.tan, xmin, xmax)
+    # tan tiene cuatro polos en [-5, 5]: ±π/2 y ±3π/2
+    assert np.isnan(y).sum() == 4
@@ -0,0 +1,34 @@
+"""Gráficos que el dibujo rápido de raster.py deja a matplotlib"""
+
+import numpy as np
+import pytest
+import raster
+
+pytestmark = pytest.mark.skipif(raster._RUTA_FUENTES is None, reason="sin fuentes DejaVu")
+
+
+def test_admite_rango_normal():
+    x = np.linspace(-3, 3, 100)
+    assert raster.admite_2d(x, np.sin(x), "sin(x)")
+
+
+@pytest.mark.parametrize("inicio, fin", [(3, -3), (1, 1), (0, np.inf)])
+def test_rechaza_rangos_de_x_invalidos(inicio, fin):
+    x = np.linspace(inicio, fin, 100)
+    assert not raster.admite_2d(x, np.zeros_like(x), "f")
+
+
+def test_rechaza_valores_que_desbordan_los_limites():
+    x = np.linspace(0, 1, 100)
+    y = np.where(x < 0.5, -1e308, 1e308)
+    assert not raster.admite_2d(x, y, "f")
+
+
+@pytest.mark.parametrize("codigo", [
+    "draw2d(sin(x), 3, -3);",
+    "draw2d(x, 1, 1);",
+    "draw2d(exp(x), 0, 800);",
+])
+def test_grafico_pasa_a_matplotlib(ejecutar, codigo):
+    respuesta = ejecutar(codigo)
+    assert respuesta["estado"] == "correcto", respuesta["errores"]
@@ -0,0 +1,49 @@
+"""Ejecuciones pausadas en put() y reanudadas con /continuar"""
+
+from sessions import SessionStore
+
+PROGRAMA = 'int a; int b; pri("a?"); put(a); pri("b?"); put(b); pri(a + b);'
+
+
+def test_tomar_retira_la_sesion():
+    sesiones = SessionStore()
+    token = sesiones.guardar("estado")
+    assert sesiones.tomar(token) == "estado"
+    assert sesiones.tomar(token) is None
+
+
+def test_sesion_expirada():
+    sesiones = SessionStore(ttl=-1)
+    assert sesiones.tomar(sesiones.guardar("estado")) is None
+
+
+def test_desaloja_la_menos_reciente():
+    sesiones = SessionStore(max_sesiones=2)
+    primera, segunda, tercera = (sesiones.guardar(n) for n in range(3))
+    assert len(sesiones) == 2
+    assert sesiones.tomar(primera) is None
+    assert sesiones.tomar(tercera) == 2
+
+
+def test_reanuda_sin_reejecutar(cliente, ejecutar):
+    pausa = ejecutar(PROGRAMA)
+    assert pausa["estado"] == "necesita_input"
+
+    respuesta = cliente.post('/continuar', json={'sesion': pausa["sesion"], 'valor': '3'}).get_json()
+    assert respuesta["estado"] == "necesita_input"
+    respuesta = cliente.post('/continuar', json={'sesion': respuesta["sesion"], 'valor': '4'}).get_json()
+
+    # Mismo resultado que ejecutar el programa completo con las dos entradas
+    completo = ejecutar(PROGRAMA, ['3', '4'])
+    assert respuesta["estado"] == completo["estado"] == "correcto"
+    assert respuesta["salida"] == completo["salida"]
+    assert respuesta["salida"].splitlines()[-1] == "7"
+
+
+def test_sesion_usada_o_desconocida_es_410(cliente, ejecutar):
+    token = ejecutar(PROGRAMA)["sesion"]
+    assert cliente.post('/continuar', json={'sesion': token, 'valor': '1'}).status_code == 200
+    assert cliente.post('/continuar', json={'sesion': token, 'valor': '1'}).status_code == 410
+    respuesta = cliente.post('/continuar', json={'sesion': 'no-existe', 'valor': '1'})
+    assert respuesta.status_code == 410
+    assert respuesta.get_json()["estado"] == "sesion_expirada"